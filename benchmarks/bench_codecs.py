@@ -0,0 +1,84 @@
+"""Microbenchmarks of the serializers in ledger.app.codecs against the marshmallow schemas.
+
+Usage:
+    python -m benchmarks.bench_codecs --entries 1000 --repeat 50
+"""
+import argparse
+import json
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+import pytz
+
+from benchmarks.common import report, summarize, time_calls
+
+
+def make_entries(count: int) -> list:
+    from ledger.app.accounting import LedgerEntry
+    from ledger.app.accounting_types import credit_type, debit_type
+
+    created_at = datetime(2019, 1, 1, tzinfo=pytz.UTC)
+    return [
+        LedgerEntry(
+            id=index,
+            account_number="12345678",
+            amount=Decimal("100.25"),
+            accounting_type=credit_type if index % 2 else debit_type,
+            created_at=created_at,
+            transaction_id=str(uuid.uuid4()),
+            balance=Decimal(index),
+        )
+        for index in range(count)
+    ]
+
+
+def compare(name: str, schema_func, codec_func, repeat: int) -> dict:
+    schema = summarize(time_calls(schema_func, repeat))
+    codec = summarize(time_calls(codec_func, repeat))
+    return {
+        "name": name,
+        "schema": schema,
+        "codec": codec,
+        "speedup": round(schema["median_ms"] / codec["median_ms"], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=1000, help="Entries per history page.")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    from ledger.app import codecs
+    from ledger.app.schemas import credit_schema, ledger_entry_schema
+
+    entries = make_entries(args.entries)
+    credit_request = {"creditAmount": "1000.81", "accountNumber": "19201923830"}
+    credit_requests = [credit_request] * args.entries
+
+    results = [
+        compare(
+            f"dump_{args.entries}_entries",
+            lambda: [ledger_entry_schema.dump(entry).data for entry in entries],
+            lambda: codecs.dump_ledger_entries(entries),
+            args.repeat,
+        ),
+        compare(
+            f"dump_{args.entries}_entries_to_json",
+            lambda: json.dumps([ledger_entry_schema.dump(entry).data for entry in entries]),
+            lambda: json.dumps(codecs.dump_ledger_entries(entries)),
+            args.repeat,
+        ),
+        compare(
+            f"load_{args.entries}_credit_requests",
+            lambda: [credit_schema.load(data).data for data in credit_requests],
+            lambda: [codecs.load_credit(data) for data in credit_requests],
+            args.repeat,
+        ),
+    ]
+    report("codecs", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Latency of the service under many concurrent connections, with sync and gevent gunicorn workers.
+
+Generates a ledger with ``benchmarks.datagen``, then starts gunicorn with ``gunicorn.conf.py`` once for
+every worker class and opens the given number of connections at once, each sending one request: mostly
+balance reads of Zipf distributed accounts and some credit postings. Sync workers serve as many requests
+at a time as they have threads, gevent workers serve every connection on a greenlet that yields while
+waiting on the database, so the tail latency shows how each copes with slow I/O under load. Needs the
+``gevent`` extra, ``pip install ledger[gevent]``.
+
+Usage:
+    python -m benchmarks.bench_concurrency --connections 1000 --rounds 5 --workers 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+from sqlalchemy.engine.url import make_url
+
+from benchmarks import datagen
+from benchmarks.common import (
+    create_benchmark_app,
+    get_database_uri,
+    get_environment,
+    report,
+    reset_database,
+    summarize,
+)
+
+
+ACCESS_TOKEN = "benchmark-token"
+WORKER_CLASSES = ["sync", "gevent"]
+STARTUP_TIMEOUT = 30
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(worker_class: str, port: int, workers: int, threads: int, pool_size: int):
+    environment = {
+        **os.environ,
+        "SQLALCHEMY_DATABASE_URI": get_database_uri(),
+        "SQLALCHEMY_TRACK_MODIFICATIONS": "",
+        "GUNICORN_BIND": f"127.0.0.1:{port}",
+        "GUNICORN_WORKER_CLASS": worker_class,
+        "GUNICORN_WORKERS": str(workers),
+        "GUNICORN_THREADS": str(threads),
+    }
+    # sqlite databases in files aren't pooled.
+    if make_url(get_database_uri()).get_backend_name() != "sqlite":
+        environment["SQLALCHEMY_POOL_SIZE"] = str(pool_size)
+    command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "ledger_runner:app"]
+    return subprocess.Popen(command, env=environment, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_until_listening(port: int):
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"gunicorn didn't start listening on port {port}.")
+
+
+def build_request(method: str, path: str, body: dict = None) -> bytes:
+    data = b"" if body is None else json.dumps(body).encode()
+    headers = [
+        f"{method} {path} HTTP/1.1",
+        "Host: localhost",
+        f"Authorization: Token {ACCESS_TOKEN}",
+        "Connection: close",
+        f"Content-Length: {len(data)}",
+    ]
+    if body is not None:
+        headers.append("Content-Type: application/json")
+    return "\r\n".join(headers).encode() + b"\r\n\r\n" + data
+
+
+async def send(port: int, request: bytes, timeout: float):
+    """Send a request on a new connection and return its status and duration in seconds."""
+    started = time.perf_counter()
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection("127.0.0.1", port), timeout)
+        writer.write(request)
+        response = await asyncio.wait_for(reader.read(), timeout)
+        writer.close()
+        status = int(response.split(b" ", 2)[1])
+    except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+        status = None
+    return status, time.perf_counter() - started
+
+
+async def run_round(port: int, requests: list, timeout: float) -> list:
+    return await asyncio.gather(*(send(port, request, timeout) for request in requests))
+
+
+def build_requests(accounts: list, count: int, post_fraction: float, rng: random.Random) -> list:
+    weights = datagen.zipf_weights(len(accounts), 1.1)
+    requests = []
+    for _ in range(count):
+        account_number = rng.choices(accounts, cum_weights=weights)[0]
+        if rng.random() < post_fraction:
+            body = {"creditAmount": "1.00", "accountNumber": account_number}
+            requests.append(build_request("POST", "/ledger/credit", body))
+        else:
+            requests.append(build_request("GET", f"/account/{account_number}/balance"))
+    return requests
+
+
+def measure(worker_class: str, accounts: list, args) -> dict:
+    port = get_free_port()
+    server = start_server(worker_class, port, args.workers, args.threads, args.pool_size)
+    rng = random.Random(args.seed)
+    timings, failed = [], 0
+    # asyncio.run needs Python 3.7, the loop is managed explicitly to run on 3.6.
+    loop = asyncio.new_event_loop()
+    try:
+        wait_until_listening(port)
+        started = time.perf_counter()
+        for _ in range(args.rounds):
+            requests = build_requests(accounts, args.connections, args.post_fraction, rng)
+            for status, duration in loop.run_until_complete(run_round(port, requests, args.timeout)):
+                if status is not None and status < 400:
+                    timings.append(duration)
+                else:
+                    failed += 1
+        elapsed = time.perf_counter() - started
+    finally:
+        loop.close()
+        server.terminate()
+        server.wait()
+    return {
+        "worker_class": worker_class,
+        "connections": args.connections,
+        "requests_succeeded": len(timings),
+        "requests_failed": failed,
+        "latency": summarize(timings) if timings else None,
+        "per_second": round(len(timings) / elapsed, 1),
+    }
+
+
+def run(args) -> list:
+    from ledger.authorization.models import Token
+    from ledger.database import db
+
+    app = create_benchmark_app()
+    reset_database(app)
+    accounts = datagen.account_numbers(args.accounts)
+    with app.app_context():
+        datagen.generate(accounts, args.entries, seed=args.seed)
+        Token(access_token=ACCESS_TOKEN).save()
+        db.session.remove()
+    return [measure(worker_class, accounts, args) for worker_class in args.worker_classes]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--connections", type=int, default=1000, help="Concurrent connections per round.")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--post-fraction", type=float, default=0.1, help="Share of requests that post.")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn worker processes.")
+    parser.add_argument("--threads", type=int, default=8, help="Threads of each sync worker.")
+    parser.add_argument("--pool-size", type=int, default=10, help="Database connections of each worker.")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds before a request fails.")
+    parser.add_argument("--worker-classes", nargs="+", default=WORKER_CLASSES, choices=WORKER_CLASSES)
+    parser.add_argument("--output", help="File to write the report to instead of stdout.")
+    args = parser.parse_args()
+
+    parameters = {key: value for key, value in vars(args).items() if key != "output"}
+    report("concurrency", run(args), args.output, parameters=parameters, environment=get_environment())
+
+
+if __name__ == "__main__":
+    main()
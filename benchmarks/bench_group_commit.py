@@ -0,0 +1,97 @@
+"""Posting throughput and latency with and without group commit.
+
+Threads in one process stand in for the concurrent requests handled by a worker. Each thread posts
+credits to random accounts, once with ``Ledger.add_entry`` committing every posting and once through the
+group committer. Latency is measured per posting, from the call until its entry is returned.
+
+Usage:
+    python -m benchmarks.bench_group_commit --threads 32 --postings 200 --accounts 100
+"""
+import argparse
+import random
+import threading
+import time
+from decimal import Decimal
+
+from benchmarks.common import create_benchmark_app, report, reset_database, summarize, time_calls
+
+
+AMOUNT = Decimal("1.00")
+MODES = ["direct", "group"]
+
+
+def run(mode: str, threads: int, postings: int, accounts: list, interval_ms: float, max_entries: int):
+    from ledger.app.accounting import Balance
+    from ledger.app.accounting_types import TypeCode
+    from ledger.app.group_commit import GroupCommitter
+    from ledger.database import db
+
+    app = create_benchmark_app()
+    reset_database(app)
+    committer = GroupCommitter()
+    committer.init_app(app)
+    committer.enabled = mode == "group"
+    committer.interval = interval_ms / 1000
+    committer.max_entries = max_entries
+
+    timings = []
+    failed = []
+
+    def worker(seed):
+        rng = random.Random(seed)
+        with app.app_context():
+            try:
+                timings.extend(
+                    time_calls(
+                        lambda: committer.add_entry(rng.choice(accounts), AMOUNT, TypeCode.CREDIT), postings
+                    )
+                )
+            except Exception as exception:
+                failed.append(repr(exception))
+
+    workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    committer.stop()
+
+    with app.app_context():
+        stored_balance = sum(Balance.get_for_account(account_number) for account_number in accounts)
+        db.session.remove()
+    return {
+        "mode": mode,
+        "threads": threads,
+        "accounts": len(accounts),
+        "postings_succeeded": len(timings),
+        "failed_threads": failed,
+        "elapsed_seconds": round(elapsed, 3),
+        "postings_per_second": round(len(timings) / elapsed, 1),
+        "latency": summarize(timings) if timings else None,
+        "expected_balance": str(AMOUNT * len(timings)),
+        "stored_balance": str(stored_balance),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--postings", type=int, default=200, help="Postings per thread.")
+    parser.add_argument("--accounts", type=int, default=100)
+    parser.add_argument("--interval-ms", type=float, default=5)
+    parser.add_argument("--max-entries", type=int, default=100)
+    parser.add_argument("--modes", nargs="+", default=MODES, choices=MODES)
+    args = parser.parse_args()
+
+    accounts = [f"{index:08d}" for index in range(args.accounts)]
+    results = [
+        run(mode, args.threads, args.postings, accounts, args.interval_ms, args.max_entries)
+        for mode in args.modes
+    ]
+    report("group_commit", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Transaction history latency with and without the (account_number, id) ledger index.
+
+Seeds the ledger with rows spread over many accounts, then times the history queries for one account
+and records the query plan, first without ``ix_ledger_account_number_id`` and then with it.
+
+Usage:
+    python -m benchmarks.bench_history_index --rows 2000000 --accounts 10000
+"""
+import argparse
+import random
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import text
+
+from benchmarks.common import create_benchmark_app, report, reset_database, summarize, time_calls
+
+
+INDEX_NAME = "ix_ledger_account_number_id"
+SEED_CHUNK_SIZE = 50000
+HISTORY_QUERY = "SELECT * FROM ledger WHERE account_number = :account_number ORDER BY id DESC LIMIT :limit"
+
+
+def seed(rows: int, accounts: list):
+    from ledger.app import models
+    from ledger.database import db
+
+    rng = random.Random(0)
+    created_at = datetime.utcnow()
+    for start in range(0, rows, SEED_CHUNK_SIZE):
+        records = [
+            {
+                "account_number": rng.choice(accounts),
+                "amount": Decimal(rng.randint(1, 100000)) / 100,
+                "accounting_type": rng.choice("CD"),
+                "transaction_id": str(uuid.uuid4()),
+                "created_at": created_at,
+            }
+            for _ in range(min(SEED_CHUNK_SIZE, rows - start))
+        ]
+        db.session.execute(models.Ledger.__table__.insert(), records)
+        db.session.commit()
+
+
+def query_plan(account_number: str, limit: int) -> list:
+    from ledger.database import db, get_dialect_name
+
+    explain = "EXPLAIN QUERY PLAN" if get_dialect_name() == "sqlite" else "EXPLAIN"
+    result = db.session.execute(
+        text(f"{explain} {HISTORY_QUERY}"), {"account_number": account_number, "limit": limit}
+    )
+    return [" ".join(str(column) for column in row) for row in result]
+
+
+def measure(account_number: str, limit: int, repeat: int) -> dict:
+    from ledger.app.accounting import Ledger
+    from ledger.database import db
+
+    def limited_history():
+        Ledger.get_entries_for_account_with_limit(account_number, limit)
+        db.session.rollback()
+
+    def full_history():
+        Ledger.get_entries_for_account(account_number)
+        db.session.rollback()
+
+    return {
+        "query_plan": query_plan(account_number, limit),
+        f"history_limit_{limit}": summarize(time_calls(limited_history, repeat)),
+        "full_history": summarize(time_calls(full_history, repeat)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000000)
+    parser.add_argument("--accounts", type=int, default=10000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    from ledger.database import db
+
+    app = create_benchmark_app()
+    reset_database(app)
+    accounts = [f"{index:08d}" for index in range(args.accounts)]
+    with app.app_context():
+        db.session.execute(text(f"DROP INDEX {INDEX_NAME}"))
+        db.session.commit()
+        seed(args.rows, accounts)
+
+        account_number = accounts[0]
+        entries = db.session.execute(
+            text("SELECT count(*) FROM ledger WHERE account_number = :account_number"),
+            {"account_number": account_number},
+        ).scalar()
+        results = {"rows": args.rows, "accounts": args.accounts, "account_entries": entries}
+
+        results["without_index"] = measure(account_number, args.limit, args.repeat)
+        db.session.execute(text(f"CREATE INDEX {INDEX_NAME} ON ledger (account_number, id)"))
+        db.session.commit()
+        results["with_index"] = measure(account_number, args.limit, args.repeat)
+    report("history_index", results)
+
+
+if __name__ == "__main__":
+    main()
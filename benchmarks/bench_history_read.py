@@ -0,0 +1,111 @@
+"""Memory and latency of reading a large account history.
+
+Compares hydrating ORM records and copying them into entries, the read path before history was read as
+plain rows, with ``Ledger.get_entries_for_account`` and with streaming through
+``Ledger.iter_entries_for_account``. Peak memory is measured with tracemalloc.
+
+Usage:
+    python -m benchmarks.bench_history_read --entries 100000
+"""
+import argparse
+import gc
+import tracemalloc
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from benchmarks.common import create_benchmark_app, report, reset_database, summarize, time_calls
+
+
+ACCOUNT_NUMBER = "12345678"
+SEED_CHUNK_SIZE = 50000
+
+
+def seed(entries: int):
+    from ledger.app import models
+    from ledger.database import db
+
+    created_at = datetime.utcnow()
+    for start in range(0, entries, SEED_CHUNK_SIZE):
+        records = [
+            {
+                "account_number": ACCOUNT_NUMBER,
+                "amount": Decimal("1.00"),
+                "accounting_type": "C",
+                "transaction_id": str(uuid.uuid4()),
+                "created_at": created_at,
+                "balance_after": Decimal(index + 1),
+            }
+            for index in range(start, min(start + SEED_CHUNK_SIZE, entries))
+        ]
+        db.session.execute(models.Ledger.__table__.insert(), records)
+        db.session.commit()
+
+
+def orm_entries():
+    """Read path before history was read as plain rows."""
+    from ledger.app import models
+    from ledger.app.accounting import Ledger
+
+    query = models.Ledger.query.filter_by(account_number=ACCOUNT_NUMBER).order_by(models.Ledger.id.desc())
+    return [Ledger._record_to_entry(record) for record in query]
+
+
+def core_entries():
+    from ledger.app.accounting import Ledger
+
+    return Ledger.get_entries_for_account(ACCOUNT_NUMBER)
+
+
+def streamed_entries():
+    from ledger.app.accounting import Ledger
+
+    count = 0
+    for _ in Ledger.iter_entries_for_account(ACCOUNT_NUMBER):
+        count += 1
+    return count
+
+
+def peak_memory_mb(func) -> float:
+    from ledger.database import db
+
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    db.session.remove()
+    return round(peak / 1024 / 1024, 1)
+
+
+def measure(func, repeat: int) -> dict:
+    from ledger.database import db
+
+    def call():
+        func()
+        db.session.remove()
+
+    return {"peak_memory_mb": peak_memory_mb(func), "latency": summarize(time_calls(call, repeat))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_benchmark_app()
+    reset_database(app)
+    with app.app_context():
+        seed(args.entries)
+        results = {
+            "entries": args.entries,
+            "orm": measure(orm_entries, args.repeat),
+            "core": measure(core_entries, args.repeat),
+            "streamed": measure(streamed_entries, args.repeat),
+        }
+    report("history_read", results)
+
+
+if __name__ == "__main__":
+    main()
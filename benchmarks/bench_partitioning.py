@@ -0,0 +1,140 @@
+"""History and posting latency on PostgreSQL with the ledger table partitioned by month and without.
+
+Seeds the ledger with rows spread over many accounts and months, then times the history queries of one
+account (the latest page, a page deep in the history, one month with `from`/`to` and the balance at a
+point in time) and posting new entries. Needs a PostgreSQL 11 or later BENCHMARK_DATABASE_URI.
+
+Usage:
+    python -m benchmarks.bench_partitioning --rows 2000000 --accounts 10000 --months 24
+"""
+import argparse
+import random
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytz
+from sqlalchemy import text
+
+from benchmarks.common import create_benchmark_app, report, reset_database, summarize, time_calls
+
+
+SEED_CHUNK_SIZE = 50000
+MODES = ["unpartitioned", "partitioned"]
+PARTITION_STATEMENTS = [
+    "ALTER TABLE ledger RENAME TO ledger_unpartitioned",
+    "DROP INDEX ix_ledger_account_number_id",
+    "DROP INDEX ix_ledger_account_number_created_at",
+    "CREATE TABLE ledger (LIKE ledger_unpartitioned INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)",
+    "ALTER SEQUENCE ledger_id_seq OWNED BY ledger.id",
+    "DROP TABLE ledger_unpartitioned",
+    "CREATE INDEX ix_ledger_account_number_id ON ledger (account_number, id)",
+    "CREATE INDEX ix_ledger_account_number_created_at ON ledger (account_number, created_at)",
+    "CREATE TABLE ledger_default PARTITION OF ledger DEFAULT",
+]
+
+
+def partition_ledger(first_month: datetime, last_month: datetime):
+    """Replace the empty ledger table with a table partitioned like the partitioning migration does."""
+    from ledger.app import partitions
+    from ledger.database import db
+
+    for statement in PARTITION_STATEMENTS:
+        db.session.execute(text(statement))
+    partitions.create_partitions(first_month.date(), last_month.date())
+
+
+def seed(rows: int, accounts: list, first_created_at: datetime, last_created_at: datetime):
+    from ledger.app import models
+    from ledger.database import db
+
+    rng = random.Random(0)
+    step = (last_created_at - first_created_at) / rows
+    for start in range(0, rows, SEED_CHUNK_SIZE):
+        records = [
+            {
+                "account_number": rng.choice(accounts),
+                "amount": Decimal(rng.randint(1, 100000)) / 100,
+                "accounting_type": "C",
+                "transaction_id": str(uuid.uuid4()),
+                "created_at": first_created_at + step * index,
+                "balance_after": Decimal("0"),
+            }
+            for index in range(start, min(start + SEED_CHUNK_SIZE, rows))
+        ]
+        db.session.execute(models.Ledger.__table__.insert(), records)
+        db.session.commit()
+    db.session.execute(text("ANALYZE ledger"))
+    db.session.commit()
+
+
+def measure(account_number: str, first_created_at: datetime, limit: int, repeat: int) -> dict:
+    from ledger.app.accounting import Balance, Ledger
+    from ledger.app.accounting_types import TypeCode
+    from ledger.app.cursors import HistoryCursor
+    from ledger.database import db
+
+    oldest = Ledger.get_entries_for_account(account_number)[-limit]
+    deep_cursor = HistoryCursor.following(oldest)
+    month_start = first_created_at + timedelta(days=31)
+    month_end = month_start + timedelta(days=30)
+
+    def timed(func):
+        def call():
+            func()
+            db.session.rollback()
+
+        return summarize(time_calls(call, repeat))
+
+    return {
+        "latest_page": timed(lambda: Ledger.get_entries_for_account_with_limit(account_number, limit)),
+        "deep_page": timed(
+            lambda: Ledger.get_entries_for_account_with_limit(account_number, limit, deep_cursor)
+        ),
+        "one_month": timed(
+            lambda: Ledger.get_entries_for_account(account_number, start=month_start, end=month_end)
+        ),
+        "balance_at": timed(lambda: Balance.get_for_account_at(account_number, month_end)),
+        "add_entry": summarize(
+            time_calls(lambda: Ledger.add_entry(account_number, Decimal("1.00"), TypeCode.CREDIT), repeat)
+        ),
+    }
+
+
+def run(mode: str, rows: int, accounts: list, months: int, limit: int, repeat: int) -> dict:
+    from ledger.database import db, get_dialect_name
+
+    app = create_benchmark_app()
+    reset_database(app)
+    now = datetime.now(pytz.UTC).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    first_created_at = now - timedelta(days=31 * months)
+    with app.app_context():
+        if get_dialect_name() != "postgresql":
+            raise SystemExit("Partitioning needs a PostgreSQL BENCHMARK_DATABASE_URI.")
+        if mode == "partitioned":
+            partition_ledger(first_created_at, now + timedelta(days=31))
+        seed(rows, accounts, first_created_at, now)
+        result = {"mode": mode, **measure(accounts[0], first_created_at, limit, repeat)}
+        db.session.remove()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000000)
+    parser.add_argument("--accounts", type=int, default=10000)
+    parser.add_argument("--months", type=int, default=24, help="Months of history to seed.")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--modes", nargs="+", default=MODES, choices=MODES)
+    args = parser.parse_args()
+
+    accounts = [f"{index:08d}" for index in range(args.accounts)]
+    results = [
+        run(mode, args.rows, accounts, args.months, args.limit, args.repeat) for mode in args.modes
+    ]
+    report("partitioning", results)
+
+
+if __name__ == "__main__":
+    main()
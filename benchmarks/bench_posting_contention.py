@@ -0,0 +1,130 @@
+"""Multi-process contention benchmark for posting to a small number of hot accounts.
+
+Every process posts credits of 1.00 to the same accounts, once with the previous posting path (two commits
+and a balance that is read, changed in python and written back) and once with ``Ledger.add_entry``.
+After each run the stored balances are compared with the number of successful postings to count lost
+updates.
+
+Usage:
+    python -m benchmarks.bench_posting_contention --processes 8 --postings 500 --accounts 1
+"""
+import argparse
+import multiprocessing
+import random
+import time
+from decimal import Decimal
+
+from benchmarks.common import create_benchmark_app, report, reset_database
+
+
+AMOUNT = Decimal("1.00")
+
+
+def legacy_add_entry(account_number: str, amount: Decimal, type_code):
+    """Posting path before atomic posting, kept here as the baseline."""
+    from ledger.app import models
+    from ledger.app.accounting import Balance, LedgerEntry
+    from ledger.app.accounting_types import get_accounting_type
+
+    entry = LedgerEntry.create_new(account_number, amount, get_accounting_type(type_code))
+    models.Ledger(
+        account_number=entry.account_number,
+        amount=entry.amount,
+        accounting_type=entry.get_accounting_type_code(),
+        transaction_id=str(entry.transaction_id),
+        created_at=entry.created_at,
+    ).save()
+    balance_record = Balance._get_or_create_record(account_number)
+    balance_record.balance += entry.get_signed_amount()
+    balance_record.save()
+
+
+def atomic_add_entry(account_number: str, amount: Decimal, type_code):
+    from ledger.app.accounting import Ledger
+
+    Ledger.add_entry(account_number, amount, type_code)
+
+
+POSTING_FUNCTIONS = {"legacy": legacy_add_entry, "atomic": atomic_add_entry}
+
+
+def account_numbers(count: int):
+    return [f"hot{index:05d}" for index in range(count)]
+
+
+def worker(args):
+    mode, postings, accounts, seed = args
+    from ledger.app.accounting_types import TypeCode
+    from ledger.database import db
+
+    add_entry = POSTING_FUNCTIONS[mode]
+    rng = random.Random(seed)
+    app = create_benchmark_app()
+    succeeded = failed = 0
+    with app.app_context():
+        started = time.time()
+        for _ in range(postings):
+            try:
+                add_entry(rng.choice(accounts), AMOUNT, TypeCode.CREDIT)
+                succeeded += 1
+            except Exception:
+                db.session.rollback()
+                failed += 1
+        finished = time.time()
+        db.session.remove()
+    return {"succeeded": succeeded, "failed": failed, "started": started, "finished": finished}
+
+
+def run(mode: str, processes: int, postings: int, accounts: list):
+    from ledger.app import models
+    from ledger.database import db
+
+    app = create_benchmark_app()
+    reset_database(app)
+    with app.app_context():
+        # Create balance records up front so the baseline isn't failing on duplicate inserts.
+        for account_number in accounts:
+            db.session.add(models.Balance(account_number=account_number, balance=0))
+        db.session.commit()
+
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(processes) as pool:
+        worker_results = pool.map(worker, [(mode, postings, accounts, seed) for seed in range(processes)])
+
+    succeeded = sum(result["succeeded"] for result in worker_results)
+    elapsed = max(r["finished"] for r in worker_results) - min(r["started"] for r in worker_results)
+    with app.app_context():
+        stored_balance = sum(record.balance for record in models.Balance.query.all())
+        ledger_rows = models.Ledger.query.count()
+    return {
+        "mode": mode,
+        "processes": processes,
+        "accounts": len(accounts),
+        "postings_succeeded": succeeded,
+        "postings_failed": sum(result["failed"] for result in worker_results),
+        "elapsed_seconds": round(elapsed, 3),
+        "postings_per_second": round(succeeded / elapsed, 1),
+        "ledger_rows": ledger_rows,
+        "expected_balance": str(AMOUNT * succeeded),
+        "stored_balance": str(stored_balance),
+        "lost_updates": int((AMOUNT * succeeded - stored_balance) / AMOUNT),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--postings", type=int, default=500, help="Postings per process.")
+    parser.add_argument("--accounts", type=int, default=1, help="Number of hot accounts.")
+    parser.add_argument(
+        "--modes", nargs="+", default=list(POSTING_FUNCTIONS), choices=list(POSTING_FUNCTIONS)
+    )
+    args = parser.parse_args()
+
+    accounts = account_numbers(args.accounts)
+    results = [run(mode, args.processes, args.postings, accounts) for mode in args.modes]
+    report("posting_contention", results)
+
+
+if __name__ == "__main__":
+    main()
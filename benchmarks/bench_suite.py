@@ -0,0 +1,166 @@
+"""Benchmark suite of the service endpoints on synthetic data.
+
+Generates a ledger with ``benchmarks.datagen``, then times requests through the Flask test client, so
+routing, authorization, serialization and the database are all measured: credit and debit postings to
+accounts picked with the same Zipf distribution, balance reads of the hottest and the coldest account,
+and history pages of several sizes from the start and the middle of the hottest account's history.
+Finally several processes post to the hottest accounts at once to measure contention. Run it against
+sqlite and PostgreSQL by setting BENCHMARK_DATABASE_URI, and compare the reports of two versions with
+``benchmarks.compare``.
+
+Usage:
+    python -m benchmarks.bench_suite --accounts 1000 --entries 100000 --output results.json
+"""
+import argparse
+import multiprocessing
+import random
+import time
+
+from benchmarks import datagen
+from benchmarks.bench_posting_contention import worker as contention_worker
+from benchmarks.common import (
+    create_benchmark_app,
+    get_environment,
+    report,
+    reset_database,
+    summarize,
+    time_calls,
+)
+
+
+ACCESS_TOKEN = "benchmark-token"
+HEADERS = {"Authorization": f"Token {ACCESS_TOKEN}"}
+
+
+def timed(scenario: str, call, repeat: int, **extra) -> dict:
+    """Time repeated calls of a scenario, each of which must succeed."""
+
+    def checked_call():
+        response = call()
+        if response.status_code >= 400:
+            raise RuntimeError(f"{scenario} failed with {response.status_code}: {response.data[:200]}")
+
+    timings = time_calls(checked_call, repeat)
+    return {
+        "scenario": scenario,
+        **extra,
+        "latency": summarize(timings),
+        "per_second": round(len(timings) / sum(timings), 1),
+    }
+
+
+def measure_postings(client, accounts: list, repeat: int, exponent: float, seed: int) -> list:
+    rng = random.Random(seed)
+    weights = datagen.zipf_weights(len(accounts), exponent)
+
+    def post(kind):
+        account_number = rng.choices(accounts, cum_weights=weights)[0]
+        data = {f"{kind}Amount": "1.00", "accountNumber": account_number}
+        return client.post(f"/ledger/{kind}", json=data, headers=HEADERS)
+
+    return [
+        timed("post_credit", lambda: post("credit"), repeat),
+        timed("post_debit", lambda: post("debit"), repeat),
+    ]
+
+
+def measure_reads(client, accounts: list, counts: dict, page_sizes: list, repeat: int) -> list:
+    from ledger.app.accounting import Ledger
+    from ledger.app.cursors import HistoryCursor
+
+    hottest, coldest = accounts[0], accounts[-1]
+    results = [
+        timed("balance_hot", lambda: client.get(f"/account/{hottest}/balance", headers=HEADERS), repeat),
+        timed("balance_cold", lambda: client.get(f"/account/{coldest}/balance", headers=HEADERS), repeat),
+    ]
+    history = Ledger.get_entries_for_account(hottest)
+    middle_cursor = HistoryCursor.following(history[len(history) // 2]).encode()
+    for page_size in page_sizes:
+        url = f"/account/{hottest}/transactions?limit={page_size}"
+        results.append(
+            timed(
+                f"history_page_{page_size}",
+                lambda: client.get(url, headers=HEADERS),
+                repeat,
+                history_entries=counts[hottest],
+            )
+        )
+        results.append(
+            timed(
+                f"history_deep_page_{page_size}",
+                lambda: client.get(f"{url}&cursor={middle_cursor}", headers=HEADERS),
+                repeat,
+                history_entries=counts[hottest],
+            )
+        )
+    return results
+
+
+def measure_contention(accounts: list, processes: int, postings: int) -> dict:
+    from ledger.app import models
+
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(processes) as pool:
+        worker_results = pool.map(
+            contention_worker, [("atomic", postings, accounts, seed) for seed in range(processes)]
+        )
+    succeeded = sum(result["succeeded"] for result in worker_results)
+    elapsed = max(r["finished"] for r in worker_results) - min(r["started"] for r in worker_results)
+    return {
+        "scenario": "hot_account_contention",
+        "processes": processes,
+        "accounts": len(accounts),
+        "postings_succeeded": succeeded,
+        "postings_failed": sum(result["failed"] for result in worker_results),
+        "elapsed_seconds": round(elapsed, 3),
+        "per_second": round(succeeded / elapsed, 1),
+        "ledger_rows": models.Ledger.query.count(),
+    }
+
+
+def run(args) -> list:
+    from ledger.authorization.models import Token
+    from ledger.database import db
+
+    app = create_benchmark_app()
+    reset_database(app)
+    accounts = datagen.account_numbers(args.accounts)
+    with app.app_context():
+        started = time.perf_counter()
+        counts = datagen.generate(accounts, args.entries, args.exponent, args.seed)
+        generated = {"scenario": "generate", "elapsed_seconds": round(time.perf_counter() - started, 3)}
+        Token(access_token=ACCESS_TOKEN).save()
+        client = app.test_client()
+        results = [generated]
+        results += measure_reads(client, accounts, counts, args.page_sizes, args.repeat)
+        results += measure_postings(client, accounts, args.repeat, args.exponent, args.seed)
+        db.session.remove()
+        if args.processes:
+            hot_accounts = accounts[: args.hot_accounts]
+            results.append(measure_contention(hot_accounts, args.processes, args.contention_postings))
+        db.session.remove()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--exponent", type=float, default=1.1, help="Zipf exponent of account activity.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=200, help="Requests per scenario.")
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument(
+        "--processes", type=int, default=4, help="Processes posting to hot accounts, 0 to skip."
+    )
+    parser.add_argument("--hot-accounts", type=int, default=5)
+    parser.add_argument("--contention-postings", type=int, default=200, help="Postings per process.")
+    parser.add_argument("--output", help="File to write the report to instead of stdout.")
+    args = parser.parse_args()
+
+    parameters = {key: value for key, value in vars(args).items() if key != "output"}
+    report("suite", run(args), args.output, parameters=parameters, environment=get_environment())
+
+
+if __name__ == "__main__":
+    main()
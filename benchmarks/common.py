@@ -0,0 +1,107 @@
+"""Helpers shared by the benchmark scripts."""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.exc import SAWarning
+
+
+DEFAULT_DATABASE_URI = "sqlite:////tmp/ledger_benchmark.db?timeout=60"
+
+# ledger.settings requires the database uri to be present in the environment.
+os.environ.setdefault("SQLALCHEMY_DATABASE_URI", DEFAULT_DATABASE_URI)
+
+# sqlite stores decimals as floats, which sqlalchemy warns about on every process.
+warnings.filterwarnings("ignore", message=".*support Decimal objects natively", category=SAWarning)
+
+
+def get_database_uri() -> str:
+    """Database to benchmark against, configured with the BENCHMARK_DATABASE_URI environment variable."""
+    return os.environ.get("BENCHMARK_DATABASE_URI", DEFAULT_DATABASE_URI)
+
+
+def create_benchmark_app(database_uri: str = None):
+    """Create an app connected to the benchmark database."""
+    from ledger import create_app
+
+    return create_app(
+        extra_config={
+            "SQLALCHEMY_DATABASE_URI": database_uri or get_database_uri(),
+            "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+        }
+    )
+
+
+def reset_database(app):
+    """Drop and recreate all tables in the benchmark database."""
+    from ledger.database import db
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+
+def time_calls(func, repeat: int) -> list:
+    """Call func repeat times and return the duration of each call in seconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def summarize(timings: list) -> dict:
+    """Summary statistics in milliseconds for a list of durations in seconds."""
+    ordered = sorted(timings)
+
+    def percentile(fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    return {
+        "count": len(ordered),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "median_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(percentile(0.95) * 1000, 3),
+        "p99_ms": round(percentile(0.99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def get_environment() -> dict:
+    """Versions the results were measured with, so results of different versions can be told apart."""
+    import sqlalchemy
+
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "HEAD"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True
+        ).stdout.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {
+        "revision": revision,
+        "python": platform.python_version(),
+        "sqlalchemy": sqlalchemy.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def report(benchmark: str, results, output: str = None, **extra):
+    """Write benchmark results as json to stdout, or to the output file.
+
+    Extra keyword arguments, such as the benchmark parameters, are added to the top level of the report.
+    """
+    database = repr(make_url(get_database_uri()))  # repr hides the password
+    data = {"benchmark": benchmark, "database": database, **extra, "results": results}
+    if output is None:
+        json.dump(data, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return
+    with open(output, "w") as output_file:
+        json.dump(data, output_file, indent=2)
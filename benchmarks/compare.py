@@ -0,0 +1,75 @@
+"""Compare two benchmark suite reports, e.g. of the main branch and of a change.
+
+Scenarios are matched by name. Latencies are compared by their median and 95th percentile, throughput by
+requests or postings per second. Changes larger than the threshold are reported as regressions or
+improvements, and the exit status is 1 if anything regressed.
+
+Usage:
+    python -m benchmarks.compare baseline.json candidate.json --threshold 0.1
+"""
+import argparse
+import json
+import sys
+
+
+LATENCY_METRICS = ["median_ms", "p95_ms"]
+
+
+def load_scenarios(path: str) -> dict:
+    with open(path) as report_file:
+        return {result["scenario"]: result for result in json.load(report_file)["results"]}
+
+
+def compare_metric(name: str, baseline: float, candidate: float, lower_is_better: bool, threshold: float):
+    change = (candidate - baseline) / baseline if baseline else 0.0
+    if lower_is_better:
+        regressed, improved = change > threshold, change < -threshold
+    else:
+        regressed, improved = change < -threshold, change > threshold
+    status = "regressed" if regressed else "improved" if improved else "unchanged"
+    return {
+        "metric": name,
+        "baseline": baseline,
+        "candidate": candidate,
+        "change": round(change, 3),
+        "status": status,
+    }
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> list:
+    """Comparison of every metric of the scenarios in both reports."""
+    comparisons = []
+    for scenario in baseline:
+        if scenario not in candidate:
+            continue
+        before, after = baseline[scenario], candidate[scenario]
+        metrics = []
+        if "latency" in before and "latency" in after:
+            metrics += [
+                compare_metric(name, before["latency"][name], after["latency"][name], True, threshold)
+                for name in LATENCY_METRICS
+            ]
+        if "per_second" in before and "per_second" in after:
+            metrics.append(
+                compare_metric("per_second", before["per_second"], after["per_second"], False, threshold)
+            )
+        comparisons += [{"scenario": scenario, **metric} for metric in metrics]
+    return comparisons
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative change that is reported.")
+    args = parser.parse_args()
+
+    comparisons = compare(load_scenarios(args.baseline), load_scenarios(args.candidate), args.threshold)
+    json.dump(comparisons, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    if any(comparison["status"] == "regressed" for comparison in comparisons):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Synthetic ledger data for benchmarks and load tests.
+
+Entries are spread over accounts with a Zipf distribution: the account of rank k gets entries in proportion
+to 1 / k ** exponent, so a few hot accounts have long histories and most accounts have a handful of
+entries, as in a real ledger. Entries are credits and debits with creation times spread evenly over the
+period, and are written with their running balances, the account balances and the statements. The same
+seed always generates the same data.
+
+Usage:
+    python -m benchmarks.datagen --accounts 10000 --entries 1000000 --exponent 1.1
+"""
+import argparse
+import itertools
+import random
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import List
+
+from benchmarks.common import create_benchmark_app, reset_database
+
+
+SEED_CHUNK_SIZE = 50000
+DEFAULT_DAYS = 365
+
+
+def account_numbers(count: int) -> List[str]:
+    """Account numbers ordered from the hottest account to the coldest."""
+    return [f"{index:08d}" for index in range(count)]
+
+
+def zipf_weights(count: int, exponent: float) -> List[float]:
+    """Cumulative weights of a Zipf distribution over count ranks, for random.choices."""
+    return list(itertools.accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+def generate(
+    accounts: List[str],
+    entries: int,
+    exponent: float = 1.1,
+    seed: int = 0,
+    end: datetime = None,
+    days: int = DEFAULT_DAYS,
+) -> dict:
+    """Write the entries to the database of the current app and return the number of entries per account.
+
+    Debits are a third of the entries, with smaller amounts than credits so balances mostly stay positive.
+    """
+    from ledger.app import models
+    from ledger.app.accounting import LedgerEntry, Statement
+    from ledger.app.accounting_types import TypeCode, get_accounting_type
+    from ledger.database import db
+
+    rng = random.Random(seed)
+    weights = zipf_weights(len(accounts), exponent)
+    end = end or datetime.utcnow()
+    start = end - timedelta(days=days)
+    step = (end - start) / entries
+    balances = dict.fromkeys(accounts, Decimal("0"))
+    counts = dict.fromkeys(accounts, 0)
+    for chunk_start in range(0, entries, SEED_CHUNK_SIZE):
+        chunk_size = min(SEED_CHUNK_SIZE, entries - chunk_start)
+        chunk = []
+        for index, account_number in enumerate(rng.choices(accounts, cum_weights=weights, k=chunk_size)):
+            if rng.random() < 1 / 3:
+                type_code, amount = TypeCode.DEBIT, Decimal(rng.randint(1, 5000)) / 100
+            else:
+                type_code, amount = TypeCode.CREDIT, Decimal(rng.randint(1, 10000)) / 100
+            entry = LedgerEntry(
+                account_number,
+                amount,
+                get_accounting_type(type_code),
+                created_at=start + step * (chunk_start + index),
+                transaction_id=uuid.UUID(int=rng.getrandbits(128)),
+            )
+            balances[account_number] += entry.get_signed_amount()
+            counts[account_number] += 1
+            entry.balance = balances[account_number]
+            chunk.append(entry)
+        db.session.execute(
+            models.Ledger.__table__.insert(),
+            [
+                {
+                    "account_number": entry.account_number,
+                    "amount": entry.amount,
+                    "accounting_type": entry.get_accounting_type_code(),
+                    "transaction_id": str(entry.transaction_id),
+                    "created_at": entry.created_at,
+                    "balance_after": entry.balance,
+                }
+                for entry in chunk
+            ],
+        )
+        Statement.add_entries(chunk)
+        db.session.commit()
+    db.session.execute(
+        models.Balance.__table__.insert(),
+        [{"account_number": account, "balance": balance} for account, balance in balances.items()],
+    )
+    db.session.commit()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--accounts", type=int, default=10000)
+    parser.add_argument("--entries", type=int, default=1000000)
+    parser.add_argument("--exponent", type=float, default=1.1, help="Zipf exponent of account activity.")
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS, help="Days of history to generate.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    app = create_benchmark_app()
+    reset_database(app)
+    with app.app_context():
+        accounts = account_numbers(args.accounts)
+        counts = generate(accounts, args.entries, args.exponent, args.seed, days=args.days)
+    busiest = max(counts.values())
+    print(f"Generated {args.entries} entries in {args.accounts} accounts, the busiest has {busiest}.")
+
+
+if __name__ == "__main__":
+    main()
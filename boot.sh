@@ -1,6 +1,12 @@
 #!/bin/sh
 source venv/bin/activate
 flask db upgrade
+flask ledger create-partitions --if-partitioned --months-ahead "${PARTITION_MONTHS_AHEAD:-3}"
 flask translate compile
-exec gunicorn -b :5000 --access-logfile - --error-logfile - ledger_runner:app
+# Metrics of previous workers must not be added to those of the new ones.
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+exec gunicorn -c gunicorn.conf.py ledger_runner:app
 
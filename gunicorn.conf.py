@@ -0,0 +1,29 @@
+"""Gunicorn configuration, set from the environment.
+
+By default requests are served by sync workers, each handling one request per thread. With
+GUNICORN_WORKER_CLASS=gevent every worker serves up to GUNICORN_WORKER_CONNECTIONS requests concurrently on
+greenlets, which yield while waiting on the database, so slow queries don't hold a worker. Database
+connections are then limited by the connection pool, SQLALCHEMY_POOL_SIZE and SQLALCHEMY_MAX_OVERFLOW per
+worker, and requests wait for a pooled connection without blocking the worker.
+"""
+import os
+
+
+bind = os.environ.get("GUNICORN_BIND", ":5000")
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "sync")
+# gunicorn's default of one worker is kept unless the number of workers is given. Each worker has its own
+# connection pool and group commit thread.
+if "GUNICORN_WORKERS" in os.environ:
+    workers = int(os.environ["GUNICORN_WORKERS"])
+threads = int(os.environ.get("GUNICORN_THREADS", 1))
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 1000))
+accesslog = "-"
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    """Make psycopg2 wait on PostgreSQL cooperatively in gevent workers."""
+    if worker_class == "gevent" and os.environ["SQLALCHEMY_DATABASE_URI"].startswith("postgres"):
+        from psycogreen.gevent import patch_psycopg
+
+        patch_psycopg()
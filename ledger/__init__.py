@@ -15,8 +15,40 @@ def create_app(extra_config=None):
     db.init_app(app)
     Migrate(app, db)
 
+    from ledger.authorization.signing import token_signer
+    from ledger.authorization.utils import token_cache
+
+    token_cache.init_app(app)
+    token_signer.init_app(app)
+
+    from ledger.app.balance_cache import balance_cache
+
+    balance_cache.init_app(app)
+
+    from ledger.app.group_commit import group_committer
+
+    group_committer.init_app(app)
+
+    from ledger.app.replicas import replica_router
+
+    replica_router.init_app(app)
+
+    from ledger.app.metrics import metrics
+
+    metrics.init_app(app)
+
+    from ledger.app.profiling import request_profiler
+
+    request_profiler.init_app(app)
+
     from ledger.urls import blueprint as ledger_blueprint
 
     app.register_blueprint(ledger_blueprint)
 
+    from ledger.app.commands import ledger_cli
+    from ledger.authorization.commands import auth_cli
+
+    app.cli.add_command(ledger_cli)
+    app.cli.add_command(auth_cli)
+
     return app
@@ -1,19 +1,62 @@
+import heapq
 import uuid
-from datetime import datetime
-from decimal import Decimal
-from typing import List
+from collections import OrderedDict, defaultdict
+from datetime import date, datetime, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Iterable, Iterator, List, NamedTuple, Tuple
 
 import pytz
-from sqlalchemy.orm import Query
+from sqlalchemy import bindparam, case, func, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import RowProxy
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.sql import Select
 from sqlalchemy.orm.exc import NoResultFound
 
-from ledger.app import models
+from ledger.app import archive, metrics, models
 from ledger.app.accounting_types import AbstractEntryType, TypeCode, get_accounting_type
+from ledger.app.balance_cache import balance_cache
+from ledger.app.cursors import HistoryCursor
+from ledger.database import db, get_dialect_name
+
+
+# Amounts and balances are stored with two decimal places, in columns of ten digits.
+STORED_AMOUNT_EXPONENT = Decimal("0.01")
+MAX_STORED_AMOUNT = Decimal("99999999.99")
+
+
+def _to_stored_time(value: datetime) -> datetime:
+    # Entries are stored with naive UTC times.
+    return value.astimezone(pytz.UTC).replace(tzinfo=None)
+
+
+class AmountOutOfRange(Exception):
+    """Raised when an amount is too large to be stored."""
+
+
+def _to_stored_amount(value: Decimal) -> Decimal:
+    # Round as the database does when storing the amount, so a posted entry is the same as when read back.
+    # Amounts that would round past the largest stored amount are rejected first, as rounding very large
+    # amounts fails.
+    value = Decimal(value)
+    if abs(value) >= MAX_STORED_AMOUNT + STORED_AMOUNT_EXPONENT / 2:
+        raise AmountOutOfRange(f"Amount {value} is out of range.")
+    return value.quantize(STORED_AMOUNT_EXPONENT, rounding=ROUND_HALF_UP)
 
 
 class LedgerEntry:
     """Representation of an entry in the Ledger."""
 
+    __slots__ = (
+        "id",
+        "account_number",
+        "amount",
+        "accounting_type",
+        "balance",
+        "created_at",
+        "transaction_id",
+    )
+
     def __init__(
         self,
         account_number: str,
@@ -22,7 +65,9 @@ class LedgerEntry:
         created_at: datetime = None,
         transaction_id: uuid.UUID = None,
         balance: Decimal = None,
+        id: int = None,
     ):
+        self.id = id
         self.account_number = account_number
         self.amount = amount
         self.accounting_type = accounting_type
@@ -37,7 +82,7 @@ class LedgerEntry:
         balance = None
         return cls(
             account_number=account_number,
-            amount=amount,
+            amount=_to_stored_amount(amount),
             accounting_type=accounting_type,
             created_at=created_at,
             transaction_id=transaction_id,
@@ -53,16 +98,57 @@ class LedgerEntry:
         return self.accounting_type.get_type_code()
 
 
+class Posting(NamedTuple):
+    """A credit or debit to be added to the ledger."""
+
+    account_number: str
+    amount: Decimal
+    type_code: TypeCode
+
+
 class Balance:
     """Maintains balance for an account."""
 
     @staticmethod
-    def update_balance(entry: LedgerEntry):
-        """Updates the account holder balance from a ledger entry."""
-        balance_record = Balance._get_or_create_record(entry.account_number)
-        balance_record.balance += entry.get_signed_amount()
-        entry.balance = balance_record.balance
-        balance_record.save()
+    def update_balance(account_number: str, delta: Decimal) -> Decimal:
+        """Adds a signed amount to the account holder balance and returns the new balance.
+
+        The balance is incremented by the database rather than read and written back, so concurrent
+        postings to the same account cannot overwrite each other. The change is not committed, the new
+        balance is written to the balance cache when it is.
+        """
+        if get_dialect_name() == "postgresql":
+            record = db.session.execute(Balance._upsert_statement(account_number, delta)).first()
+        else:
+            record = Balance._increment(account_number, delta)
+        balance_cache.stage(account_number, record.balance, record.version)
+        return record.balance
+
+    @staticmethod
+    def _increment(account_number: str, delta: Decimal):
+        # Update or create the balance, then read it back with its version.
+        table = models.Balance.__table__
+        update = (
+            table.update()
+            .where(table.c.account_number == account_number)
+            .values(balance=table.c.balance + delta, version=table.c.version + 1)
+        )
+        if db.session.execute(update).rowcount == 0:
+            insert = table.insert().values(account_number=account_number, balance=delta, version=1)
+            db.session.execute(insert)
+        query = select([table.c.balance, table.c.version]).where(table.c.account_number == account_number)
+        return db.session.execute(query).first()
+
+    @staticmethod
+    def _upsert_statement(account_number: str, delta: Decimal):
+        # Single statement that creates or increments the balance and returns the result.
+        table = models.Balance.__table__
+        insert = postgresql.insert(table).values(account_number=account_number, balance=delta, version=1)
+        upsert = insert.on_conflict_do_update(
+            index_elements=[table.c.account_number],
+            set_={"balance": table.c.balance + insert.excluded.balance, "version": table.c.version + 1},
+        )
+        return upsert.returning(table.c.balance, table.c.version)
 
     @staticmethod
     def _get_or_create_record(account_number: str) -> models.Balance:
@@ -74,75 +160,613 @@ class Balance:
         return balance_entry
 
     @staticmethod
-    def get_for_account(account_number: str) -> Decimal:
-        """Get the balance for an account."""
+    def get_for_account(account_number: str, use_cache: bool = True) -> Decimal:
+        """Get the balance for an account.
+
+        The balance is served from the balance cache when it is enabled, unless use_cache is false. Cached
+        balances are only served at the version of the balance row, so postings of other workers show.
+        """
+        return Balance.get_for_account_with_version(account_number, use_cache)[0]
+
+    @staticmethod
+    def get_for_account_with_version(account_number: str, use_cache: bool = True) -> Tuple[Decimal, int]:
+        """Get the balance for an account with the version of the balance, as with get_for_account."""
+        if use_cache and balance_cache.size > 0:
+            cached = balance_cache.get_with_version(account_number, Balance.get_version(account_number))
+            if cached is not None:
+                return cached
         balance_record = Balance._get_or_create_record(account_number)
-        return balance_record.balance
+        version = balance_record.version or 0
+        balance_cache.set(account_number, balance_record.balance, version)
+        return balance_record.balance, version
+
+    @staticmethod
+    def get_version(account_number: str) -> int:
+        """Version of the balance of an account, which every posting to the account increments.
+
+        Accounts without any postings are at version 0.
+        """
+        table = models.Balance.__table__
+        query = select([table.c.version]).where(table.c.account_number == account_number)
+        return db.session.execute(query).scalar() or 0
+
+    @staticmethod
+    def get_for_account_at(account_number: str, at: datetime) -> Decimal:
+        """Get the balance for an account at a point in time.
+
+        This is the balance after the last entry created at or before `at`, read from that entry with the
+        (account_number, created_at) index, so the cost doesn't grow with the age of the account.
+        """
+        table = models.Ledger.__table__
+        in_range = (table.c.account_number == account_number) & (table.c.created_at <= _to_stored_time(at))
+        query = (
+            select([table.c.balance_after])
+            .where(in_range)
+            .order_by(table.c.created_at.desc(), table.c.id.desc())
+            .limit(1)
+        )
+        record = db.session.execute(query).first()
+        if record is None:
+            return Balance._get_archived_balance_at(account_number, at)
+        if record.balance_after is not None:
+            return record.balance_after
+        # Entries posted before balance_after was added, and not backfilled yet, are summed instead.
+        signed_amount = case(
+            [(table.c.accounting_type == TypeCode.DEBIT.value, -table.c.amount)], else_=table.c.amount
+        )
+        balance = db.session.execute(select([func.sum(signed_amount)]).where(in_range)).scalar()
+        summary = Ledger._get_archive_summary(account_number)
+        return balance if summary is None else balance + summary.balance
+
+    @staticmethod
+    def _get_archived_balance_at(account_number: str, at: datetime) -> Decimal:
+        # Records still in the ledger are all newer than the archived ones, so the balance at a time before
+        # them is read from the archive.
+        summary = Ledger._get_archive_summary(account_number)
+        if summary is None:
+            return Decimal("0")
+        at = _to_stored_time(at)
+        records = archive.read_records(account_number, summary)
+        records = [record for record in records if record.created_at <= at]
+        if not records:
+            return Decimal("0")
+        return max(records, key=lambda record: (record.created_at, record.id)).balance_after
+
+
+class IdempotencyKeyReused(Exception):
+    """Raised when an idempotency key is sent again with a different posting."""
+
+
+class PostingKey:
+    """Records the entry posted with each idempotency key."""
+
+    @staticmethod
+    def get_entry(key: str, posting: Posting) -> LedgerEntry:
+        """Get the entry posted with the key, or None if the key hasn't been used.
+
+        Raises IdempotencyKeyReused if the key was used for a different posting.
+        """
+        table = models.PostingKey.__table__
+        query = select(
+            [
+                table.c.account_number,
+                table.c.amount,
+                table.c.accounting_type,
+                table.c.transaction_id,
+                table.c.created_at,
+                table.c.balance_after,
+            ]
+        ).where(table.c.key == key)
+        record = db.session.execute(query).first()
+        if record is None:
+            return None
+        # Amounts are compared as stored, to two decimal places.
+        amount = _to_stored_amount(posting.amount)
+        if (record.account_number, record.amount, record.accounting_type) != (
+            posting.account_number,
+            amount,
+            get_accounting_type(posting.type_code).get_type_code(),
+        ):
+            raise IdempotencyKeyReused(key)
+        return LedgerEntry(
+            account_number=record.account_number,
+            amount=record.amount,
+            accounting_type=get_accounting_type(record.accounting_type),
+            created_at=record.created_at.replace(tzinfo=pytz.UTC),
+            transaction_id=record.transaction_id,
+            balance=record.balance_after,
+        )
+
+    @staticmethod
+    def store(key: str, entry: LedgerEntry):
+        """Store the key with the entry posted for it. The change is not committed."""
+        record = {
+            "key": key,
+            "account_number": entry.account_number,
+            "amount": entry.amount,
+            "accounting_type": entry.get_accounting_type_code(),
+            "transaction_id": str(entry.transaction_id),
+            "created_at": entry.created_at,
+            "balance_after": entry.balance,
+        }
+        db.session.execute(models.PostingKey.__table__.insert(), record)
+
+
+class AccountStatement(NamedTuple):
+    """Totals of an account's entries over a day or a month."""
+
+    account_number: str
+    period: str
+    period_start: date
+    opening_balance: Decimal
+    total_credits: Decimal
+    total_debits: Decimal
+    entry_count: int
+    closing_balance: Decimal
+
+
+class Statement:
+    """Maintains the daily and monthly statement rollups for accounts."""
+
+    PERIODS = ("day", "month")
+
+    @staticmethod
+    def get_period_start(period: str, created_at: datetime) -> date:
+        """First day of the period holding the given time."""
+        if period == "day":
+            return created_at.date()
+        return created_at.date().replace(day=1)
+
+    @classmethod
+    def add_entries(cls, entries: List[LedgerEntry]):
+        """Add posted entries, with their balances, to the statements of their accounts.
+
+        This must be called after the account balances are updated in the same transaction: the balance row
+        locks then keep concurrent updates to an account's statements apart. The change is not committed.
+        """
+        table = models.Statement.__table__
+        for statement in cls.rollup(entries):
+            update = (
+                table.update()
+                .where(table.c.account_number == statement.account_number)
+                .where(table.c.period == statement.period)
+                .where(table.c.period_start == statement.period_start)
+                .values(
+                    total_credits=table.c.total_credits + statement.total_credits,
+                    total_debits=table.c.total_debits + statement.total_debits,
+                    entry_count=table.c.entry_count + statement.entry_count,
+                    closing_balance=statement.closing_balance,
+                )
+            )
+            if db.session.execute(update).rowcount == 0:
+                db.session.execute(table.insert().values(**statement._asdict()))
+
+    @classmethod
+    def rollup(cls, entries: Iterable[LedgerEntry]) -> List[AccountStatement]:
+        """Statements for each account and period of the given entries, which must be in posting order."""
+        statements = OrderedDict()
+        for entry in entries:
+            signed_amount = entry.get_signed_amount()
+            for period in cls.PERIODS:
+                key = (entry.account_number, period, cls.get_period_start(period, entry.created_at))
+                statement = statements.get(key)
+                if statement is None:
+                    opening_balance = entry.balance - signed_amount
+                    statement = AccountStatement(
+                        *key, opening_balance, Decimal("0"), Decimal("0"), 0, opening_balance
+                    )
+                statements[key] = statement._replace(
+                    total_credits=statement.total_credits + max(signed_amount, 0),
+                    total_debits=statement.total_debits - min(signed_amount, 0),
+                    entry_count=statement.entry_count + 1,
+                    closing_balance=entry.balance,
+                )
+        return list(statements.values())
+
+    @staticmethod
+    def get_for_account(account_number: str, period: str) -> List[AccountStatement]:
+        """Get the statements of an account for a type of period, newest first.
+
+        Periods without any entries have no statement.
+        """
+        table = models.Statement.__table__
+        query = (
+            select([getattr(table.c, field) for field in AccountStatement._fields])
+            .where(table.c.account_number == account_number)
+            .where(table.c.period == period)
+            .order_by(table.c.period_start.desc())
+        )
+        return [AccountStatement(*record) for record in db.session.execute(query)]
 
 
 class Ledger:
     """Public interface for updating the ledger and balance."""
 
+    # Number of records fetched at a time when streaming an account's history.
+    STREAM_BATCH_SIZE = 1000
+    # Number of archived records deleted from the ledger per statement.
+    ARCHIVE_DELETE_BATCH_SIZE = 500
+    # Ids follow the order entries are stored in, which can differ slightly from the order of their creation
+    # times. Entries older than a cursor are taken to be created at most this long after the cursor entry.
+    CURSOR_CREATED_AT_MARGIN = timedelta(days=1)
+
     @classmethod
-    def add_entry(cls, account_number: str, amount: Decimal, type_code: TypeCode) -> LedgerEntry:
-        """Add entry to the ledger."""
-        accounting_type = get_accounting_type(type_code)
-        ledger_entry = LedgerEntry.create_new(account_number, amount, accounting_type)
-        cls._store(ledger_entry)
-        Balance.update_balance(ledger_entry)
-        return ledger_entry
+    def add_entry(
+        cls, account_number: str, amount: Decimal, type_code: TypeCode, idempotency_key: str = None
+    ) -> LedgerEntry:
+        """Add entry to the ledger.
+
+        The balance update and the ledger record are written in a single transaction with one commit.
+        With an idempotency key, the key is stored in the same transaction, and if an entry was already
+        posted with the key that entry is returned instead of posting again.
+        """
+        posting = Posting(account_number, amount, type_code)
+        if idempotency_key is None:
+            return cls.add_entries([posting])[0]
+        entry = PostingKey.get_entry(idempotency_key, posting)
+        if entry is not None:
+            return entry
+        try:
+            entry = cls._post([posting])[0]
+            PostingKey.store(idempotency_key, entry)
+            db.session.commit()
+            metrics.count_posted_entries([entry])
+        except IntegrityError:
+            # The unique key index rejects the same key posted concurrently, which is then returned.
+            db.session.rollback()
+            entry = PostingKey.get_entry(idempotency_key, posting)
+            if entry is None:
+                raise
+        return entry
 
     @classmethod
-    def _store(cls, ledger_entry: LedgerEntry):
-        # Store ledger record in db.
-        ledger_record = models.Ledger(
-            account_number=ledger_entry.account_number,
-            amount=ledger_entry.amount,
-            accounting_type=ledger_entry.get_accounting_type_code(),
-            transaction_id=str(ledger_entry.transaction_id),
-            created_at=ledger_entry.created_at,
-        )
-        ledger_record.save()
+    def add_entries(cls, postings: List[Posting]) -> List[LedgerEntry]:
+        """Add a batch of credits and debits to the ledger in a single transaction.
+
+        Entries are returned in the order of the postings, each with the account balance after that entry.
+        """
+        entries = cls.post_entries(postings)
+        db.session.commit()
+        metrics.count_posted_entries(entries)
+        return entries
+
+    @classmethod
+    def post_entries(cls, postings: List[Posting]) -> List[LedgerEntry]:
+        """Post a batch of credits and debits in the current transaction, as add_entries without committing.
+
+        The caller commits the transaction and counts the entries once it is committed.
+        """
+        if not postings:
+            return []
+        return cls._post(postings)
 
     @classmethod
-    def get_entries_for_account(cls, account_number: str) -> List[LedgerEntry]:
-        """Return all ledger entries for an account."""
-        query = models.Ledger.query.filter_by(account_number=account_number).order_by(
-            models.Ledger.id.desc()
+    def transfer(
+        cls, from_account_number: str, to_account_number: str, amount: Decimal
+    ) -> List[LedgerEntry]:
+        """Move an amount between two accounts in a single transaction.
+
+        The debit of the paying account and the credit of the receiving account share a transaction id and
+        are committed together, so a transfer is never half posted. Both balance rows are locked in account
+        number order, as with any batch, so transfers in opposite directions can't deadlock. Returns the
+        debit and the credit entries.
+        """
+        postings = [
+            Posting(from_account_number, amount, TypeCode.DEBIT),
+            Posting(to_account_number, amount, TypeCode.CREDIT),
+        ]
+        entries = cls._post(postings, transaction_id=uuid.uuid4())
+        db.session.commit()
+        metrics.count_posted_entries(entries)
+        return entries
+
+    @classmethod
+    def _post(cls, postings: List[Posting], transaction_id: uuid.UUID = None) -> List[LedgerEntry]:
+        # Write the entries and their balance updates without committing. Entries get their own transaction
+        # ids unless one is given for all of them.
+        entries = [
+            LedgerEntry.create_new(
+                posting.account_number, posting.amount, get_accounting_type(posting.type_code)
+            )
+            for posting in postings
+        ]
+        if transaction_id is not None:
+            for entry in entries:
+                entry.transaction_id = transaction_id
+        cls._update_balances(entries)
+        Statement.add_entries(entries)
+        cls._store(entries)
+        return entries
+
+    @classmethod
+    def _update_balances(cls, entries: List[LedgerEntry]):
+        # Update each balance once with the total for the account. Balances are updated before the ledger
+        # records are stored, and in account number order, so concurrent postings lock the balance rows in
+        # the same order for the rest of the transaction.
+        deltas = defaultdict(Decimal)
+        for entry in entries:
+            deltas[entry.account_number] += entry.get_signed_amount()
+        running_balances = {}
+        for account_number in sorted(deltas):
+            new_balance = Balance.update_balance(account_number, deltas[account_number])
+            running_balances[account_number] = new_balance - deltas[account_number]
+        for entry in entries:
+            running_balances[entry.account_number] += entry.get_signed_amount()
+            entry.balance = running_balances[entry.account_number]
+
+    @classmethod
+    def _store(cls, entries: List[LedgerEntry]):
+        # Insert all ledger records with a single executemany.
+        records = [
+            {
+                "account_number": entry.account_number,
+                "amount": entry.amount,
+                "accounting_type": entry.get_accounting_type_code(),
+                "transaction_id": str(entry.transaction_id),
+                "created_at": entry.created_at,
+                "balance_after": entry.balance,
+            }
+            for entry in entries
+        ]
+        db.session.execute(models.Ledger.__table__.insert(), records)
+
+    @classmethod
+    def get_entries_for_account(
+        cls, account_number: str, cursor: HistoryCursor = None, start: datetime = None, end: datetime = None
+    ) -> List[LedgerEntry]:
+        """Return all ledger entries for an account, or all entries following the cursor.
+
+        Entries can be restricted to those created from `start`, and before `end`.
+        """
+        query = cls._query_for_account(account_number, cursor, start, end)
+        entries = cls._build_entries_from_query(query)
+        return cls._merge_archived_entries(entries, account_number, cursor, start, end)
+
+    @classmethod
+    def get_entries_for_account_with_limit(
+        cls,
+        account_number: str,
+        limit: int,
+        cursor: HistoryCursor = None,
+        start: datetime = None,
+        end: datetime = None,
+    ) -> List[LedgerEntry]:
+        """Return up to the limited number of ledger entries for an account, following the cursor if any."""
+        query = cls._query_for_account(account_number, cursor, start, end).limit(limit)
+        entries = cls._build_entries_from_query(query)
+        return cls._merge_archived_entries(entries, account_number, cursor, start, end, limit)
+
+    @classmethod
+    def iter_entries_for_account(
+        cls, account_number: str, cursor: HistoryCursor = None, start: datetime = None, end: datetime = None
+    ) -> Iterator[LedgerEntry]:
+        """Yield all ledger entries for an account, or all entries following the cursor.
+
+        Records are fetched in batches from a server side cursor where the database supports it, so
+        memory use doesn't grow with the size of the history.
+        """
+        entries = cls._iter_stored_entries(account_number, cursor, start, end)
+        summary = cls._get_archive_summary(account_number)
+        if summary is None:
+            return entries
+        archived = cls._get_archived_entries(account_number, summary, cursor, start, end)
+        return heapq.merge(entries, archived, key=lambda entry: -entry.id)
+
+    @classmethod
+    def _iter_stored_entries(
+        cls, account_number: str, cursor: HistoryCursor = None, start: datetime = None, end: datetime = None
+    ) -> Iterator[LedgerEntry]:
+        query = cls._query_for_account(account_number, cursor, start, end)
+        query = query.execution_options(stream_results=True)
+        result = db.session.execute(query)
+        records = result.fetchmany(cls.STREAM_BATCH_SIZE)
+        while records:
+            for record in records:
+                yield cls._record_to_entry(record)
+            records = result.fetchmany(cls.STREAM_BATCH_SIZE)
+
+    @classmethod
+    def _query_for_account(
+        cls, account_number: str, cursor: HistoryCursor = None, start: datetime = None, end: datetime = None
+    ) -> Select:
+        # Newest entries first. The cursor restricts the query to entries older than the previous page,
+        # which is a seek on the (account_number, id) index however deep the page is. A time range is
+        # served by the (account_number, created_at) index. Each record carries its running balance, so
+        # entries outside the range are never read. History is read as plain rows rather than ORM
+        # objects, since the records are only converted to entries.
+        table = models.Ledger.__table__
+        query = select(
+            [
+                table.c.id,
+                table.c.account_number,
+                table.c.amount,
+                table.c.accounting_type,
+                table.c.transaction_id,
+                table.c.created_at,
+                table.c.balance_after,
+            ]
+        ).where(table.c.account_number == account_number)
+        if cursor is not None:
+            query = query.where(table.c.id < cursor.before_id)
+            if cursor.created_at is not None:
+                # Bounding the creation time prunes the ledger partitions of later months.
+                created_before = _to_stored_time(cursor.created_at + cls.CURSOR_CREATED_AT_MARGIN)
+                query = query.where(table.c.created_at <= created_before)
+        if start is not None:
+            query = query.where(table.c.created_at >= _to_stored_time(start))
+        if end is not None:
+            query = query.where(table.c.created_at < _to_stored_time(end))
+        return query.order_by(table.c.id.desc())
+
+    @classmethod
+    def _build_entries_from_query(cls, query: Select) -> List[LedgerEntry]:
+        return [cls._record_to_entry(record) for record in db.session.execute(query)]
+
+    @classmethod
+    def _get_archive_summary(cls, account_number: str) -> archive.ArchiveSummary:
+        # Summary of the account's archived records, None if there are none.
+        if not archive.is_enabled():
+            return None
+        return archive.get_summary(account_number)
+
+    @classmethod
+    def _merge_archived_entries(
+        cls,
+        entries: List[LedgerEntry],
+        account_number: str,
+        cursor: HistoryCursor = None,
+        start: datetime = None,
+        end: datetime = None,
+        limit: int = None,
+    ) -> List[LedgerEntry]:
+        # The archive is only read when the page reaches back past the newest archived entry.
+        summary = cls._get_archive_summary(account_number)
+        if summary is None:
+            return entries
+        if entries and len(entries) == limit and entries[-1].id > summary.last_id:
+            return entries
+        archived = cls._get_archived_entries(account_number, summary, cursor, start, end)
+        merged = sorted(entries + archived, key=lambda entry: entry.id, reverse=True)
+        return merged if limit is None else merged[:limit]
+
+    @classmethod
+    def _get_archived_entries(
+        cls,
+        account_number: str,
+        summary: archive.ArchiveSummary,
+        cursor: HistoryCursor = None,
+        start: datetime = None,
+        end: datetime = None,
+    ) -> List[LedgerEntry]:
+        # Archived entries of the account, newest first, restricted like the ledger query.
+        entries = [cls._record_to_entry(record) for record in archive.read_records(account_number, summary)]
+        if cursor is not None:
+            entries = [entry for entry in entries if entry.id < cursor.before_id]
+        if start is not None:
+            entries = [entry for entry in entries if entry.created_at >= start]
+        if end is not None:
+            entries = [entry for entry in entries if entry.created_at < end]
+        return entries[::-1]
+
+    @classmethod
+    def backfill_balance_after(cls, account_number: str) -> int:
+        """Set the running balance on ledger records for the account that don't have one yet.
+
+        Returns the number of records updated. The change is committed.
+        """
+        # Adding zero to the balance locks the balance row, so no entries are posted to the account until
+        # the backfill is committed.
+        Balance.update_balance(account_number, Decimal("0"))
+        table = models.Ledger.__table__
+        query = (
+            select([table.c.id, table.c.amount, table.c.accounting_type, table.c.balance_after])
+            .where(table.c.account_number == account_number)
+            .order_by(table.c.id)
         )
-        return cls._build_entries_from_query(account_number, query)
+        summary = cls._get_archive_summary(account_number)
+        running_balance = Decimal("0") if summary is None else summary.balance
+        updates = []
+        for record in db.session.execute(query).fetchall():
+            running_balance += record.amount * get_accounting_type(record.accounting_type).get_sign()
+            if record.balance_after is None:
+                updates.append({"record_id": record.id, "balance_after": running_balance})
+        if updates:
+            update = table.update().where(table.c.id == bindparam("record_id"))
+            db.session.execute(update, updates)
+        db.session.commit()
+        return len(updates)
 
     @classmethod
-    def get_entries_for_account_with_limit(cls, account_number: str, limit: int) -> List[LedgerEntry]:
-        """Return up to the limited number of ledger entries for an account."""
+    def rebuild_statements(cls, account_number: str) -> int:
+        """Recalculate the statements of an account from its ledger records.
+
+        Returns the number of statements. The change is committed.
+        """
+        # Adding zero to the balance locks the balance row, so no entries are posted to the account until
+        # the statements are rebuilt.
+        Balance.update_balance(account_number, Decimal("0"))
+        table = models.Ledger.__table__
         query = (
-            models.Ledger.query.filter_by(account_number=account_number)
-            .order_by(models.Ledger.id.desc())
-            .limit(limit)
+            select([table.c.id, table.c.amount, table.c.accounting_type, table.c.created_at])
+            .where(table.c.account_number == account_number)
+            .order_by(table.c.id)
         )
-        return cls._build_entries_from_query(account_number, query)
+        summary = cls._get_archive_summary(account_number)
+        archived = [] if summary is None else archive.read_records(account_number, summary)
+
+        def entries():
+            # The running balance is recalculated, as older records may not have balance_after.
+            balance = Decimal("0")
+            records = heapq.merge(archived, db.session.execute(query), key=lambda record: record.id)
+            for record in records:
+                entry = LedgerEntry(
+                    account_number,
+                    record.amount,
+                    get_accounting_type(record.accounting_type),
+                    created_at=record.created_at,
+                )
+                balance += entry.get_signed_amount()
+                entry.balance = balance
+                yield entry
+
+        statements = Statement.rollup(entries())
+        statement_table = models.Statement.__table__
+        delete = statement_table.delete().where(statement_table.c.account_number == account_number)
+        db.session.execute(delete)
+        if statements:
+            db.session.execute(statement_table.insert(), [statement._asdict() for statement in statements])
+        db.session.commit()
+        return len(statements)
 
     @classmethod
-    def _build_entries_from_query(cls, account_number: str, query: Query) -> List[LedgerEntry]:
-        latest_balance = Balance.get_for_account(account_number)
-        entries = []
-        for record in query:
-            entry = cls._record_to_entry(record)
-            entry.balance = latest_balance
-            entries.append(entry)
-            latest_balance -= entry.get_signed_amount()
-        return entries
+    def archive_entries(cls, account_numbers: List[str], created_before: datetime) -> int:
+        """Move the ledger records of the accounts created before the given time to the archive.
+
+        The accounts must be in the same archive bucket. Returns the number of records archived. The change
+        is committed.
+        """
+        for account_number in account_numbers:
+            cls.backfill_balance_after(account_number)
+        table = models.Ledger.__table__
+        in_range = table.c.account_number.in_(account_numbers) & (
+            table.c.created_at < _to_stored_time(created_before)
+        )
+        query = (
+            select([getattr(table.c, field) for field in archive.ArchivedRecord._fields])
+            .where(in_range)
+            .order_by(table.c.account_number, table.c.id)
+        )
+        records = [archive.ArchivedRecord(*record) for record in db.session.execute(query)]
+        if not records:
+            return 0
+        # The file is written before the records are deleted. If the deletion fails, the records written
+        # are ignored by readers, as they are newer than the account summaries, and are written again by
+        # the next run. Only the records written are deleted, not records committed since they were read.
+        archive.write_records(records)
+        ids = [record.id for record in records]
+        for start in range(0, len(ids), cls.ARCHIVE_DELETE_BATCH_SIZE):
+            batch = ids[start:start + cls.ARCHIVE_DELETE_BATCH_SIZE]
+            db.session.execute(table.delete().where(table.c.id.in_(batch)))
+        by_account = defaultdict(list)
+        for record in records:
+            by_account[record.account_number].append(record)
+        for account_number, account_records in by_account.items():
+            archive.add_to_summary(account_number, account_records)
+        db.session.commit()
+        return len(records)
 
     @classmethod
-    def _record_to_entry(cls, record: models.Ledger) -> LedgerEntry:
-        # Convert a db record to the entry type
+    def _record_to_entry(cls, record: RowProxy) -> LedgerEntry:
+        # Convert a db row to the entry type
         accounting_type = get_accounting_type(record.accounting_type)
         # DateTimes are stored in UTC, but retrieved as naive - we just need to add the timezone back.
         created_at_utc = record.created_at.replace(tzinfo=pytz.UTC)
         return LedgerEntry(
+            id=record.id,
             account_number=record.account_number,
             amount=record.amount,
             accounting_type=accounting_type,
             transaction_id=record.transaction_id,
             created_at=created_at_utc,
+            balance=record.balance_after,
         )
@@ -0,0 +1,155 @@
+"""Archive of old ledger records in compressed Parquet files.
+
+`flask ledger archive` moves the ledger records created before a cutoff into Parquet files under
+ARCHIVE_PATH, with a directory for each bucket of account numbers. The archived_account table keeps the
+newest archived record of each account, so history reads know when a page reaches into the archive and
+running balances carry on from the archived records. Archiving needs the optional pyarrow dependency,
+installed with `pip install ledger[archive]`.
+"""
+import os
+import zlib
+from datetime import datetime
+from decimal import Decimal
+from typing import List, NamedTuple
+
+import pytz
+from flask import current_app
+from sqlalchemy import select
+
+from ledger.app import models
+from ledger.database import db
+
+
+class ArchiveUnavailable(Exception):
+    """Raised when archiving isn't configured or pyarrow isn't installed."""
+
+
+class ArchivedRecord(NamedTuple):
+    """A ledger record as it is stored in the archive."""
+
+    id: int
+    account_number: str
+    amount: Decimal
+    accounting_type: str
+    transaction_id: str
+    created_at: datetime
+    balance_after: Decimal
+
+
+class ArchiveSummary(NamedTuple):
+    """The newest archived record of an account, and the number of archived records."""
+
+    last_id: int
+    last_created_at: datetime
+    entry_count: int
+    balance: Decimal
+
+
+def is_enabled() -> bool:
+    """Whether an archive path is configured."""
+    return bool(current_app.config["ARCHIVE_PATH"])
+
+
+def get_bucket(account_number: str) -> int:
+    """Bucket holding the archived records of an account."""
+    return zlib.crc32(account_number.encode()) % current_app.config["ARCHIVE_BUCKETS"]
+
+
+def get_bucket_path(bucket: int) -> str:
+    """Directory of the archive files of a bucket."""
+    return os.path.join(current_app.config["ARCHIVE_PATH"], f"bucket={bucket:03d}")
+
+
+def write_records(records: List[ArchivedRecord]) -> str:
+    """Write records of accounts in the same bucket to a new archive file and return its path.
+
+    Files are named after the ids they hold, so archiving the same records again replaces the file.
+    """
+    pyarrow = _get_pyarrow()
+    path = get_bucket_path(get_bucket(records[0].account_number))
+    os.makedirs(path, exist_ok=True)
+    ids = [record.id for record in records]
+    file_name = f"ledger-{min(ids)}-{max(ids)}.parquet"
+    columns = {field: [getattr(record, field) for record in records] for field in ArchivedRecord._fields}
+    columns["created_at"] = [_to_naive_utc(created_at) for created_at in columns["created_at"]]
+    table = pyarrow.Table.from_pydict(columns, schema=_get_schema(pyarrow))
+    # The file is written under a hidden name first so readers never see a partial file.
+    temporary_path = os.path.join(path, f".{file_name}")
+    pyarrow.parquet.write_table(table, temporary_path, compression="zstd")
+    os.replace(temporary_path, os.path.join(path, file_name))
+    return os.path.join(path, file_name)
+
+
+def read_records(account_number: str, summary: ArchiveSummary) -> List[ArchivedRecord]:
+    """Read the archived records of an account, oldest first.
+
+    Records in files that were written by an archive run that failed before committing are ignored.
+    """
+    path = get_bucket_path(get_bucket(account_number))
+    if not os.path.isdir(path):
+        return []
+    pyarrow = _get_pyarrow()
+    filters = [("account_number", "=", account_number), ("id", "<=", summary.last_id)]
+    table = pyarrow.parquet.read_table(path, filters=filters, schema=_get_schema(pyarrow))
+    records = {row["id"]: ArchivedRecord(**row) for row in table.to_pylist()}
+    return [records[record_id] for record_id in sorted(records)]
+
+
+def get_summary(account_number: str) -> ArchiveSummary:
+    """Get the archive summary of an account, or None if none of its records are archived."""
+    table = models.ArchivedAccount.__table__
+    query = select([getattr(table.c, field) for field in ArchiveSummary._fields]).where(
+        table.c.account_number == account_number
+    )
+    record = db.session.execute(query).first()
+    return None if record is None else ArchiveSummary(*record)
+
+
+def add_to_summary(account_number: str, records: List[ArchivedRecord]):
+    """Add newly archived records, oldest first, to the summary of an account.
+
+    The change is not committed.
+    """
+    table = models.ArchivedAccount.__table__
+    last = records[-1]
+    values = {"last_id": last.id, "last_created_at": last.created_at, "balance": last.balance_after}
+    update = (
+        table.update()
+        .where(table.c.account_number == account_number)
+        .values(entry_count=table.c.entry_count + len(records), **values)
+    )
+    if db.session.execute(update).rowcount == 0:
+        insert = table.insert().values(account_number=account_number, entry_count=len(records), **values)
+        db.session.execute(insert)
+
+
+def _get_pyarrow():
+    if not is_enabled():
+        raise ArchiveUnavailable("ARCHIVE_PATH is not configured.")
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ArchiveUnavailable("Archiving needs pyarrow, install it with `pip install ledger[archive]`.")
+    return pyarrow
+
+
+def _get_schema(pyarrow):
+    return pyarrow.schema(
+        [
+            ("id", pyarrow.int64()),
+            ("account_number", pyarrow.string()),
+            ("amount", pyarrow.decimal128(10, 2)),
+            ("accounting_type", pyarrow.string()),
+            ("transaction_id", pyarrow.string()),
+            # Naive UTC times, as ledger records are stored.
+            ("created_at", pyarrow.timestamp("us")),
+            ("balance_after", pyarrow.decimal128(10, 2)),
+        ]
+    )
+
+
+def _to_naive_utc(value: datetime) -> datetime:
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(pytz.UTC).replace(tzinfo=None)
@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ledger.app import metrics
+from ledger.database import db
+
+
+# Key of the balances updated by a transaction in the session info, cached once the transaction commits.
+STAGED_BALANCES = "staged_balances"
+
+
+class BalanceCache:
+    """Bounded cache of account balances in a worker, evicting the least recently used account when full.
+
+    Balances are written through when postings commit and cached when read from the database. Each balance
+    keeps the version of its database row, which every update increments, so within a worker an older
+    balance never replaces a newer one. The cache isn't shared across workers, so readers pass the current
+    version of the row to get_with_version, and a balance that another worker has since posted to is a
+    miss. Cached balances expire after `ttl` seconds. A size of zero disables the cache.
+    """
+
+    def __init__(self, size: int = 0, ttl: float = 1):
+        self.size = size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Configure the cache from the app config."""
+        self.size = app.config["BALANCE_CACHE_SIZE"]
+        self.ttl = app.config["BALANCE_CACHE_TTL"]
+        self.clear()
+
+    def get(self, account_number: str) -> Decimal:
+        """Return the cached balance of an account, or None if it isn't cached."""
+        cached = self.get_with_version(account_number)
+        return None if cached is None else cached[0]
+
+    def get_with_version(self, account_number: str, version: int = None) -> Tuple[Decimal, int]:
+        """Return the cached balance of an account and its version, or None if it isn't cached.
+
+        With a version, a balance cached at any other version is a miss.
+        """
+        if self.size <= 0:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(account_number)
+            if entry is None or entry[2] + self.ttl <= now or version not in (None, entry[1]):
+                self.misses += 1
+                metrics.balance_cache_requests.labels("miss").inc()
+                return None
+            self._entries.move_to_end(account_number)
+            self.hits += 1
+        metrics.balance_cache_requests.labels("hit").inc()
+        metrics.balance_cache_age.observe(now - entry[2])
+        return entry[0], entry[1]
+
+    def set(self, account_number: str, balance: Decimal, version: int):
+        """Cache the balance of an account, unless a newer version of it is cached."""
+        if self.size <= 0:
+            return
+        with self._lock:
+            entry = self._entries.get(account_number)
+            if entry is not None and entry[1] > version:
+                return
+            self._entries[account_number] = (balance, version, time.monotonic())
+            self._entries.move_to_end(account_number)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def stage(self, account_number: str, balance: Decimal, version: int):
+        """Cache a balance updated in the current transaction once the transaction commits."""
+        if self.size <= 0:
+            return
+        db.session.info.setdefault(STAGED_BALANCES, {})[account_number] = (balance, version)
+
+    def clear(self):
+        """Remove all balances from the cache and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+balance_cache = BalanceCache()
+
+
+@event.listens_for(Session, "after_commit")
+def cache_committed_balances(session):
+    """Write the balances updated by a committed transaction through to the cache."""
+    for account_number, (balance, version) in session.info.pop(STAGED_BALANCES, {}).items():
+        balance_cache.set(account_number, balance, version)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_staged_balances(session):
+    """Forget the balances updated by a transaction that was rolled back."""
+    session.info.pop(STAGED_BALANCES, None)
@@ -0,0 +1,148 @@
+"""Plain function serializers for the request paths that handle the most entries.
+
+They produce the same output and raise the same validation errors as the marshmallow schemas in
+ledger.app.schemas, which remain the reference for the wire format, at a fraction of the cost per entry.
+"""
+import re
+import uuid
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from typing import List
+
+import pytz
+from marshmallow import ValidationError
+
+from ledger.app.schemas import TransactionData
+
+
+MISSING_MESSAGE = "Missing data for required field."
+NULL_MESSAGE = "Field may not be null."
+INVALID_INPUT_MESSAGE = "Invalid input type."
+INVALID_NUMBER_MESSAGE = "Not a valid number."
+SPECIAL_NUMBER_MESSAGE = "Special numeric values are not permitted."
+INVALID_STRING_MESSAGE = "Not a valid string."
+
+TIMESTAMP_PATTERN = re.compile(
+    r"(\d{4})-(\d{2})-(\d{2})"
+    r"(?:[T ](\d{2}):(\d{2})(?::(\d{2})(?:\.(\d{1,6}))?)?(Z|[+-]\d{2}:?\d{2})?)?"
+)
+
+
+def dump_ledger_entry(entry) -> dict:
+    """Serialize a LedgerEntry, equivalent to LedgerEntrySchema.dump."""
+    transaction_id = entry.transaction_id
+    if transaction_id is not None and not isinstance(transaction_id, uuid.UUID):
+        transaction_id = uuid.UUID(transaction_id)
+    created_at = entry.created_at
+    if created_at is not None:
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=pytz.UTC)
+        else:
+            created_at = created_at.astimezone(pytz.UTC)
+    return {
+        "accountNumber": _to_text(entry.account_number),
+        "accountingType": _to_text(entry.accounting_type),
+        "amount": _to_text(entry.amount),
+        "balance": _to_text(entry.balance),
+        "transactionId": _to_text(transaction_id),
+        "createdAt": None if created_at is None else created_at.isoformat(),
+    }
+
+
+def dump_ledger_entries(entries) -> List[dict]:
+    """Serialize a list of LedgerEntry."""
+    return [dump_ledger_entry(entry) for entry in entries]
+
+
+def dump_balance(balance: Decimal) -> dict:
+    """Serialize a balance, equivalent to BalanceSchema.dump."""
+    return {"balance": _to_text(balance)}
+
+
+def load_credit(data) -> TransactionData:
+    """Deserialize a credit request, equivalent to CreditSchema.load."""
+    return _load_transaction(data, "creditAmount")
+
+
+def load_debit(data) -> TransactionData:
+    """Deserialize a debit request, equivalent to DebitSchema.load."""
+    return _load_transaction(data, "debitAmount")
+
+
+def load_timestamp(value: str) -> datetime:
+    """Deserialize an ISO 8601 date, or date and time, to a UTC datetime.
+
+    Times without an offset are taken to be in UTC. Raises ValueError if the value isn't a timestamp.
+    """
+    match = TIMESTAMP_PATTERN.fullmatch(value)
+    if match is None:
+        raise ValueError(f"Not a valid timestamp: {value!r}")
+    year, month, day, hour, minute, second, fraction, offset = match.groups()
+    timestamp = datetime(
+        int(year),
+        int(month),
+        int(day),
+        int(hour or 0),
+        int(minute or 0),
+        int(second or 0),
+        int((fraction or "0").ljust(6, "0")),
+        tzinfo=pytz.UTC,
+    )
+    if offset and offset != "Z":
+        sign = -1 if offset[0] == "-" else 1
+        digits = offset[1:].replace(":", "")
+        try:
+            timestamp -= sign * timedelta(hours=int(digits[:2]), minutes=int(digits[2:]))
+        except OverflowError:
+            raise ValueError(f"Timestamp out of range in UTC: {value!r}")
+    return timestamp
+
+
+def _load_transaction(data, amount_field: str) -> TransactionData:
+    if not isinstance(data, Mapping):
+        raise ValidationError({"_schema": [INVALID_INPUT_MESSAGE]})
+    errors = {}
+    amount = _load_decimal(data, amount_field, errors)
+    account_number = _load_string(data, "accountNumber", errors)
+    if errors:
+        raise ValidationError(errors)
+    return TransactionData(amount=amount, account_number=account_number)
+
+
+def _load_decimal(data: Mapping, field: str, errors: dict) -> Decimal:
+    value = _get_required(data, field, errors)
+    if value is None:
+        return None
+    try:
+        number = Decimal(str(value))
+    except InvalidOperation:
+        errors[field] = [INVALID_NUMBER_MESSAGE]
+        return None
+    if number.is_nan() or number.is_infinite():
+        errors[field] = [SPECIAL_NUMBER_MESSAGE]
+        return None
+    return number
+
+
+def _load_string(data: Mapping, field: str, errors: dict) -> str:
+    value = _get_required(data, field, errors)
+    if value is not None and not isinstance(value, str):
+        errors[field] = [INVALID_STRING_MESSAGE]
+        return None
+    return value
+
+
+def _get_required(data: Mapping, field: str, errors: dict):
+    # Value of a required field, recording an error if it is missing or null.
+    if field not in data:
+        errors[field] = [MISSING_MESSAGE]
+        return None
+    value = data[field]
+    if value is None:
+        errors[field] = [NULL_MESSAGE]
+    return value
+
+
+def _to_text(value) -> str:
+    return None if value is None else str(value)
@@ -0,0 +1,106 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import click
+import pytz
+from flask.cli import AppGroup
+
+from ledger.app import archive, models, partitions
+from ledger.app.accounting import Ledger
+from ledger.database import db
+
+
+ledger_cli = AppGroup("ledger", help="Ledger maintenance commands.")
+
+# Maximum number of accounts whose records are written to one archive file.
+ARCHIVE_ACCOUNTS_PER_FILE = 1000
+# Records are only archived once they are this old, so no posting of the archived period is still being
+# committed.
+ARCHIVE_MIN_AGE = timedelta(days=1)
+
+
+@ledger_cli.command("backfill-balance-after")
+def backfill_balance_after():
+    """Set the running balance on ledger records that don't have one.
+
+    Records posted before the balance_after column existed, e.g. by workers still running the previous
+    release during a deploy, are filled in account by account.
+    """
+    query = db.session.query(models.Ledger.account_number).filter(models.Ledger.balance_after.is_(None))
+    account_numbers = [row.account_number for row in query.distinct()]
+    updated = sum(Ledger.backfill_balance_after(account_number) for account_number in account_numbers)
+    click.echo(f"Updated {updated} ledger records in {len(account_numbers)} accounts.")
+
+
+@ledger_cli.command("rebuild-statements")
+@click.option(
+    "--account", "account_numbers", multiple=True, help="Only rebuild this account, may be repeated."
+)
+def rebuild_statements(account_numbers):
+    """Recalculate the daily and monthly statements from the ledger.
+
+    Statements are kept up to date as entries are posted, this fills them in for entries posted before
+    statements existed. All accounts with ledger records are rebuilt unless accounts are given.
+    """
+    if not account_numbers:
+        query = db.session.query(models.Ledger.account_number).distinct()
+        account_numbers = [row.account_number for row in query]
+    statements = sum(Ledger.rebuild_statements(account_number) for account_number in account_numbers)
+    click.echo(f"Rebuilt {statements} statements in {len(account_numbers)} accounts.")
+
+
+@ledger_cli.command("create-partitions")
+@click.option("--months-ahead", default=3, show_default=True, help="Number of future months to create.")
+@click.option(
+    "--if-partitioned", is_flag=True, help="Do nothing instead of failing when the ledger isn't partitioned."
+)
+def create_partitions(months_ahead, if_partitioned):
+    """Create the monthly ledger partitions for this month and the coming months.
+
+    This runs on every start of the service. Run it regularly, e.g. daily, as well so that new entries are
+    never stored in the default partition.
+    """
+    if not partitions.is_partitioned():
+        if if_partitioned:
+            click.echo("The ledger table isn't partitioned.")
+            return
+        raise click.ClickException("The ledger table isn't partitioned.")
+    today = datetime.utcnow().date()
+    result = partitions.create_partitions(today, partitions.add_months(today, months_ahead))
+    click.echo(f"Created {len(result.created)} ledger partitions.")
+    if result.failed:
+        raise click.ClickException(f"Failed to create ledger partitions: {', '.join(result.failed)}.")
+
+
+@ledger_cli.command("archive")
+@click.option(
+    "--before",
+    "created_before",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    required=True,
+    help="Archive the records created before this date, in UTC.",
+)
+def archive_ledger(created_before):
+    """Move the ledger records created before a date to the Parquet archive under ARCHIVE_PATH.
+
+    The date must be at least a day in the past.
+    """
+    if not archive.is_enabled():
+        raise click.ClickException("ARCHIVE_PATH is not configured.")
+    if created_before > datetime.utcnow() - ARCHIVE_MIN_AGE:
+        raise click.ClickException("--before must be at least a day in the past.")
+    query = db.session.query(models.Ledger.account_number).filter(models.Ledger.created_at < created_before)
+    buckets = defaultdict(list)
+    for row in query.distinct():
+        buckets[archive.get_bucket(row.account_number)].append(row.account_number)
+    created_before = pytz.UTC.localize(created_before)
+    archived = 0
+    try:
+        for account_numbers in buckets.values():
+            for start in range(0, len(account_numbers), ARCHIVE_ACCOUNTS_PER_FILE):
+                chunk = account_numbers[start:start + ARCHIVE_ACCOUNTS_PER_FILE]
+                archived += Ledger.archive_entries(chunk, created_before)
+    except archive.ArchiveUnavailable as error:
+        raise click.ClickException(str(error))
+    accounts = sum(len(account_numbers) for account_numbers in buckets.values())
+    click.echo(f"Archived {archived} ledger records from {accounts} accounts.")
@@ -1,15 +1,29 @@
+import json
 from functools import wraps
 from http import HTTPStatus
 
-from flask import jsonify, request
+from flask import Response, jsonify, request, stream_with_context
 from flask.views import MethodView
+from prometheus_client import CONTENT_TYPE_LATEST
 from werkzeug.exceptions import Unauthorized
 
-from ledger.app.exceptions import BadRequest
+from ledger.app import metrics
+from ledger.app.exceptions import BadRequest, Conflict, ServiceUnavailable
 from ledger.authorization.utils import token_is_valid
-from ledger.app.accounting import Balance, Ledger
+from ledger.app.accounting import AmountOutOfRange, Balance, IdempotencyKeyReused, Ledger, Statement
 from ledger.app.accounting_types import TypeCode
-from ledger.app.schemas import balance_schema, credit_schema, debit_schema, ledger_entry_schema
+from ledger.app.cursors import HistoryCursor, InvalidCursor
+from ledger.app.group_commit import GroupCommitTimeout, group_committer
+from ledger.app.replicas import ConsistencyToken, InvalidConsistencyToken, replica_router
+from ledger.app.codecs import (
+    dump_balance,
+    dump_ledger_entries,
+    dump_ledger_entry,
+    load_credit,
+    load_debit,
+    load_timestamp,
+)
+from ledger.app.schemas import batch_schema, statement_schema, transfer_schema
 
 
 def authorization_required(func):
@@ -35,51 +49,195 @@ class AuthorizedMethodView(MethodView):
     decorators = [authorization_required]
 
 
-class CreateLedgerEntryView(AuthorizedMethodView):
-    schema = None
+class JSONRequestMixin:
+    def get_json_from_request(self):
+        post_data = request.get_json()
+        if post_data is None:
+            raise BadRequest()
+        return post_data
+
+
+class TimestampArgumentMixin:
+    def get_timestamp_argument(self, name: str):
+        """UTC datetime from a timestamp query parameter, or None if the parameter isn't provided."""
+        if name not in request.args:
+            return None
+        parameter = request.args[name]
+        try:
+            return load_timestamp(parameter)
+        except ValueError:
+            raise BadRequest(f"Unrecognized {name} parameter: '{parameter}'")
+
+
+class ReplicaReadMixin:
+    def read_from_replica(self) -> ConsistencyToken:
+        """Send the reads of the request to a replica, once it has the entry of any consistency token.
+
+        Returns the consistency token of the request, if any.
+        """
+        consistency_token = None
+        if "X-Consistency-Token" in request.headers:
+            header = request.headers["X-Consistency-Token"]
+            try:
+                consistency_token = ConsistencyToken.decode(header)
+            except InvalidConsistencyToken:
+                raise BadRequest(f"Unrecognized X-Consistency-Token header: '{header}'")
+        replica_router.route_reads(consistency_token)
+        return consistency_token
+
+
+class ConditionalGetMixin:
+    """Strong ETags for account resources, from the version of the account's balance.
+
+    Every posting to an account increments the version, so a request whose `If-None-Match` holds the
+    current ETag is answered with 304 Not Modified after looking up the version alone. The version must be
+    read before the resource, so a response is never older than its ETag.
+    """
+
+    @staticmethod
+    def get_etag(version: int) -> str:
+        return f"v{version}"
+
+    @staticmethod
+    def is_not_modified(etag: str) -> bool:
+        return etag in request.if_none_match
+
+    @staticmethod
+    def not_modified_response(etag: str):
+        response = Response(status=HTTPStatus.NOT_MODIFIED)
+        response.set_etag(etag)
+        return response
+
+
+def add_consistency_token(response, entry):
+    """Add the header for reading the posted entry back from a replica to a response."""
+    response.headers["X-Consistency-Token"] = ConsistencyToken.for_entry(entry).encode()
+    return response
+
+
+class CreateLedgerEntryView(JSONRequestMixin, AuthorizedMethodView):
+    """Base view for adding a single entry to the ledger.
+
+    Retries can send an `Idempotency-Key` header. The entry is posted once per key, and later requests with
+    the same key get the entry that was posted. The `X-Consistency-Token` response header can be passed
+    to reads to see the entry on a replica.
+    """
+
+    loader = None
     type_code = None
 
     def post(self):
         post_data = self.get_json_from_request()
-        result = self.schema.load(post_data).data
+        result = self.loader(post_data)
+        idempotency_key = self._get_idempotency_key()
 
-        entry = Ledger.add_entry(
-            account_number=result.account_number, amount=result.amount, type_code=self.type_code
-        )
-        serialized_entry = ledger_entry_schema.dump(entry)
-        return jsonify(serialized_entry.data), HTTPStatus.CREATED
+        try:
+            entry = group_committer.add_entry(
+                account_number=result.account_number,
+                amount=result.amount,
+                type_code=self.type_code,
+                idempotency_key=idempotency_key,
+            )
+        except IdempotencyKeyReused:
+            raise Conflict(f"Idempotency-Key '{idempotency_key}' was used for a different posting.")
+        except AmountOutOfRange as exc:
+            raise BadRequest(str(exc))
+        except GroupCommitTimeout:
+            raise ServiceUnavailable("The posting wasn't committed in time, it may still be posted.")
+        return add_consistency_token(jsonify(dump_ledger_entry(entry)), entry), HTTPStatus.CREATED
 
-    def get_json_from_request(self):
-        post_data = request.get_json()
-        if post_data is None:
-            raise BadRequest()
-        return post_data
+    def _get_idempotency_key(self):
+        if "Idempotency-Key" not in request.headers:
+            return None
+        idempotency_key = request.headers["Idempotency-Key"]
+        if not 0 < len(idempotency_key) <= 255:
+            raise BadRequest("Idempotency-Key header must be 1 to 255 characters.")
+        return idempotency_key
 
 
 class CreditView(CreateLedgerEntryView):
     """Add a credit amount to the ledger."""
 
-    schema = credit_schema
+    loader = staticmethod(load_credit)
     type_code = TypeCode.CREDIT
 
 
 class DebitView(CreateLedgerEntryView):
     """Add a debit amount to the ledger."""
 
-    schema = debit_schema
+    loader = staticmethod(load_debit)
     type_code = TypeCode.DEBIT
 
 
-class TransactionHistoryView(AuthorizedMethodView):
-    """View the ledger."""
+class BatchView(JSONRequestMixin, AuthorizedMethodView):
+    """Add a batch of credits and debits to the ledger in a single transaction."""
+
+    def post(self):
+        post_data = self.get_json_from_request()
+        postings = batch_schema.load(post_data).data
+        try:
+            entries = Ledger.add_entries(postings)
+        except AmountOutOfRange as exc:
+            raise BadRequest(str(exc))
+        # The entries are committed together, so any of them shows when a replica has the batch.
+        return add_consistency_token(jsonify(dump_ledger_entries(entries)), entries[-1]), HTTPStatus.CREATED
+
+
+class TransferView(JSONRequestMixin, AuthorizedMethodView):
+    """Move an amount from one account to another in a single transaction.
+
+    Responds with the debit of the paying account and the credit of the receiving account, which share a
+    transaction id.
+    """
+
+    def post(self):
+        post_data = self.get_json_from_request()
+        transfer = transfer_schema.load(post_data).data
+        try:
+            entries = Ledger.transfer(
+                transfer.from_account_number, transfer.to_account_number, transfer.amount
+            )
+        except AmountOutOfRange as exc:
+            raise BadRequest(str(exc))
+        return add_consistency_token(jsonify(dump_ledger_entries(entries)), entries[-1]), HTTPStatus.CREATED
+
+
+class TransactionHistoryView(
+    ConditionalGetMixin, ReplicaReadMixin, TimestampArgumentMixin, AuthorizedMethodView
+):
+    """View the ledger.
+
+    Pages are requested with `limit`. When a page is full the response has an `X-Next-Cursor` header,
+    passing it back as the `cursor` parameter returns the following page. Without a limit the whole
+    history is streamed. The `from` and `to` timestamps restrict the history to entries created from
+    `from` and before `to`; they must be passed again with the cursor. Responses have an ETag for
+    conditional requests.
+    """
+
+    # Number of serialized entries written to the response at a time when streaming.
+    stream_chunk_size = 100
 
     def get(self, account_number: str):
-        if self._limit_is_provided():
-            entries = Ledger.get_entries_for_account_with_limit(account_number, request.args["limit"])
-        else:
-            entries = Ledger.get_entries_for_account(account_number)
-        response = self._build_response_from_entries(entries)
-        return jsonify(response), HTTPStatus.OK
+        self.read_from_replica()
+        cursor = self._get_cursor()
+        start = self.get_timestamp_argument("from")
+        end = self.get_timestamp_argument("to")
+        limit_is_provided = self._limit_is_provided()
+        etag = self.get_etag(Balance.get_version(account_number))
+        if self.is_not_modified(etag):
+            return self.not_modified_response(etag)
+        if not limit_is_provided:
+            entries = Ledger.iter_entries_for_account(account_number, cursor, start, end)
+            response = self._stream_response_from_entries(entries)
+            response.set_etag(etag)
+            return response, HTTPStatus.OK
+        limit = int(request.args["limit"])
+        entries = Ledger.get_entries_for_account_with_limit(account_number, limit, cursor, start, end)
+        response = jsonify(dump_ledger_entries(entries))
+        response.set_etag(etag)
+        if entries and len(entries) == limit:
+            response.headers["X-Next-Cursor"] = HistoryCursor.following(entries[-1]).encode()
+        return response, HTTPStatus.OK
 
     def _limit_is_provided(self):
         if "limit" not in request.args:
@@ -91,19 +249,79 @@ class TransactionHistoryView(AuthorizedMethodView):
             raise BadRequest(f"Unrecognized limit parameter: '{limit_parameter}'")
         return True
 
-    @staticmethod
-    def _build_response_from_entries(entries):
-        response = []
-        for entry in entries:
-            serialized_entry = ledger_entry_schema.dump(entry)
-            response.append(serialized_entry.data)
-        return response
+    def _get_cursor(self):
+        if "cursor" not in request.args:
+            return None
+        cursor_parameter = request.args["cursor"]
+        try:
+            return HistoryCursor.decode(cursor_parameter)
+        except InvalidCursor:
+            raise BadRequest(f"Unrecognized cursor parameter: '{cursor_parameter}'")
+
+    @classmethod
+    def _stream_response_from_entries(cls, entries):
+        # Write the json array as the entries are read, a chunk of entries at a time.
+        def generate():
+            yield "["
+            separator = ""
+            chunk = []
+            for entry in entries:
+                chunk.append(json.dumps(dump_ledger_entry(entry)))
+                if len(chunk) == cls.stream_chunk_size:
+                    yield separator + ",".join(chunk)
+                    separator, chunk = ",", []
+            if chunk:
+                yield separator + ",".join(chunk)
+            yield "]"
+
+        return Response(stream_with_context(generate()), mimetype="application/json")
+
+
+class AccountBalanceView(
+    ConditionalGetMixin, ReplicaReadMixin, TimestampArgumentMixin, AuthorizedMethodView
+):
+    """Get the account balance for an account, or its balance at the time given by `at`.
 
+    With the balance cache enabled, a cached balance is only served while it is the latest version of the
+    balance. Reading your own postings from a replica needs the `X-Consistency-Token` of the posting:
+    requests with a token bypass the cache and wait for the replica, so they see the posting it was issued
+    for. Responses have an ETag for conditional requests.
+    """
 
-class AccountBalanceView(AuthorizedMethodView):
-    """Get the account balance for an account."""
+    def get(self, account_number: str):
+        consistency_token = self.read_from_replica()
+        at = self.get_timestamp_argument("at")
+        # The balance and its version are read together, from the cache or from the same row.
+        balance, version = Balance.get_for_account_with_version(
+            account_number, use_cache=consistency_token is None
+        )
+        etag = self.get_etag(version)
+        if self.is_not_modified(etag):
+            return self.not_modified_response(etag)
+        if at is not None:
+            balance = Balance.get_for_account_at(account_number, at)
+        response = jsonify(dump_balance(balance))
+        response.set_etag(etag)
+        return response, HTTPStatus.OK
+
+
+class StatementsView(ReplicaReadMixin, AuthorizedMethodView):
+    """Get the daily or monthly statements for an account, newest first.
+
+    The `period` parameter is `day` or `month`, defaulting to `month`.
+    """
 
     def get(self, account_number: str):
-        balance = Balance.get_for_account(account_number)
-        serialized_entry = balance_schema.dump({"balance": balance})
-        return jsonify(serialized_entry.data), HTTPStatus.OK
+        self.read_from_replica()
+        period = request.args.get("period", "month")
+        if period not in Statement.PERIODS:
+            raise BadRequest(f"Unrecognized period parameter: '{period}'")
+        statements = Statement.get_for_account(account_number, period)
+        return jsonify(statement_schema.dump(statements, many=True).data), HTTPStatus.OK
+
+
+class MetricsView(MethodView):
+    """Prometheus metrics of the service."""
+
+    def get(self):
+        return Response(metrics.generate_latest_metrics(), content_type=CONTENT_TYPE_LATEST), HTTPStatus.OK
@@ -0,0 +1,53 @@
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+import pytz
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=pytz.UTC)
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor can't be decoded."""
+
+
+class HistoryCursor(NamedTuple):
+    """Position in an account's transaction history from which the next page is read.
+
+    The next page holds the entries older than before_id. created_at is the creation time of that entry,
+    which lets the database skip the ledger partitions of later months.
+    """
+
+    before_id: int
+    created_at: datetime = None
+
+    @classmethod
+    def following(cls, entry) -> "HistoryCursor":
+        """Cursor for the page following the given entry."""
+        return cls(before_id=entry.id, created_at=entry.created_at)
+
+    def encode(self) -> str:
+        """Opaque url safe representation of the cursor."""
+        data = {"id": self.before_id}
+        if self.created_at is not None:
+            created_at = self.created_at
+            if created_at.tzinfo is None:
+                created_at = created_at.replace(tzinfo=pytz.UTC)
+            data["t"] = (created_at - EPOCH) // timedelta(microseconds=1)
+        data = json.dumps(data, separators=(",", ":"))
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, value: str) -> "HistoryCursor":
+        """Decode a cursor created with encode."""
+        try:
+            data = json.loads(base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)))
+            created_at = None
+            if "t" in data:
+                created_at = EPOCH + timedelta(microseconds=int(data["t"]))
+            return cls(before_id=int(data["id"]), created_at=created_at)
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError, OverflowError):
+            raise InvalidCursor(value)
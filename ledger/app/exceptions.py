@@ -20,3 +20,13 @@ class HTTPException(BaseHTTPException):
 class BadRequest(HTTPException):
     code = 400
     description = "The browser (or proxy) sent a request that this server could " "not understand XXX."
+
+
+class Conflict(HTTPException):
+    code = 409
+    description = "The request conflicts with a previous request."
+
+
+class ServiceUnavailable(HTTPException):
+    code = 503
+    description = "The server is temporarily unable to handle the request."
@@ -0,0 +1,150 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from decimal import Decimal
+from typing import List, Tuple
+
+from ledger.app import metrics
+from ledger.app.accounting import Ledger, LedgerEntry, Posting
+from ledger.app.accounting_types import TypeCode
+from ledger.database import db
+
+
+class GroupCommitTimeout(Exception):
+    """Raised when a queued posting isn't committed within the timeout. It may still be committed later."""
+
+
+class GroupCommitter:
+    """Posts ledger entries from concurrent requests in a worker together, in one transaction.
+
+    Postings are queued and a background thread posts everything that arrived within `interval` seconds
+    of the first posting, or up to `max_entries` postings, with Ledger.add_entries. Each caller waits up to
+    `timeout` seconds for the transaction holding its posting to be committed. If posting a group fails
+    before it is committed, its postings are retried one at a time so that a bad posting only fails its own
+    request. If the commit fails, the whole group fails without a retry: the commit may have succeeded
+    before the error, e.g. when the connection dropped, and a retry would post the entries twice.
+    """
+
+    def __init__(
+        self, enabled: bool = False, interval: float = 0.005, max_entries: int = 100, timeout: float = 30
+    ):
+        self.enabled = enabled
+        self.interval = interval
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.app = None
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Configure the committer from the app config."""
+        self.app = app
+        self.enabled = app.config["GROUP_COMMIT_ENABLED"]
+        self.interval = app.config["GROUP_COMMIT_INTERVAL_MS"] / 1000
+        self.max_entries = app.config["GROUP_COMMIT_MAX_ENTRIES"]
+        self.timeout = app.config["GROUP_COMMIT_TIMEOUT_MS"] / 1000
+
+    def add_entry(
+        self, account_number: str, amount: Decimal, type_code: TypeCode, idempotency_key: str = None
+    ) -> LedgerEntry:
+        """Add entry to the ledger, through the group commit queue when it is enabled.
+
+        Postings with an idempotency key are always posted on their own. Raises GroupCommitTimeout if the
+        posting isn't committed within the timeout.
+        """
+        if not self.enabled or idempotency_key is not None:
+            return Ledger.add_entry(account_number, amount, type_code, idempotency_key)
+        future = Future()
+        self._get_queue().put((Posting(account_number, amount, type_code), future))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise GroupCommitTimeout(f"Posting to {account_number} wasn't committed in {self.timeout}s.")
+
+    def stop(self):
+        """Post everything still queued and stop the background thread."""
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                self._queue.put(None)
+                self._thread.join()
+            self._queue = self._thread = self._pid = None
+
+    def _get_queue(self) -> queue.Queue:
+        # The thread is started on first use and again in each forked worker process, since threads don't
+        # survive a fork. A thread that died is replaced, and its replacement posts what is still queued.
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+            if self._pid != os.getpid() or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._queue,), name="group-commit", daemon=True
+                )
+                self._thread.start()
+                self._pid = os.getpid()
+            return self._queue
+
+    def _run(self, postings: queue.Queue):
+        stopping = False
+        while not stopping:
+            group = [postings.get()]
+            if group[0] is None:
+                return
+            deadline = time.monotonic() + self.interval
+            while len(group) < self.max_entries:
+                try:
+                    item = postings.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                group.append(item)
+            try:
+                self.post_group(group)
+            except Exception:
+                # The callers already got the error, the thread carries on with the next group.
+                self.app.logger.exception("Posting a group of entries failed.")
+
+    def post_group(self, group: List[Tuple[Posting, Future]]):
+        """Post a group of queued postings in one transaction and hand each caller its entry.
+
+        If posting fails unexpectedly, e.g. the rollback fails on a broken connection, every caller still
+        waiting gets the error before it is raised.
+        """
+        try:
+            self._post_group(group)
+        except BaseException as exception:
+            for _, future in group:
+                if not future.done():
+                    future.set_exception(exception)
+            raise
+
+    def _post_group(self, group: List[Tuple[Posting, Future]]):
+        with self.app.app_context():
+            try:
+                entries = Ledger.post_entries([posting for posting, _ in group])
+            except Exception as exception:
+                db.session.rollback()
+                if len(group) == 1:
+                    group[0][1].set_exception(exception)
+                    return
+                for item in group:
+                    self._post_group([item])
+                return
+            try:
+                db.session.commit()
+            except Exception as exception:
+                for _, future in group:
+                    future.set_exception(exception)
+                db.session.rollback()
+                return
+        metrics.count_posted_entries(entries)
+        for (_, future), entry in zip(group, entries):
+            future.set_result(entry)
+
+
+group_committer = GroupCommitter()
@@ -0,0 +1,146 @@
+"""Prometheus metrics of the service, served at /metrics.
+
+Request hooks time every request by url rule, and SQLAlchemy engine events count and time the queries of
+each request and the wait for a pooled connection. When gunicorn runs several workers, set
+PROMETHEUS_MULTIPROC_DIR to an empty directory shared by the workers before starting them, so that
+/metrics adds up the samples of all workers instead of those of the worker serving the scrape.
+"""
+import os
+import time
+from typing import Iterable
+
+from flask import g, has_request_context, request
+from prometheus_client import CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+registry = CollectorRegistry()
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+request_duration = Histogram(
+    "ledger_request_duration_seconds",
+    "Time taken to handle requests.",
+    ["method", "endpoint", "status"],
+    registry=registry,
+)
+request_queries = Histogram(
+    "ledger_request_db_queries",
+    "Database queries made by requests.",
+    ["endpoint"],
+    buckets=QUERY_COUNT_BUCKETS,
+    registry=registry,
+)
+request_query_duration = Histogram(
+    "ledger_request_db_duration_seconds",
+    "Time requests spent in database queries.",
+    ["endpoint"],
+    registry=registry,
+)
+query_duration = Histogram(
+    "ledger_db_query_duration_seconds", "Time taken by database queries.", registry=registry
+)
+pool_checkout_wait = Histogram(
+    "ledger_db_pool_checkout_wait_seconds",
+    "Time waited for a connection from the database connection pool.",
+    registry=registry,
+)
+entries_posted = Counter(
+    "ledger_entries_posted", "Ledger entries posted.", ["accounting_type"], registry=registry
+)
+
+token_cache_requests = Counter(
+    "ledger_token_cache_requests", "Token cache lookups, by hit or miss.", ["result"], registry=registry
+)
+balance_cache_requests = Counter(
+    "ledger_balance_cache_requests", "Balance cache lookups, by hit or miss.", ["result"], registry=registry
+)
+balance_cache_age = Histogram(
+    "ledger_balance_cache_age_seconds",
+    "Age of the balances served from the balance cache.",
+    registry=registry,
+)
+
+
+def count_posted_entries(entries: Iterable):
+    """Count committed ledger entries."""
+    for entry in entries:
+        entries_posted.labels(entry.get_accounting_type_code()).inc()
+
+
+def generate_latest_metrics() -> bytes:
+    """Latest metrics in the Prometheus text format, of all workers in multiprocess mode."""
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return generate_latest(registry)
+    workers_registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(workers_registry)
+    return generate_latest(workers_registry)
+
+
+class Metrics:
+    """Collects the request and database metrics of an app."""
+
+    def init_app(self, app):
+        """Register the request hooks on the app, and the engine events on all engines."""
+        app.before_request(self._start_request)
+        app.after_request(self._end_request)
+        if not event.contains(Engine, "before_cursor_execute", self._before_cursor_execute):
+            event.listen(Engine, "engine_connect", self._time_pool_checkouts)
+            event.listen(Engine, "before_cursor_execute", self._before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", self._after_cursor_execute)
+
+    @staticmethod
+    def _start_request():
+        g.metrics_start = time.perf_counter()
+        g.metrics_queries = 0
+        g.metrics_query_time = 0.0
+
+    @staticmethod
+    def _end_request(response):
+        if "metrics_start" not in g:
+            return response
+        endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        duration = time.perf_counter() - g.pop("metrics_start")
+        request_duration.labels(request.method, endpoint, response.status_code).observe(duration)
+        request_queries.labels(endpoint).observe(g.pop("metrics_queries"))
+        request_query_duration.labels(endpoint).observe(g.pop("metrics_query_time"))
+        return response
+
+    @staticmethod
+    def _before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+        connection.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @staticmethod
+    def _after_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - connection.info["metrics_query_start"].pop()
+        query_duration.observe(duration)
+        if has_request_context() and "metrics_queries" in g:
+            g.metrics_queries += 1
+            g.metrics_query_time += duration
+
+    @staticmethod
+    def _time_pool_checkouts(connection, branch):
+        # The pool has no event before a checkout, so its checkout methods are timed instead, from the
+        # first connection made from each pool. Sessions check out with connect, Engine.connect with
+        # unique_connection.
+        pool = connection.engine.pool
+        if getattr(pool, "metrics_timed", False):
+            return
+        for name in ("connect", "unique_connection"):
+            setattr(pool, name, Metrics._timed_checkout(getattr(pool, name)))
+        pool.metrics_timed = True
+
+    @staticmethod
+    def _timed_checkout(checkout):
+        def timed_checkout():
+            start = time.perf_counter()
+            try:
+                return checkout()
+            finally:
+                pool_checkout_wait.observe(time.perf_counter() - start)
+
+        return timed_checkout
+
+
+metrics = Metrics()
@@ -6,6 +6,11 @@ class Ledger(BaseModel):
     """Database model for the ledger."""
 
     __tablename__ = "ledger"
+    # Account history is read by account number, newest first, and balances are looked up at a point in time.
+    __table_args__ = (
+        db.Index("ix_ledger_account_number_id", "account_number", "id"),
+        db.Index("ix_ledger_account_number_created_at", "account_number", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     account_number = db.Column(db.String(16))
@@ -13,6 +18,8 @@ class Ledger(BaseModel):
     accounting_type = db.Column(db.String(1))
     transaction_id = db.Column(db.String(36))
     created_at = db.Column(db.DateTime(timezone=True))
+    # Account balance after this entry was posted.
+    balance_after = db.Column(db.DECIMAL(10, 2))
 
     def __repr__(self):
         return (
@@ -30,6 +37,75 @@ class Balance(BaseModel):
     id = db.Column(db.Integer, primary_key=True)
     account_number = db.Column(db.String(16), index=True, unique=True)
     balance = db.Column(db.DECIMAL(10, 2))
+    # Incremented with every update of the balance, so cached balances can tell which is newer.
+    version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     def __repr__(self):
         return f"<Balance: (id={self.id}, account_number=" f"{self.account_number}, balance={self.balance})>"
+
+
+class Statement(BaseModel):
+    """Database model for an account's totals over a day or a month."""
+
+    __tablename__ = "statement"
+    __table_args__ = (
+        db.Index(
+            "ix_statement_account_number_period", "account_number", "period", "period_start", unique=True
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    account_number = db.Column(db.String(16), nullable=False)
+    # "day" or "month", starting on period_start.
+    period = db.Column(db.String(5), nullable=False)
+    period_start = db.Column(db.Date, nullable=False)
+    opening_balance = db.Column(db.DECIMAL(10, 2))
+    total_credits = db.Column(db.DECIMAL(10, 2))
+    total_debits = db.Column(db.DECIMAL(10, 2))
+    entry_count = db.Column(db.Integer)
+    closing_balance = db.Column(db.DECIMAL(10, 2))
+
+    def __repr__(self):
+        return (
+            f"<Statement: (id={self.id}, account_number={self.account_number}, "
+            f"period={self.period}, period_start={self.period_start})>"
+        )
+
+
+class PostingKey(BaseModel):
+    """Database model for the idempotency key of a posting, with the entry that was posted."""
+
+    __tablename__ = "posting_key"
+
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(255), index=True, unique=True, nullable=False)
+    account_number = db.Column(db.String(16))
+    amount = db.Column(db.DECIMAL(10, 2))
+    accounting_type = db.Column(db.String(1))
+    transaction_id = db.Column(db.String(36))
+    created_at = db.Column(db.DateTime(timezone=True))
+    balance_after = db.Column(db.DECIMAL(10, 2))
+
+    def __repr__(self):
+        return f"<PostingKey: (id={self.id}, key={self.key}, transaction_id={self.transaction_id})>"
+
+
+class ArchivedAccount(BaseModel):
+    """Database model for the ledger records of an account that were moved to the archive."""
+
+    __tablename__ = "archived_account"
+
+    id = db.Column(db.Integer, primary_key=True)
+    account_number = db.Column(db.String(16), index=True, unique=True)
+    # Id of the newest archived record, archived records all have this id or lower.
+    last_id = db.Column(db.Integer)
+    last_created_at = db.Column(db.DateTime(timezone=True))
+    entry_count = db.Column(db.Integer)
+    # Balance after the newest archived record.
+    balance = db.Column(db.DECIMAL(10, 2))
+
+    def __repr__(self):
+        return (
+            f"<ArchivedAccount: (id={self.id}, account_number={self.account_number}, "
+            f"last_id={self.last_id})>"
+        )
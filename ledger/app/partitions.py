@@ -0,0 +1,133 @@
+"""Monthly partitions of the ledger table on PostgreSQL.
+
+On PostgreSQL 11 or later the ledger table is range partitioned by `created_at`, with one partition per
+month, by the partitioning migration. Partitions for the coming months are created ahead of time with
+`flask ledger create-partitions`, which `boot.sh` runs on every start. Entries that don't fall in a monthly
+partition, including any without a creation time, are stored in the default partition, and are moved to
+their monthly partition when it is created.
+"""
+import re
+from datetime import date
+from typing import List, NamedTuple, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from ledger.database import db, get_dialect_name
+
+
+DEFAULT_PARTITION = "ledger_default"
+PARTITION_NAME_PATTERN = re.compile(r"ledger_(default|y\d{4}m\d{2})")
+
+
+def get_month_start(value: date) -> date:
+    """First day of the month of the given date."""
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    """First day of the month the given number of months after the month of value."""
+    month_index = value.year * 12 + value.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def get_partition_name(month: date) -> str:
+    """Name of the partition holding the entries created in the month of the given date."""
+    return f"ledger_y{month.year:04d}m{month.month:02d}"
+
+
+def is_partition_name(name: str) -> bool:
+    """Whether a table name is the name of a ledger partition."""
+    return PARTITION_NAME_PATTERN.fullmatch(name) is not None
+
+
+def is_partitioned() -> bool:
+    """Whether the ledger table is partitioned."""
+    if get_dialect_name() != "postgresql":
+        return False
+    query = text("SELECT relkind FROM pg_class WHERE oid = to_regclass('ledger')")
+    return db.session.execute(query).scalar() == "p"
+
+
+def get_partitions() -> List[str]:
+    """Names of the existing ledger partitions."""
+    query = text("SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = 'ledger'::regclass")
+    return [row[0] for row in db.session.execute(query)]
+
+
+class PartitionsCreated(NamedTuple):
+    """Names of the partitions created by create_partitions, and of those that couldn't be created."""
+
+    created: List[str]
+    failed: List[str]
+
+
+def get_partition_bounds(month: date) -> Tuple[str, str]:
+    """Start and exclusive end of the creation times of the entries in the month of the given date."""
+    start = get_month_start(month)
+    # Bounds are given in UTC, the time zone entries are created in.
+    return f"{start} 00:00:00+00", f"{add_months(start, 1)} 00:00:00+00"
+
+
+def get_partition_statement(month: date) -> str:
+    """Statement creating the partition for the entries created in the month of the given date."""
+    start, end = get_partition_bounds(month)
+    return (
+        f"CREATE TABLE {get_partition_name(month)} PARTITION OF ledger "
+        f"FOR VALUES FROM ('{start}') TO ('{end}')"
+    )
+
+
+def default_partition_has_entries(month: date) -> bool:
+    """Whether entries created in the month of the given date are stored in the default partition."""
+    start, end = get_partition_bounds(month)
+    query = text(
+        f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end)"
+    )
+    return bool(db.session.execute(query, {"start": start, "end": end}).scalar())
+
+
+def create_partition(month: date):
+    """Create the partition for the entries created in the month of the given date.
+
+    PostgreSQL refuses to create a partition for a month that the default partition has entries of, so
+    those entries are moved: the default partition is detached, the partition is created and filled with
+    the month's entries, and the default partition is attached again without them. The change is not
+    committed.
+    """
+    if not default_partition_has_entries(month):
+        db.session.execute(text(get_partition_statement(month)))
+        return
+    start, end = get_partition_bounds(month)
+    in_month = f"created_at >= '{start}' AND created_at < '{end}'"
+    for statement in [
+        f"ALTER TABLE ledger DETACH PARTITION {DEFAULT_PARTITION}",
+        get_partition_statement(month),
+        f"INSERT INTO ledger SELECT * FROM {DEFAULT_PARTITION} WHERE {in_month}",
+        f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_month}",
+        f"ALTER TABLE ledger ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT",
+    ]:
+        db.session.execute(text(statement))
+
+
+def create_partitions(start: date, end: date) -> PartitionsCreated:
+    """Create the monthly partitions from the month of start to the month of end that don't exist yet.
+
+    Each partition is created and committed in its own transaction, so a month that fails doesn't keep the
+    following months from being created.
+    """
+    existing = set(get_partitions())
+    created, failed = [], []
+    month = get_month_start(start)
+    while month <= end:
+        name = get_partition_name(month)
+        if name not in existing:
+            try:
+                create_partition(month)
+                db.session.commit()
+                created.append(name)
+            except SQLAlchemyError:
+                db.session.rollback()
+                failed.append(name)
+        month = add_months(month, 1)
+    return PartitionsCreated(created, failed)
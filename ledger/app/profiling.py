@@ -0,0 +1,133 @@
+"""Profiling of single requests, for finding out why a request is slow.
+
+With PROFILING_ENABLED, a request sending an `X-Profile` header with the PROFILING_TOKEN secret is profiled
+with cProfile, its SQL statements are timed and its peak memory allocation is traced with tracemalloc. The
+profile is written to PROFILING_SPOOL_DIR when the response has been sent, so streamed responses are
+profiled until the last chunk. The response has an `X-Profile-Id` header naming the files:
+`<id>.prof` with the cProfile stats, which open with pstats or snakeviz, and `<id>.json` with the
+statements and timings. One request is profiled at a time, others run as usual. When profiling isn't
+enabled no hooks are registered, so requests don't pay for it.
+"""
+import cProfile
+import hmac
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class RequestProfile:
+    """Profile of one request while it runs."""
+
+    def __init__(self):
+        self.id = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self.method = request.method
+        self.path = request.full_path
+        self.profiler = cProfile.Profile()
+        self.queries = []
+        self.start = time.perf_counter()
+        self.finishing = False
+
+    def to_dict(self, status: int, duration: float, memory_peak: int) -> dict:
+        """Summary of the profile, with the SQL statements in the order they ran."""
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": status,
+            "duration": duration,
+            "memoryPeak": memory_peak,
+            "queryCount": len(self.queries),
+            "queryDuration": sum(query["duration"] for query in self.queries),
+            "queries": self.queries,
+        }
+
+
+class RequestProfiler:
+    """Profiles the requests that ask for it with the profiling token."""
+
+    def __init__(self):
+        self.enabled = False
+        self.token = ""
+        self.spool_dir = ""
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Configure the profiler from the app config, and register its hooks if profiling is enabled."""
+        self.enabled = app.config["PROFILING_ENABLED"]
+        self.token = app.config["PROFILING_TOKEN"]
+        self.spool_dir = app.config["PROFILING_SPOOL_DIR"]
+        if not self.enabled:
+            return
+        app.before_request(self._start)
+        app.after_request(self._finish_on_close)
+        app.teardown_request(self._reset)
+        if not event.contains(Engine, "before_cursor_execute", self._before_cursor_execute):
+            event.listen(Engine, "before_cursor_execute", self._before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def is_requested(self) -> bool:
+        """Whether the current request asks to be profiled with the profiling token."""
+        header = request.headers.get("X-Profile", "")
+        return bool(self.token) and hmac.compare_digest(header.encode(), self.token.encode())
+
+    def _start(self):
+        if not self.is_requested() or not self._lock.acquire(blocking=False):
+            return
+        tracemalloc.start()
+        g.profile = RequestProfile()
+        g.profile.profiler.enable()
+
+    def _finish_on_close(self, response):
+        profile = g.get("profile")
+        if profile is None:
+            return response
+        response.headers["X-Profile-Id"] = profile.id
+        response.call_on_close(lambda: self._finish(profile, response.status_code))
+        profile.finishing = True
+        return response
+
+    def _finish(self, profile: RequestProfile, status: int):
+        try:
+            profile.profiler.disable()
+            duration = time.perf_counter() - profile.start
+            memory_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            os.makedirs(self.spool_dir, exist_ok=True)
+            profile.profiler.dump_stats(os.path.join(self.spool_dir, f"{profile.id}.prof"))
+            with open(os.path.join(self.spool_dir, f"{profile.id}.json"), "w") as summary_file:
+                json.dump(profile.to_dict(status, duration, memory_peak), summary_file, indent=2)
+        finally:
+            self._lock.release()
+
+    def _reset(self, exception=None):
+        profile = g.pop("profile", None)
+        if profile is None or profile.finishing:
+            return
+        # The response was never handed the profile, when another after request hook failed, so profiling
+        # is stopped here to let the next request be profiled.
+        profile.profiler.disable()
+        tracemalloc.stop()
+        self._lock.release()
+
+    @staticmethod
+    def _before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+        if has_request_context() and g.get("profile") is not None:
+            connection.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+    @staticmethod
+    def _after_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+        starts = connection.info.get("profile_query_start")
+        if has_request_context() and g.get("profile") is not None and starts:
+            duration = time.perf_counter() - starts.pop()
+            g.profile.queries.append({"statement": statement, "duration": duration})
+
+
+request_profiler = RequestProfiler()
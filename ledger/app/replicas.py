@@ -0,0 +1,128 @@
+"""Routing of reads to read replicas.
+
+Replicas are the SQLALCHEMY_BINDS named `replica_<n>`, configured with the comma separated
+SQLALCHEMY_REPLICA_URIS. The GET endpoints read from a replica chosen at random for each request, postings
+always go to the primary. Posting endpoints return an `X-Consistency-Token` header identifying the entry
+posted. A read passing it back waits up to REPLICA_WAIT_MS for its replica to have that entry, and reads
+from the primary if it doesn't, so clients read their own writes.
+"""
+import base64
+import binascii
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from typing import List, NamedTuple
+
+import pytz
+from flask import current_app, g
+from sqlalchemy import select
+
+from ledger.app import models
+from ledger.app.cursors import EPOCH
+from ledger.database import db
+
+
+REPLICA_BIND_PREFIX = "replica_"
+# Seconds between checks of whether a replica has caught up with a consistency token.
+POLL_INTERVAL = 0.01
+
+
+class InvalidConsistencyToken(ValueError):
+    """Raised when a consistency token can't be decoded."""
+
+
+class ConsistencyToken(NamedTuple):
+    """A posted ledger entry, which a replica must have before reading from it after the posting."""
+
+    account_number: str
+    created_at: datetime
+    transaction_id: str
+
+    @classmethod
+    def for_entry(cls, entry) -> "ConsistencyToken":
+        """Token for reading after the given entry was posted."""
+        return cls(entry.account_number, entry.created_at, str(entry.transaction_id))
+
+    def encode(self) -> str:
+        """Opaque url safe representation of the token."""
+        created_at = self.created_at
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=pytz.UTC)
+        created_at = (created_at - EPOCH) // timedelta(microseconds=1)
+        data = json.dumps({"a": self.account_number, "t": created_at, "x": self.transaction_id})
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, value: str) -> "ConsistencyToken":
+        """Decode a token created with encode."""
+        try:
+            data = json.loads(base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)))
+            created_at = EPOCH + timedelta(microseconds=int(data["t"]))
+            return cls(str(data["a"]), created_at, str(data["x"]))
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError, OverflowError):
+            raise InvalidConsistencyToken(value)
+
+
+def get_replica_binds() -> List[str]:
+    """Names of the configured replica binds."""
+    binds = current_app.config.get("SQLALCHEMY_BINDS") or {}
+    return sorted(name for name in binds if name.startswith(REPLICA_BIND_PREFIX))
+
+
+class ReplicaRouter:
+    """Sends the reads of a request to a read replica, for as long as the request lasts."""
+
+    def __init__(self, wait: float = 0.1):
+        self.wait = wait
+
+    def init_app(self, app):
+        """Configure the router from the app config."""
+        self.wait = app.config["REPLICA_WAIT_MS"] / 1000
+        app.teardown_request(self._reset)
+
+    def route_reads(self, consistency_token: ConsistencyToken = None) -> str:
+        """Read from a replica for the rest of the request, and return its bind name.
+
+        With a consistency token, the replica is only used once it has the token's entry. Returns None when
+        reads stay on the primary, because there are no replicas or the replica didn't catch up in time.
+        """
+        binds = get_replica_binds()
+        if not binds:
+            return None
+        bind = random.choice(binds)
+        if consistency_token is not None and not self._wait_for_entry(bind, consistency_token):
+            return None
+        g.replica_bind = bind
+        return bind
+
+    def _wait_for_entry(self, bind: str, consistency_token: ConsistencyToken) -> bool:
+        deadline = time.monotonic() + self.wait
+        while not self._has_entry(bind, consistency_token):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(POLL_INTERVAL)
+        return True
+
+    @staticmethod
+    def _has_entry(bind: str, consistency_token: ConsistencyToken) -> bool:
+        # Looked up with the (account_number, created_at) index, outside of the request's session so each
+        # check sees the latest replicated state.
+        table = models.Ledger.__table__
+        created_at = consistency_token.created_at.astimezone(pytz.UTC).replace(tzinfo=None)
+        query = (
+            select([table.c.id])
+            .where(table.c.account_number == consistency_token.account_number)
+            .where(table.c.created_at == created_at)
+            .where(table.c.transaction_id == consistency_token.transaction_id)
+            .limit(1)
+        )
+        with db.get_engine(current_app, bind=bind).connect() as connection:
+            return connection.execute(query).first() is not None
+
+    @staticmethod
+    def _reset(exception=None):
+        g.pop("replica_bind", None)
+
+
+replica_router = ReplicaRouter()
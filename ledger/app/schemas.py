@@ -1,7 +1,10 @@
 from decimal import Decimal
-from typing import NamedTuple
+from typing import List, NamedTuple
 
-from marshmallow import Schema, fields, post_load
+from marshmallow import Schema, ValidationError, fields, post_load, validate, validates, validates_schema
+
+from ledger.app.accounting import STORED_AMOUNT_EXPONENT, Posting
+from ledger.app.accounting_types import TypeCode
 
 
 class LedgerEntrySchema(Schema):
@@ -50,13 +53,98 @@ class DebitSchema(Schema):
         strict = True
 
 
+class BatchEntrySchema(Schema):
+    """Deserializer for a single credit or debit in a batch request."""
+
+    creditAmount = fields.Decimal(attribute="credit_amount")
+    debitAmount = fields.Decimal(attribute="debit_amount")
+    accountNumber = fields.Str(attribute="account_number", required=True)
+
+    @validates_schema(skip_on_field_errors=True)
+    def validate_single_amount(self, data):
+        if ("credit_amount" in data) == ("debit_amount" in data):
+            raise ValidationError("Exactly one of creditAmount or debitAmount is required.")
+
+    @post_load
+    def create_posting(self, data) -> Posting:
+        if "credit_amount" in data:
+            return Posting(data["account_number"], data["credit_amount"], TypeCode.CREDIT)
+        return Posting(data["account_number"], data["debit_amount"], TypeCode.DEBIT)
+
+    class Meta:
+        strict = True
+
+
+class BatchSchema(Schema):
+    """Deserializer for a batch of credits and debits."""
+
+    entries = fields.List(fields.Nested(BatchEntrySchema), required=True, validate=validate.Length(min=1))
+
+    @post_load
+    def create_postings(self, data) -> List[Posting]:
+        return data["entries"]
+
+    class Meta:
+        strict = True
+
+
+class TransferData(NamedTuple):
+    """Deserialized transfer request."""
+
+    amount: Decimal
+    from_account_number: str
+    to_account_number: str
+
+
+class TransferSchema(Schema):
+    """Deserializer for a transfer between two accounts."""
+
+    amount = fields.Decimal(required=True)
+    fromAccountNumber = fields.Str(attribute="from_account_number", required=True)
+    toAccountNumber = fields.Str(attribute="to_account_number", required=True)
+
+    @validates("amount")
+    def validate_positive_amount(self, value):
+        # A negative amount would move money the other way, and zero would post two empty entries. Amounts
+        # below half a cent are stored as zero, so they are rejected too.
+        if value < STORED_AMOUNT_EXPONENT / 2:
+            raise ValidationError("Must be greater than 0.")
+
+    @validates_schema(skip_on_field_errors=True)
+    def validate_different_accounts(self, data):
+        if data["from_account_number"] == data["to_account_number"]:
+            raise ValidationError("fromAccountNumber and toAccountNumber must be different accounts.")
+
+    @post_load
+    def create_transfer_data(self, data) -> TransferData:
+        return TransferData(**data)
+
+    class Meta:
+        strict = True
+
+
 class BalanceSchema(Schema):
     """Serializer for balance responses."""
 
     balance = fields.Str()
 
 
+class StatementSchema(Schema):
+    """Serializer for statement responses."""
+
+    period = fields.Str()
+    periodStart = fields.Date(attribute="period_start")
+    openingBalance = fields.Str(attribute="opening_balance")
+    totalCredits = fields.Str(attribute="total_credits")
+    totalDebits = fields.Str(attribute="total_debits")
+    entryCount = fields.Int(attribute="entry_count")
+    closingBalance = fields.Str(attribute="closing_balance")
+
+
 ledger_entry_schema = LedgerEntrySchema()
 credit_schema = CreditSchema()
 debit_schema = DebitSchema()
+batch_schema = BatchSchema()
+transfer_schema = TransferSchema()
 balance_schema = BalanceSchema()
+statement_schema = StatementSchema()
@@ -0,0 +1,33 @@
+import click
+from flask.cli import AppGroup
+
+from ledger.authorization.signing import InvalidSignedToken, token_signer
+from ledger.authorization.utils import revoke_token
+
+
+auth_cli = AppGroup("auth", help="Access token commands.")
+
+
+@auth_cli.command("issue-token")
+@click.option("--expires-in", type=int, default=3600, show_default=True, help="Lifetime in seconds.")
+@click.option("--claim", "claims", multiple=True, metavar="NAME=VALUE", help="Extra claim, can be repeated.")
+def issue_token(expires_in, claims):
+    """Issue a signed access token."""
+    if not token_signer.keys:
+        raise click.UsageError("SIGNED_TOKEN_KEYS is not configured.")
+    try:
+        claims = dict(claim.split("=", 1) for claim in claims)
+    except ValueError:
+        raise click.BadParameter("Claims must be given as NAME=VALUE.", param_hint="--claim")
+    click.echo(token_signer.issue(expires_in, claims))
+
+
+@auth_cli.command("revoke-token")
+@click.argument("token")
+def revoke_token_command(token):
+    """Revoke a stored or signed access token."""
+    try:
+        revoke_token(token)
+    except InvalidSignedToken as exception:
+        raise click.BadParameter(str(exception), param_hint="TOKEN")
+    click.echo("Token revoked.")
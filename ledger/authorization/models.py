@@ -3,7 +3,11 @@ from ledger.models import BaseModel
 
 
 class Token(BaseModel):
-    """Database model to store tokens."""
+    """Database model to store tokens.
+
+    Also holds the ids of revoked signed tokens, which are stored with revoked set.
+    """
 
     id = db.Column(db.Integer, primary_key=True)
-    access_token = db.Column(db.String(256))
+    access_token = db.Column(db.String(256), index=True)
+    revoked = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
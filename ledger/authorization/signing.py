@@ -0,0 +1,95 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import time
+import uuid
+from collections import OrderedDict
+
+
+TOKEN_PREFIX = "v1"
+
+
+class InvalidSignedToken(Exception):
+    """Raised when a signed token is malformed, has a bad signature or has expired."""
+
+
+def _encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def _decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def is_signed_token(token: str) -> bool:
+    """Whether a token is in the signed format, rather than an opaque token stored in the database."""
+    return token.startswith(f"{TOKEN_PREFIX}.")
+
+
+class TokenSigner:
+    """Issues and verifies HMAC-SHA256 signed access tokens.
+
+    A token has the form `v1.<key id>.<claims>.<signature>`. New tokens are signed with the first key,
+    the other keys are only used to verify tokens, so keys can be rotated by adding a new key in front and
+    dropping the old one once the tokens signed with it have expired.
+    """
+
+    def __init__(self, keys: dict = None, enabled: bool = False):
+        self.keys = OrderedDict(keys or {})
+        self.enabled = enabled
+
+    def init_app(self, app):
+        """Configure the signer from the app config."""
+        self.enabled = app.config["SIGNED_TOKENS_ENABLED"]
+        self.keys = self.parse_keys(app.config["SIGNED_TOKEN_KEYS"])
+        if self.enabled and not self.keys:
+            raise ValueError("SIGNED_TOKEN_KEYS must be set when SIGNED_TOKENS_ENABLED is true.")
+
+    @staticmethod
+    def parse_keys(value: str) -> OrderedDict:
+        """Parse comma separated `key_id:secret` pairs."""
+        keys = OrderedDict()
+        for pair in filter(None, (pair.strip() for pair in value.split(","))):
+            key_id, _, secret = pair.partition(":")
+            if not key_id or not secret or "." in key_id:
+                raise ValueError(f"Signed token keys must be 'key_id:secret' pairs, got '{pair}'.")
+            keys[key_id] = secret
+        return keys
+
+    def issue(self, expires_in: int, claims: dict = None) -> str:
+        """Issue a token that expires in the given number of seconds, with optional extra claims."""
+        key_id, secret = next(iter(self.keys.items()))
+        now = int(time.time())
+        payload = dict(claims or {}, jti=uuid.uuid4().hex, iat=now, exp=now + expires_in)
+        encoded_claims = _encode(json.dumps(payload, separators=(",", ":")).encode())
+        signing_input = f"{TOKEN_PREFIX}.{key_id}.{encoded_claims}"
+        return f"{signing_input}.{self._sign(secret, signing_input)}"
+
+    def verify(self, token: str) -> dict:
+        """Verify the signature and expiry of a token and return its claims."""
+        try:
+            prefix, key_id, encoded_claims, signature = token.split(".")
+        except ValueError:
+            raise InvalidSignedToken("Malformed token.")
+        if prefix != TOKEN_PREFIX or key_id not in self.keys:
+            raise InvalidSignedToken("Unknown token version or key.")
+        expected_signature = self._sign(self.keys[key_id], f"{prefix}.{key_id}.{encoded_claims}")
+        if not hmac.compare_digest(signature, expected_signature):
+            raise InvalidSignedToken("Bad signature.")
+        try:
+            claims = json.loads(_decode(encoded_claims))
+            expires_at = claims["exp"]
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise InvalidSignedToken("Malformed claims.")
+        if expires_at <= time.time():
+            raise InvalidSignedToken("Token has expired.")
+        return claims
+
+    @staticmethod
+    def _sign(secret: str, signing_input: str) -> str:
+        return _encode(hmac.new(secret.encode(), signing_input.encode(), hashlib.sha256).digest())
+
+
+token_signer = TokenSigner()
@@ -1,8 +1,143 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from sqlalchemy import event
+
+from ledger.app import metrics
 from ledger.authorization.models import Token
+from ledger.authorization.signing import InvalidSignedToken, is_signed_token, token_signer
 from ledger.database import db
 
 
+class TokenCache:
+    """Bounded cache of token validation results, evicting the least recently used token when full.
+
+    Valid tokens are cached for `ttl` seconds and invalid tokens for `negative_ttl` seconds. Hits and misses
+    are counted, and exported as metrics. A size of zero disables the cache.
+    """
+
+    def __init__(self, size: int = 10000, ttl: float = 60, negative_ttl: float = 5):
+        self.size = size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Configure the cache from the app config."""
+        self.size = app.config["TOKEN_CACHE_SIZE"]
+        self.ttl = app.config["TOKEN_CACHE_TTL"]
+        self.negative_ttl = app.config["TOKEN_CACHE_NEGATIVE_TTL"]
+        self.clear()
+
+    def get(self, token: str):
+        """Return the cached validation result for a token, or None if it isn't cached."""
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[1] <= time.monotonic():
+                self.misses += 1
+                metrics.token_cache_requests.labels("miss").inc()
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+        metrics.token_cache_requests.labels("hit").inc()
+        return entry[0]
+
+    def set(self, token: str, is_valid: bool):
+        """Cache the validation result for a token."""
+        if self.size <= 0:
+            return
+        expires_at = time.monotonic() + (self.ttl if is_valid else self.negative_ttl)
+        with self._lock:
+            self._entries[token] = (is_valid, expires_at)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token: str):
+        """Remove a token from the cache, e.g. when it is revoked."""
+        with self._lock:
+            self._entries.pop(token, None)
+
+    def clear(self):
+        """Remove all tokens from the cache and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+token_cache = TokenCache()
+
+
 def token_is_valid(token: str) -> bool:
-    """Checks token is present in db."""
-    query = db.session.query(Token).filter(Token.access_token == token)
-    return db.session.query(query.exists()).scalar()
+    """Checks token is present in db, or is a correctly signed token that hasn't expired or been revoked.
+
+    Results of database lookups are cached.
+    """
+    if token_signer.enabled and is_signed_token(token):
+        return _signed_token_is_valid(token)
+    is_valid = token_cache.get(token)
+    if is_valid is None:
+        query = db.session.query(Token).filter(Token.access_token == token, Token.revoked.is_(False))
+        is_valid = db.session.query(query.exists()).scalar()
+        token_cache.set(token, is_valid)
+    return is_valid
+
+
+def _revocation_key(token_id: str) -> tuple:
+    # Revocation checks are cached apart from stored tokens, as token ids are readable from signed tokens
+    # and must never be accepted as a stored token.
+    return ("jti", token_id)
+
+
+def _signed_token_is_valid(token: str) -> bool:
+    # Signed tokens are verified without the database. Revoked tokens are stored by their token id, which
+    # is only looked up when revocation checks are enabled and the token id isn't already cached.
+    try:
+        claims = token_signer.verify(token)
+    except InvalidSignedToken:
+        return False
+    if not current_app.config["SIGNED_TOKEN_CHECK_REVOCATION"]:
+        return True
+    token_id = claims["jti"]
+    is_valid = token_cache.get(_revocation_key(token_id))
+    if is_valid is None:
+        query = db.session.query(Token).filter(Token.access_token == token_id, Token.revoked.is_(True))
+        is_valid = not db.session.query(query.exists()).scalar()
+        token_cache.set(_revocation_key(token_id), is_valid)
+    return is_valid
+
+
+def revoke_token(token: str):
+    """Revoke a token.
+
+    Signed tokens are revoked by storing their token id, so revoking them requires a valid signature.
+    """
+    if is_signed_token(token):
+        token_id = token_signer.verify(token)["jti"]
+        db.session.add(Token(access_token=token_id, revoked=True))
+    else:
+        for record in Token.query.filter_by(access_token=token):
+            record.revoked = True
+    db.session.commit()
+
+
+@event.listens_for(Token, "after_insert")
+@event.listens_for(Token, "after_update")
+@event.listens_for(Token, "after_delete")
+def invalidate_cached_token(mapper, connection, target):
+    """Drop a token from this worker's cache whenever it is created, changed or deleted.
+
+    Other workers keep their cached result until it expires. Records of revoked signed tokens are stored by
+    token id, so the cached revocation check of that id is dropped as well.
+    """
+    token_cache.invalidate(target.access_token)
+    token_cache.invalidate(_revocation_key(target.access_token))
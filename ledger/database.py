@@ -1,4 +1,25 @@
-from flask_sqlalchemy import SQLAlchemy
+from flask import g, has_app_context
+from flask_sqlalchemy import SignallingSession, SQLAlchemy
+from sqlalchemy import orm
 
 
-db = SQLAlchemy()
+class RoutingSession(SignallingSession):
+    """Session that sends its queries to the read replica chosen for the current request, if any."""
+
+    def get_bind(self, mapper=None, clause=None):
+        if has_app_context() and g.get("replica_bind") is not None:
+            return db.get_engine(self.app, bind=g.replica_bind)
+        return super().get_bind(mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+db = RoutingSQLAlchemy()
+
+
+def get_dialect_name() -> str:
+    """Name of the database dialect the current session is bound to, e.g. 'postgresql' or 'sqlite'."""
+    return db.session.get_bind().dialect.name
@@ -4,3 +4,57 @@ import os
 
 SQLALCHEMY_DATABASE_URI = os.environ["SQLALCHEMY_DATABASE_URI"]
 SQLALCHEMY_TRACK_MODIFICATIONS = os.environ.get("SQLALCHEMY_TRACK_MODIFICATIONS", True)
+
+# Connection pool of each worker, SQLAlchemy's defaults are used for settings that aren't given.
+SQLALCHEMY_POOL_SIZE = (
+    int(os.environ["SQLALCHEMY_POOL_SIZE"]) if "SQLALCHEMY_POOL_SIZE" in os.environ else None
+)
+SQLALCHEMY_MAX_OVERFLOW = (
+    int(os.environ["SQLALCHEMY_MAX_OVERFLOW"]) if "SQLALCHEMY_MAX_OVERFLOW" in os.environ else None
+)
+SQLALCHEMY_POOL_TIMEOUT = (
+    int(os.environ["SQLALCHEMY_POOL_TIMEOUT"]) if "SQLALCHEMY_POOL_TIMEOUT" in os.environ else None
+)
+
+# Read replicas, comma separated database URIs. GET endpoints read from a replica, waiting up to
+# REPLICA_WAIT_MS for it to catch up with a consistency token before falling back to the primary.
+SQLALCHEMY_BINDS = {
+    f"replica_{index}": uri
+    for index, uri in enumerate(filter(None, os.environ.get("SQLALCHEMY_REPLICA_URIS", "").split(",")))
+}
+REPLICA_WAIT_MS = float(os.environ.get("REPLICA_WAIT_MS", 100))
+
+# Token validation cache, times are in seconds.
+TOKEN_CACHE_SIZE = int(os.environ.get("TOKEN_CACHE_SIZE", 10000))
+TOKEN_CACHE_TTL = float(os.environ.get("TOKEN_CACHE_TTL", 60))
+TOKEN_CACHE_NEGATIVE_TTL = float(os.environ.get("TOKEN_CACHE_NEGATIVE_TTL", 5))
+
+# Balance cache of each worker, written through by postings. Cached balances are checked against the version
+# of the balance row on every read. A size of zero disables the cache.
+BALANCE_CACHE_SIZE = int(os.environ.get("BALANCE_CACHE_SIZE", 0))
+BALANCE_CACHE_TTL = float(os.environ.get("BALANCE_CACHE_TTL", 1))
+
+# Signed access tokens, verified without the database. Keys are comma separated `key_id:secret` pairs,
+# new tokens are signed with the first key.
+SIGNED_TOKENS_ENABLED = os.environ.get("SIGNED_TOKENS_ENABLED", "false").lower() == "true"
+SIGNED_TOKEN_KEYS = os.environ.get("SIGNED_TOKEN_KEYS", "")
+SIGNED_TOKEN_CHECK_REVOCATION = os.environ.get("SIGNED_TOKEN_CHECK_REVOCATION", "true").lower() == "true"
+
+# Group commit: postings in a worker are queued and posted together in one transaction, at most every
+# GROUP_COMMIT_INTERVAL_MS milliseconds or GROUP_COMMIT_MAX_ENTRIES postings. Requests fail if their posting
+# isn't committed within GROUP_COMMIT_TIMEOUT_MS.
+GROUP_COMMIT_ENABLED = os.environ.get("GROUP_COMMIT_ENABLED", "false").lower() == "true"
+GROUP_COMMIT_INTERVAL_MS = float(os.environ.get("GROUP_COMMIT_INTERVAL_MS", 5))
+GROUP_COMMIT_MAX_ENTRIES = int(os.environ.get("GROUP_COMMIT_MAX_ENTRIES", 100))
+GROUP_COMMIT_TIMEOUT_MS = float(os.environ.get("GROUP_COMMIT_TIMEOUT_MS", 30000))
+
+# Archive of old ledger records, in Parquet files under ARCHIVE_PATH split by account hash into
+# ARCHIVE_BUCKETS directories. Archiving is disabled when no path is set.
+ARCHIVE_PATH = os.environ.get("ARCHIVE_PATH", "")
+ARCHIVE_BUCKETS = int(os.environ.get("ARCHIVE_BUCKETS", 64))
+
+# Profiling of single requests sending the PROFILING_TOKEN in an `X-Profile` header, written to
+# PROFILING_SPOOL_DIR. Nothing is profiled unless PROFILING_ENABLED is set.
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "false").lower() == "true"
+PROFILING_TOKEN = os.environ.get("PROFILING_TOKEN", "")
+PROFILING_SPOOL_DIR = os.environ.get("PROFILING_SPOOL_DIR", "/tmp/ledger-profiles")
@@ -1,6 +1,15 @@
 from flask import Blueprint
 
-from ledger.app.controllers import CreditView, DebitView, TransactionHistoryView, AccountBalanceView
+from ledger.app.controllers import (
+    AccountBalanceView,
+    BatchView,
+    CreditView,
+    DebitView,
+    MetricsView,
+    StatementsView,
+    TransactionHistoryView,
+    TransferView,
+)
 
 
 GET = "GET"
@@ -12,6 +21,8 @@ blueprint = Blueprint("ledger", __name__, url_prefix="/")
 
 blueprint.add_url_rule(rule="/ledger/credit", methods=(POST,), view_func=CreditView.as_view("credit"))
 blueprint.add_url_rule(rule="/ledger/debit", methods=(POST,), view_func=DebitView.as_view("debit"))
+blueprint.add_url_rule(rule="/ledger/batch", methods=(POST,), view_func=BatchView.as_view("batch"))
+blueprint.add_url_rule(rule="/ledger/transfer", methods=(POST,), view_func=TransferView.as_view("transfer"))
 blueprint.add_url_rule(
     rule="/account/<account_number>/transactions",
     methods=(GET,),
@@ -22,3 +33,9 @@ blueprint.add_url_rule(
     methods=(GET,),
     view_func=AccountBalanceView.as_view("account_balance"),
 )
+blueprint.add_url_rule(
+    rule="/account/<account_number>/statements",
+    methods=(GET,),
+    view_func=StatementsView.as_view("statements"),
+)
+blueprint.add_url_rule(rule="/metrics", methods=(GET,), view_func=MetricsView.as_view("metrics"))
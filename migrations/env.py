@@ -22,6 +22,13 @@ config.set_main_option('sqlalchemy.url',
                        current_app.config.get('SQLALCHEMY_DATABASE_URI'))
 target_metadata = current_app.extensions['migrate'].db.metadata
 
+from ledger.app.partitions import is_partition_name
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    # Ledger partitions are created outside of migrations and aren't in the models.
+    return not (type_ == 'table' and reflected and is_partition_name(name))
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -73,6 +80,7 @@ def run_migrations_online():
     context.configure(connection=connection,
                       target_metadata=target_metadata,
                       process_revision_directives=process_revision_directives,
+                      include_object=include_object,
                       **current_app.extensions['migrate'].configure_args)
 
     try:
@@ -0,0 +1,87 @@
+"""partition ledger by month on postgresql
+
+Revision ID: 6b8d3074eb92
+Revises: d514cddb3f19
+Create Date: 2026-10-17 16:48:13.197988
+
+"""
+from datetime import timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6b8d3074eb92'
+down_revision = 'd514cddb3f19'
+branch_labels = None
+depends_on = None
+
+# Monthly partitions created after the current month, later ones are created with
+# `flask ledger create-partitions`.
+MONTHS_AHEAD = 3
+
+
+def upgrade():
+    # Declarative partitioning needs PostgreSQL 11 or later, other databases keep a single table.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('ALTER TABLE ledger RENAME TO ledger_unpartitioned')
+    op.execute('ALTER INDEX ix_ledger_account_number_id RENAME TO ix_ledger_unpartitioned_account_number_id')
+    op.execute(
+        'ALTER INDEX ix_ledger_account_number_created_at '
+        'RENAME TO ix_ledger_unpartitioned_account_number_created_at'
+    )
+    # Unique constraints on a partitioned table must include created_at, which may be null on old records,
+    # so the partitioned table has no primary key. Ids stay unique as they come from the same sequence.
+    op.execute(
+        'CREATE TABLE ledger (LIKE ledger_unpartitioned INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)'
+    )
+    op.execute('ALTER SEQUENCE ledger_id_seq OWNED BY ledger.id')
+    op.create_index('ix_ledger_account_number_id', 'ledger', ['account_number', 'id'], unique=False)
+    op.create_index(
+        'ix_ledger_account_number_created_at', 'ledger', ['account_number', 'created_at'], unique=False
+    )
+
+    op.execute('CREATE TABLE ledger_default PARTITION OF ledger DEFAULT')
+    first_month, last_month = op.get_bind().execute(
+        f"""
+        SELECT
+            date_trunc('month', coalesce(min(created_at), now()) AT TIME ZONE 'UTC')::date,
+            (date_trunc('month', now() AT TIME ZONE 'UTC') + interval '{MONTHS_AHEAD} months')::date
+        FROM ledger_unpartitioned
+        """
+    ).first()
+    month = first_month
+    while month <= last_month:
+        next_month = (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+        op.execute(
+            f"CREATE TABLE ledger_y{month.year:04d}m{month.month:02d} PARTITION OF ledger "
+            f"FOR VALUES FROM ('{month} 00:00:00+00') TO ('{next_month} 00:00:00+00')"
+        )
+        month = next_month
+
+    op.execute('INSERT INTO ledger SELECT * FROM ledger_unpartitioned')
+    op.execute('DROP TABLE ledger_unpartitioned')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('ALTER TABLE ledger RENAME TO ledger_partitioned')
+    op.execute('ALTER INDEX ix_ledger_account_number_id RENAME TO ix_ledger_partitioned_account_number_id')
+    op.execute(
+        'ALTER INDEX ix_ledger_account_number_created_at '
+        'RENAME TO ix_ledger_partitioned_account_number_created_at'
+    )
+    op.execute('CREATE TABLE ledger (LIKE ledger_partitioned INCLUDING DEFAULTS)')
+    op.execute('ALTER TABLE ledger ADD PRIMARY KEY (id)')
+    op.execute('ALTER SEQUENCE ledger_id_seq OWNED BY ledger.id')
+    op.execute('INSERT INTO ledger SELECT * FROM ledger_partitioned')
+    op.execute('DROP TABLE ledger_partitioned')
+    op.create_index('ix_ledger_account_number_id', 'ledger', ['account_number', 'id'], unique=False)
+    op.create_index(
+        'ix_ledger_account_number_created_at', 'ledger', ['account_number', 'created_at'], unique=False
+    )
@@ -10,8 +10,8 @@ application_dependencies = [
     'flask-migrate',
     'marshmallow',
     'pytz',
+    'prometheus-client',
 ]
-prod_dependencies = []
 test_dependencies = [
     'tox',
     'pytest',
@@ -26,6 +26,16 @@ lint_dependencies = [
     'black',
 ]
 docs_dependencies = []
+archive_dependencies = [
+    'pyarrow',
+]
+gevent_dependencies = [
+    'gunicorn',
+    'gevent',
+    'psycogreen',
+]
+# The production image serves with gunicorn, so its dependencies are frozen in requirements.txt.
+prod_dependencies = gevent_dependencies
 dev_dependencies = test_dependencies + lint_dependencies + docs_dependencies + [
     'python-dotenv',
     'ipdb',
@@ -45,6 +55,8 @@ setup(
     install_requires=application_dependencies,
     extras_require={
         'production': prod_dependencies,
+        'archive': archive_dependencies,
+        'gevent': gevent_dependencies,
         'test': test_dependencies,
         'lint': lint_dependencies,
         'docs': dev_dependencies,
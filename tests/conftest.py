@@ -4,6 +4,8 @@ import pytest
 
 from ledger import create_app
 from ledger.authorization.models import Token
+from ledger.app.balance_cache import balance_cache
+from ledger.authorization.utils import token_cache
 from ledger.database import db as _db
 
 
@@ -68,6 +70,8 @@ def db_session(db, request):
     session = db.create_scoped_session(options=options)
 
     db.session = session
+    token_cache.clear()
+    balance_cache.clear()
 
     token = Token(access_token="8ldi2lD")
     token.save()
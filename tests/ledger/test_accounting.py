@@ -1,9 +1,27 @@
+from datetime import date, datetime
 from decimal import Decimal
+from unittest.mock import patch
 
 import pytest
+import pytz
+from freezegun import freeze_time
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
 
-from ledger.app.accounting import Ledger, Balance
+from ledger.app import models
+from ledger.app.accounting import (
+    AccountStatement,
+    Balance,
+    IdempotencyKeyReused,
+    Ledger,
+    LedgerEntry,
+    Posting,
+    PostingKey,
+    Statement,
+)
 from ledger.app.accounting_types import TypeCode
+from ledger.app.cursors import HistoryCursor
+from ledger.database import db
 
 
 @pytest.mark.parametrize("type_code,type_str", [(TypeCode.CREDIT, "Credit"), (TypeCode.DEBIT, "Debit")])
@@ -24,3 +42,338 @@ def test_balance_is_updated(db_session):
     assert Balance.get_for_account(account_number) == Decimal("848.00")
     Ledger.add_entry(account_number=account_number, amount=Decimal("921.00"), type_code=TypeCode.CREDIT)
     assert Balance.get_for_account(account_number) == Decimal("1769.00")
+
+
+def test_add_entry_commits_once(db_session):
+    with patch.object(db.session, "commit") as mock_commit:
+        Ledger.add_entry(account_number="39209030", amount=Decimal("12.00"), type_code=TypeCode.CREDIT)
+    mock_commit.assert_called_once_with()
+
+
+def test_add_entry_sets_balance_on_entry(db_session):
+    account_number = "39209030"
+    Ledger.add_entry(account_number=account_number, amount=Decimal("100.00"), type_code=TypeCode.CREDIT)
+    entry = Ledger.add_entry(
+        account_number=account_number, amount=Decimal("30.50"), type_code=TypeCode.DEBIT
+    )
+    assert entry.balance == Decimal("69.50")
+
+
+def test_postgres_balance_upsert_is_a_single_statement():
+    statement = Balance._upsert_statement("39209030", Decimal("10.00"))
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert sql.startswith("INSERT INTO balance")
+    assert "ON CONFLICT (account_number) DO UPDATE SET balance = (balance.balance + excluded.balance)" in sql
+    assert "version = (balance.version + %(version_1)s)" in sql
+    assert sql.endswith("RETURNING balance.balance, balance.version")
+
+
+def test_postgres_balance_is_updated_with_upsert(db_session):
+    with patch("ledger.app.accounting.get_dialect_name", return_value="postgresql"), patch.object(
+        db.session, "execute"
+    ) as mock_execute:
+        mock_execute.return_value.first.return_value.balance = Decimal("25.00")
+        balance = Balance.update_balance("39209030", Decimal("10.00"))
+    assert balance == Decimal("25.00")
+    mock_execute.assert_called_once()
+
+
+def test_add_entries_returns_running_balance_per_entry(db_session):
+    Ledger.add_entry(account_number="11111111", amount=Decimal("50.00"), type_code=TypeCode.CREDIT)
+    entries = Ledger.add_entries(
+        [
+            Posting("11111111", Decimal("10.00"), TypeCode.DEBIT),
+            Posting("22222222", Decimal("20.00"), TypeCode.CREDIT),
+            Posting("11111111", Decimal("5.50"), TypeCode.CREDIT),
+            Posting("22222222", Decimal("30.00"), TypeCode.DEBIT),
+        ]
+    )
+    assert [entry.account_number for entry in entries] == ["11111111", "22222222", "11111111", "22222222"]
+    assert [entry.balance for entry in entries] == [
+        Decimal("40.00"),
+        Decimal("20.00"),
+        Decimal("45.50"),
+        Decimal("-10.00"),
+    ]
+    assert Balance.get_for_account("11111111") == Decimal("45.50")
+    assert Balance.get_for_account("22222222") == Decimal("-10.00")
+    assert len(Ledger.get_entries_for_account("11111111")) == 3
+    assert len(Ledger.get_entries_for_account("22222222")) == 2
+
+
+def test_add_entries_updates_each_balance_once(db_session):
+    postings = [Posting("11111111", Decimal("1.00"), TypeCode.CREDIT) for _ in range(5)]
+    with patch("ledger.app.accounting.Balance.update_balance", return_value=Decimal("5.00")) as mock_update:
+        Ledger.add_entries(postings)
+    mock_update.assert_called_once_with("11111111", Decimal("5.00"))
+
+
+def test_add_entries_commits_once(db_session):
+    postings = [
+        Posting("11111111", Decimal("1.00"), TypeCode.CREDIT),
+        Posting("22222222", Decimal("1.00"), TypeCode.DEBIT),
+    ]
+    with patch.object(db.session, "commit") as mock_commit:
+        Ledger.add_entries(postings)
+    mock_commit.assert_called_once_with()
+
+
+def test_add_entries_with_no_postings(db_session):
+    assert Ledger.add_entries([]) == []
+
+
+def test_transfer_moves_amount_between_accounts(db_session):
+    Ledger.add_entry("22222222", Decimal("50.00"), TypeCode.CREDIT)
+    debit, credit = Ledger.transfer("22222222", "11111111", Decimal("20.00"))
+    assert (debit.account_number, str(debit.accounting_type), debit.balance) == (
+        "22222222",
+        "Debit",
+        Decimal("30.00"),
+    )
+    assert (credit.account_number, str(credit.accounting_type), credit.balance) == (
+        "11111111",
+        "Credit",
+        Decimal("20.00"),
+    )
+    assert debit.transaction_id == credit.transaction_id
+    assert Balance.get_for_account("22222222", use_cache=False) == Decimal("30.00")
+    assert Balance.get_for_account("11111111", use_cache=False) == Decimal("20.00")
+    stored = Ledger.get_entries_for_account("22222222")[0], Ledger.get_entries_for_account("11111111")[0]
+    assert {entry.transaction_id for entry in stored} == {str(debit.transaction_id)}
+
+
+def test_transfer_commits_once(db_session):
+    with patch.object(db.session, "commit") as mock_commit:
+        Ledger.transfer("22222222", "11111111", Decimal("1.00"))
+    mock_commit.assert_called_once_with()
+
+
+def test_transfer_locks_balances_in_account_number_order(db_session):
+    with patch("ledger.app.accounting.Balance.update_balance", return_value=Decimal("0")) as mock_update:
+        Ledger.transfer("22222222", "11111111", Decimal("1.00"))
+    assert [call[0][0] for call in mock_update.call_args_list] == ["11111111", "22222222"]
+
+
+def test_entries_store_balance_after(db_session):
+    account_number = "39209030"
+    Ledger.add_entry(account_number=account_number, amount=Decimal("100.00"), type_code=TypeCode.CREDIT)
+    Ledger.add_entry(account_number=account_number, amount=Decimal("30.50"), type_code=TypeCode.DEBIT)
+    records = models.Ledger.query.filter_by(account_number=account_number).order_by(models.Ledger.id).all()
+    assert [record.balance_after for record in records] == [Decimal("100.00"), Decimal("69.50")]
+
+
+def test_backfill_balance_after(db_session):
+    account_number = "39209030"
+    # Records posted before balance_after existed.
+    for amount, accounting_type in [("10.00", "C"), ("2.50", "D"), ("4.00", "C")]:
+        record = models.Ledger(
+            account_number=account_number,
+            amount=Decimal(amount),
+            accounting_type=accounting_type,
+            created_at=datetime(2018, 1, 1),
+        )
+        db_session.add(record)
+    db_session.flush()
+    Balance.update_balance(account_number, Decimal("11.50"))
+    Ledger.add_entry(account_number=account_number, amount=Decimal("1.00"), type_code=TypeCode.DEBIT)
+
+    assert Ledger.backfill_balance_after(account_number) == 3
+    entries = Ledger.get_entries_for_account(account_number)
+    assert [entry.balance for entry in entries] == [
+        Decimal("10.50"),
+        Decimal("11.50"),
+        Decimal("7.50"),
+        Decimal("10.00"),
+    ]
+    assert Ledger.backfill_balance_after(account_number) == 0
+
+
+def test_ledger_entry_is_compact():
+    entry = LedgerEntry(account_number="39209030", amount=Decimal("1.00"), accounting_type=None)
+    assert not hasattr(entry, "__dict__")
+
+
+def test_balance_at_point_in_time(db_session):
+    account_number = "39209030"
+    for created_at, amount, type_code in [
+        ("2026-03-30 10:00:00", "100.00", TypeCode.CREDIT),
+        ("2026-03-31 23:59:00", "30.50", TypeCode.DEBIT),
+        ("2026-04-01 00:00:00", "5.00", TypeCode.CREDIT),
+    ]:
+        with freeze_time(created_at):
+            Ledger.add_entry(account_number=account_number, amount=Decimal(amount), type_code=type_code)
+    assert Balance.get_for_account_at(account_number, datetime(2026, 3, 30, tzinfo=pytz.UTC)) == 0
+    at = datetime(2026, 3, 31, 23, 59, tzinfo=pytz.UTC)
+    assert Balance.get_for_account_at(account_number, at) == Decimal("69.50")
+    # 2026-04-01 01:00 in Paris is 2026-03-31 23:00 UTC.
+    paris_time = pytz.timezone("Europe/Paris").localize(datetime(2026, 4, 1, 1, 0))
+    assert Balance.get_for_account_at(account_number, paris_time) == Decimal("100.00")
+    at = datetime(2027, 1, 1, tzinfo=pytz.UTC)
+    assert Balance.get_for_account_at(account_number, at) == Decimal("74.50")
+
+
+def test_balance_at_point_in_time_without_balance_after(db_session):
+    account_number = "39209030"
+    # Records posted before balance_after existed.
+    for amount, accounting_type in [("10.00", "C"), ("2.50", "D")]:
+        db_session.add(
+            models.Ledger(
+                account_number=account_number,
+                amount=Decimal(amount),
+                accounting_type=accounting_type,
+                created_at=datetime(2018, 1, 1),
+            )
+        )
+    db_session.flush()
+    at = datetime(2018, 1, 2, tzinfo=pytz.UTC)
+    assert Balance.get_for_account_at(account_number, at) == Decimal("7.50")
+
+
+def test_statements_are_updated_as_entries_are_posted(db_session):
+    account_number = "39209030"
+    with freeze_time("2026-03-31 10:00:00"):
+        Ledger.add_entries(
+            [
+                Posting(account_number, Decimal("100.00"), TypeCode.CREDIT),
+                Posting(account_number, Decimal("30.50"), TypeCode.DEBIT),
+            ]
+        )
+    with freeze_time("2026-03-31 11:00:00"):
+        Ledger.add_entry(account_number, Decimal("5.00"), TypeCode.CREDIT)
+    with freeze_time("2026-04-01 00:00:00"):
+        Ledger.add_entry(account_number, Decimal("4.50"), TypeCode.DEBIT)
+    march = AccountStatement(
+        account_number,
+        "month",
+        date(2026, 3, 1),
+        Decimal("0.00"),
+        Decimal("105.00"),
+        Decimal("30.50"),
+        3,
+        Decimal("74.50"),
+    )
+    april = AccountStatement(
+        account_number,
+        "month",
+        date(2026, 4, 1),
+        Decimal("74.50"),
+        Decimal("0.00"),
+        Decimal("4.50"),
+        1,
+        Decimal("70.00"),
+    )
+    assert Statement.get_for_account(account_number, "month") == [april, march]
+    assert Statement.get_for_account(account_number, "day") == [
+        april._replace(period="day"),
+        march._replace(period="day", period_start=date(2026, 3, 31)),
+    ]
+
+
+def test_rebuild_statements(db_session):
+    account_number = "39209030"
+    # Records posted before statements existed.
+    for created_at, amount, accounting_type in [
+        (datetime(2026, 3, 30), "10.00", "C"),
+        (datetime(2026, 3, 31), "2.50", "D"),
+        (datetime(2026, 4, 1), "4.00", "C"),
+    ]:
+        db_session.add(
+            models.Ledger(
+                account_number=account_number,
+                amount=Decimal(amount),
+                accounting_type=accounting_type,
+                created_at=created_at,
+            )
+        )
+    db_session.flush()
+    Balance.update_balance(account_number, Decimal("11.50"))
+
+    assert Ledger.rebuild_statements(account_number) == 5
+    statements = Statement.get_for_account(account_number, "month")
+    assert [(statement.opening_balance, statement.closing_balance) for statement in statements] == [
+        (Decimal("7.50"), Decimal("11.50")),
+        (Decimal("0.00"), Decimal("7.50")),
+    ]
+    assert len(Statement.get_for_account(account_number, "day")) == 3
+    # Rebuilding again replaces the statements.
+    assert Ledger.rebuild_statements(account_number) == 5
+    assert Statement.get_for_account(account_number, "month") == statements
+
+
+def test_entries_in_time_range(db_session):
+    account_number = "39209030"
+    for created_at, amount in [("2026-03-30 12:00:00", "10.00"), ("2026-03-31 12:00:00", "20.00")]:
+        with freeze_time(created_at):
+            Ledger.add_entry(account_number, Decimal(amount), TypeCode.CREDIT)
+    start = datetime(2026, 3, 31, tzinfo=pytz.UTC)
+    end = datetime(2026, 3, 31, 12, tzinfo=pytz.UTC)
+    assert [entry.balance for entry in Ledger.get_entries_for_account(account_number, start=start)] == [
+        Decimal("30.00")
+    ]
+    assert [entry.balance for entry in Ledger.get_entries_for_account(account_number, end=end)] == [
+        Decimal("10.00")
+    ]
+    assert Ledger.get_entries_for_account(account_number, start=start, end=end) == []
+
+
+def test_add_entry_with_idempotency_key_posts_once(db_session):
+    account_number = "39209030"
+    entry = Ledger.add_entry(account_number, Decimal("10.00"), TypeCode.CREDIT, idempotency_key="retry-1")
+    replayed = Ledger.add_entry(account_number, Decimal("10.0"), TypeCode.CREDIT, idempotency_key="retry-1")
+    assert str(replayed.transaction_id) == str(entry.transaction_id)
+    assert replayed.created_at == entry.created_at.replace(tzinfo=pytz.UTC)
+    assert replayed.balance == Decimal("10.00")
+    assert Balance.get_for_account(account_number) == Decimal("10.00")
+    assert len(Ledger.get_entries_for_account(account_number)) == 1
+
+
+@pytest.mark.parametrize(
+    "account_number,amount,type_code",
+    [
+        ("39209031", Decimal("10.00"), TypeCode.CREDIT),
+        ("39209030", Decimal("10.01"), TypeCode.CREDIT),
+        ("39209030", Decimal("10.00"), TypeCode.DEBIT),
+    ],
+)
+def test_idempotency_key_reused_for_different_posting(db_session, account_number, amount, type_code):
+    Ledger.add_entry("39209030", Decimal("10.00"), TypeCode.CREDIT, idempotency_key="retry-1")
+    with pytest.raises(IdempotencyKeyReused):
+        Ledger.add_entry(account_number, amount, type_code, idempotency_key="retry-1")
+
+
+def test_idempotency_key_posted_concurrently(db_session):
+    entry = LedgerEntry("39209030", Decimal("10.00"), None)
+    duplicate_key = IntegrityError("INSERT INTO posting_key", {}, Exception())
+    with patch.object(PostingKey, "get_entry", side_effect=[None, entry]), patch.object(
+        PostingKey, "store", side_effect=duplicate_key
+    ), patch.object(db.session, "rollback") as mock_rollback:
+        result = Ledger.add_entry("39209030", Decimal("10.00"), TypeCode.CREDIT, idempotency_key="retry-1")
+    mock_rollback.assert_called_once_with()
+    assert result is entry
+
+
+def test_integrity_error_without_stored_key_is_raised(db_session):
+    error = IntegrityError("INSERT INTO balance", {}, Exception())
+    with patch.object(PostingKey, "get_entry", return_value=None), patch.object(
+        PostingKey, "store", side_effect=error
+    ), patch.object(db.session, "rollback"):
+        with pytest.raises(IntegrityError):
+            Ledger.add_entry("39209030", Decimal("10.00"), TypeCode.CREDIT, idempotency_key="retry-1")
+
+
+def test_history_after_cursor_is_bounded_by_creation_time(db_session):
+    account_number = "39209030"
+    with freeze_time("2026-04-01 00:00:00"):
+        Ledger.add_entry(account_number, Decimal("10.00"), TypeCode.CREDIT)
+    with freeze_time("2026-03-31 23:59:59"):
+        # Stored after the entry above although created just before it.
+        Ledger.add_entry(account_number, Decimal("20.00"), TypeCode.CREDIT)
+    with freeze_time("2026-03-30 00:00:00"):
+        Ledger.add_entry(account_number, Decimal("30.00"), TypeCode.CREDIT)
+    newest = Ledger.get_entries_for_account_with_limit(account_number, 2)[-1]
+    cursor = HistoryCursor.following(newest)
+    assert [entry.amount for entry in Ledger.get_entries_for_account(account_number, cursor)] == [
+        Decimal("10.00")
+    ]
+    query = str(Ledger._query_for_account(account_number, cursor).compile(dialect=postgresql.dialect()))
+    assert "ledger.created_at <= %(created_at_1)s" in query
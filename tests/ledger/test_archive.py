@@ -0,0 +1,265 @@
+import sys
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+import pytz
+from freezegun import freeze_time
+
+from ledger.app import archive, models
+from ledger.app.accounting import Balance, Ledger, Statement
+from ledger.app.accounting_types import TypeCode
+from ledger.app.commands import archive_ledger
+from ledger.app.cursors import HistoryCursor
+from ledger.database import db
+
+
+CUTOFF = datetime(2026, 2, 1, tzinfo=pytz.UTC)
+
+
+@pytest.fixture
+def archive_path(app, tmp_path):
+    with patch.dict(app.config, {"ARCHIVE_PATH": str(tmp_path)}):
+        yield tmp_path
+
+
+def post(account_number, amount, type_code, created_at):
+    with freeze_time(created_at):
+        Ledger.add_entry(account_number, Decimal(amount), type_code)
+
+
+@pytest.fixture
+def history(db_session, archive_path):
+    """Two archived and two stored entries of the account 11111111, oldest first."""
+    post("11111111", "10.00", TypeCode.CREDIT, "2026-01-10 12:00:00")
+    post("11111111", "3.00", TypeCode.DEBIT, "2026-01-20 12:00:00")
+    post("11111111", "5.00", TypeCode.CREDIT, "2026-02-10 12:00:00")
+    post("11111111", "1.00", TypeCode.CREDIT, "2026-02-20 12:00:00")
+    entries = Ledger.get_entries_for_account("11111111")[::-1]
+    assert Ledger.archive_entries(["11111111"], CUTOFF) == 2
+    return entries
+
+
+def make_record(record_id, account_number="11111111", balance_after="1.00"):
+    return archive.ArchivedRecord(
+        id=record_id,
+        account_number=account_number,
+        amount=Decimal("1.00"),
+        accounting_type="C",
+        transaction_id=f"transaction-{record_id}",
+        created_at=datetime(2026, 1, 1, 12, 0, record_id),
+        balance_after=Decimal(balance_after),
+    )
+
+
+def summary_for(last_id):
+    return archive.ArchiveSummary(last_id, None, last_id, Decimal("0"))
+
+
+def test_archive_is_disabled_without_path(app):
+    assert not archive.is_enabled()
+    with pytest.raises(archive.ArchiveUnavailable):
+        archive.write_records([make_record(1)])
+
+
+def test_archive_needs_pyarrow(archive_path):
+    with patch.dict(sys.modules, {"pyarrow": None}):
+        with pytest.raises(archive.ArchiveUnavailable):
+            archive.write_records([make_record(1)])
+
+
+def test_accounts_are_bucketed(app, archive_path):
+    with patch.dict(app.config, {"ARCHIVE_BUCKETS": 8}):
+        bucket = archive.get_bucket("11111111")
+        assert 0 <= bucket < 8
+        assert archive.get_bucket_path(bucket) == str(archive_path / f"bucket={bucket:03d}")
+
+
+def test_write_and_read_records(archive_path):
+    records = [make_record(1), make_record(2, "22222222"), make_record(3)]
+    with patch("ledger.app.archive.get_bucket", return_value=5):
+        path = archive.write_records(records)
+
+        assert path == str(archive_path / "bucket=005" / "ledger-1-3.parquet")
+        assert archive.read_records("11111111", summary_for(3)) == [records[0], records[2]]
+        # Records newer than the summary were written by a run that didn't commit.
+        assert archive.read_records("11111111", summary_for(2)) == [records[0]]
+
+
+def test_records_written_again_are_read_once(archive_path):
+    archive.write_records([make_record(1), make_record(2)])
+    archive.write_records([make_record(2), make_record(3)])
+
+    assert [record.id for record in archive.read_records("11111111", summary_for(3))] == [1, 2, 3]
+
+
+def test_times_are_archived_in_utc(archive_path):
+    created_at = pytz.timezone("Europe/Berlin").localize(datetime(2026, 1, 1, 13))
+    archive.write_records([make_record(1)._replace(created_at=created_at)])
+
+    assert archive.read_records("11111111", summary_for(1))[0].created_at == datetime(2026, 1, 1, 12)
+
+
+def test_read_records_without_archive_files(archive_path):
+    assert archive.read_records("11111111", summary_for(3)) == []
+
+
+def test_add_to_summary(db_session, archive_path):
+    assert archive.get_summary("11111111") is None
+
+    archive.add_to_summary("11111111", [make_record(1, balance_after="1.00"), make_record(2)])
+    archive.add_to_summary("11111111", [make_record(5, balance_after="7.00")])
+
+    assert archive.get_summary("11111111") == archive.ArchiveSummary(
+        last_id=5, last_created_at=datetime(2026, 1, 1, 12, 0, 5), entry_count=3, balance=Decimal("7.00")
+    )
+
+
+def test_archive_entries(history):
+    stored = db.session.query(models.Ledger).filter_by(account_number="11111111").all()
+    assert [record.id for record in stored] == [history[2].id, history[3].id]
+    summary = archive.get_summary("11111111")
+    assert summary.last_id == history[1].id
+    assert summary.entry_count == 2
+    assert summary.balance == Decimal("7.00")
+
+
+def test_archive_entries_deletes_only_archived_records(db_session, archive_path):
+    post("11111111", "10.00", TypeCode.CREDIT, "2026-01-10 12:00:00")
+    post("11111111", "3.00", TypeCode.DEBIT, "2026-01-20 12:00:00")
+    post("11111111", "5.00", TypeCode.CREDIT, "2026-02-10 12:00:00")
+    written = []
+
+    def write_records(records):
+        # A posting of the archived period committed after the records were read isn't archived, so it
+        # must not be deleted.
+        written.extend(records)
+        post("11111111", "1.00", TypeCode.CREDIT, "2026-01-30 12:00:00")
+
+    with patch.object(Ledger, "ARCHIVE_DELETE_BATCH_SIZE", 1), patch(
+        "ledger.app.archive.write_records", side_effect=write_records
+    ):
+        assert Ledger.archive_entries(["11111111"], CUTOFF) == 2
+
+    stored = models.Ledger.query.order_by(models.Ledger.id).all()
+    assert [record.amount for record in stored] == [Decimal("5.00"), Decimal("1.00")]
+    assert len(written) == 2
+
+
+def test_archive_entries_without_old_records(db_session, archive_path):
+    post("11111111", "10.00", TypeCode.CREDIT, "2026-02-10 12:00:00")
+
+    assert Ledger.archive_entries(["11111111"], CUTOFF) == 0
+    assert archive.get_summary("11111111") is None
+
+
+def test_history_includes_archived_entries(history):
+    entries = Ledger.get_entries_for_account("11111111")
+
+    assert [entry.id for entry in entries] == [entry.id for entry in reversed(history)]
+    assert [entry.balance for entry in entries] == [
+        Decimal("13.00"),
+        Decimal("12.00"),
+        Decimal("7.00"),
+        Decimal("10.00"),
+    ]
+    assert entries[3].created_at == datetime(2026, 1, 10, 12, tzinfo=pytz.UTC)
+
+
+def test_history_page_reads_archive_when_reaching_past_it(history):
+    with patch("ledger.app.archive.read_records") as read_records:
+        entries = Ledger.get_entries_for_account_with_limit("11111111", 2)
+    assert [entry.id for entry in entries] == [history[3].id, history[2].id]
+    read_records.assert_not_called()
+
+    cursor = HistoryCursor.following(entries[-1])
+    entries = Ledger.get_entries_for_account_with_limit("11111111", 1, cursor)
+    assert [entry.id for entry in entries] == [history[1].id]
+
+
+def test_history_range_includes_archived_entries(history):
+    entries = Ledger.get_entries_for_account(
+        "11111111", start=datetime(2026, 1, 15, tzinfo=pytz.UTC), end=datetime(2026, 2, 15, tzinfo=pytz.UTC)
+    )
+
+    assert [entry.id for entry in entries] == [history[2].id, history[1].id]
+
+
+def test_iter_history_includes_archived_entries(history):
+    entries = Ledger.iter_entries_for_account("11111111")
+
+    assert [entry.id for entry in entries] == [entry.id for entry in reversed(history)]
+
+
+def test_balance_at_time_of_archived_entries(history):
+    assert Balance.get_for_account_at("11111111", datetime(2026, 1, 15, tzinfo=pytz.UTC)) == Decimal("10.00")
+    assert Balance.get_for_account_at("11111111", datetime(2026, 1, 5, tzinfo=pytz.UTC)) == Decimal("0")
+    assert Balance.get_for_account_at("22222222", datetime(2026, 1, 5, tzinfo=pytz.UTC)) == Decimal("0")
+
+
+def test_balance_at_sums_unbackfilled_entries_after_archive(history):
+    db.session.execute(models.Ledger.__table__.update().values(balance_after=None))
+
+    balance = Balance.get_for_account_at("11111111", datetime(2026, 2, 15, tzinfo=pytz.UTC))
+
+    assert balance == Decimal("12.00")
+
+
+def test_backfill_continues_from_archived_balance(history):
+    db.session.execute(models.Ledger.__table__.update().values(balance_after=None))
+
+    assert Ledger.backfill_balance_after("11111111") == 2
+    assert [entry.balance for entry in Ledger.get_entries_for_account("11111111")][:2] == [
+        Decimal("13.00"),
+        Decimal("12.00"),
+    ]
+
+
+def test_rebuild_statements_includes_archived_entries(history):
+    db.session.execute(models.Statement.__table__.delete())
+
+    assert Ledger.rebuild_statements("11111111") == 6
+    statements = Statement.get_for_account("11111111", "month")
+    assert [(statement.opening_balance, statement.closing_balance) for statement in statements] == [
+        (Decimal("7.00"), Decimal("13.00")),
+        (Decimal("0"), Decimal("7.00")),
+    ]
+
+
+def test_archive_command(db_session, app, archive_path):
+    post("11111111", "10.00", TypeCode.CREDIT, "2026-01-10 12:00:00")
+    post("22222222", "2.50", TypeCode.DEBIT, "2026-01-20 12:00:00")
+    post("22222222", "1.00", TypeCode.CREDIT, "2026-02-10 12:00:00")
+
+    result = app.test_cli_runner().invoke(archive_ledger, ["--before", "2026-02-01"])
+
+    assert result.exit_code == 0
+    assert result.output == "Archived 2 ledger records from 2 accounts.\n"
+    assert archive.get_summary("22222222").balance == Decimal("-2.50")
+
+
+@pytest.mark.parametrize("created_before", ["2026-10-17", "2026-10-18", "2026-12-01"])
+def test_archive_command_rejects_recent_dates(db_session, app, archive_path, created_before):
+    with freeze_time("2026-10-17 12:00:00"):
+        result = app.test_cli_runner().invoke(archive_ledger, ["--before", created_before])
+
+    assert result.exit_code == 1
+    assert "--before must be at least a day in the past." in result.output
+
+
+def test_archive_command_without_path(db_session, app):
+    result = app.test_cli_runner().invoke(archive_ledger, ["--before", "2026-02-01"])
+
+    assert result.exit_code == 1
+    assert "ARCHIVE_PATH is not configured." in result.output
+
+
+def test_archive_command_without_pyarrow(db_session, app, archive_path):
+    post("11111111", "10.00", TypeCode.CREDIT, "2026-01-10 12:00:00")
+
+    with patch.dict(sys.modules, {"pyarrow": None}):
+        result = app.test_cli_runner().invoke(archive_ledger, ["--before", "2026-02-01"])
+
+    assert result.exit_code == 1
+    assert "pip install ledger[archive]" in result.output
@@ -0,0 +1,227 @@
+from collections import OrderedDict
+from unittest.mock import patch
+
+import pytest
+
+from ledger.app.metrics import registry
+from ledger.authorization.models import Token
+from ledger.authorization.signing import InvalidSignedToken, TokenSigner, is_signed_token, token_signer
+from ledger.authorization.utils import TokenCache, revoke_token, token_cache, token_is_valid
+
+
+class TestTokenCache:
+    def test_missing_token_is_a_miss(self):
+        cache = TokenCache()
+        assert cache.get("foo") is None
+        assert (cache.hits, cache.misses) == (0, 1)
+
+    def test_cached_results_are_hits(self):
+        cache = TokenCache()
+        cache.set("valid", True)
+        cache.set("invalid", False)
+        assert cache.get("valid") is True
+        assert cache.get("invalid") is False
+        assert (cache.hits, cache.misses) == (2, 0)
+
+    def test_lookups_are_exported_as_metrics(self):
+        def requests(result):
+            return registry.get_sample_value("ledger_token_cache_requests_total", {"result": result}) or 0
+
+        hits, misses = requests("hit"), requests("miss")
+        cache = TokenCache()
+        cache.set("valid", True)
+        cache.get("valid")
+        cache.get("missing")
+        assert requests("hit") == hits + 1
+        assert requests("miss") == misses + 1
+
+    def test_results_expire(self):
+        cache = TokenCache(ttl=60, negative_ttl=5)
+        with patch("ledger.authorization.utils.time.monotonic", return_value=100):
+            cache.set("valid", True)
+            cache.set("invalid", False)
+        with patch("ledger.authorization.utils.time.monotonic", return_value=106):
+            assert cache.get("valid") is True
+            assert cache.get("invalid") is None
+        with patch("ledger.authorization.utils.time.monotonic", return_value=161):
+            assert cache.get("valid") is None
+
+    def test_least_recently_used_token_is_evicted(self):
+        cache = TokenCache(size=2)
+        cache.set("one", True)
+        cache.set("two", True)
+        cache.get("one")
+        cache.set("three", True)
+        assert len(cache) == 2
+        assert cache.get("two") is None
+        assert cache.get("one") is True
+        assert cache.get("three") is True
+
+    def test_zero_size_disables_cache(self):
+        cache = TokenCache(size=0)
+        cache.set("valid", True)
+        assert cache.get("valid") is None
+
+    def test_invalidate(self):
+        cache = TokenCache()
+        cache.set("valid", True)
+        cache.invalidate("valid")
+        cache.invalidate("not-cached")
+        assert cache.get("valid") is None
+
+    def test_clear_resets_counters(self):
+        cache = TokenCache()
+        cache.set("valid", True)
+        cache.get("valid")
+        cache.clear()
+        assert len(cache) == 0
+        assert (cache.hits, cache.misses) == (0, 0)
+
+    def test_configured_from_app(self, app):
+        assert token_cache.size == app.config["TOKEN_CACHE_SIZE"]
+        assert token_cache.ttl == app.config["TOKEN_CACHE_TTL"]
+        assert token_cache.negative_ttl == app.config["TOKEN_CACHE_NEGATIVE_TTL"]
+
+
+class TestTokenIsValid:
+    def test_repeated_validation_is_served_from_cache(self, db_session):
+        assert token_is_valid("8ldi2lD") is True
+        assert token_is_valid("does-not-exist") is False
+        with patch("ledger.authorization.utils.db.session.query") as mock_query:
+            assert token_is_valid("8ldi2lD") is True
+            assert token_is_valid("does-not-exist") is False
+        mock_query.assert_not_called()
+        assert (token_cache.hits, token_cache.misses) == (2, 2)
+
+    def test_new_token_invalidates_cached_result(self, db_session):
+        assert token_is_valid("new-token") is False
+        Token(access_token="new-token").save()
+        assert token_is_valid("new-token") is True
+
+    def test_deleted_token_invalidates_cached_result(self, db_session):
+        token = Token(access_token="revoked-token")
+        token.save()
+        assert token_is_valid("revoked-token") is True
+        db_session.delete(token)
+        db_session.commit()
+        assert token_is_valid("revoked-token") is False
+
+
+@pytest.fixture
+def signer():
+    """Enable signed tokens with two keys, new tokens are signed with 'new'."""
+    with patch.object(token_signer, "enabled", True), patch.object(
+        token_signer, "keys", OrderedDict([("new", "new-secret"), ("old", "old-secret")])
+    ):
+        yield token_signer
+
+
+class TestTokenSigner:
+    def test_issued_token_is_verified(self, signer):
+        token = signer.issue(expires_in=60, claims={"sub": "merchant-1"})
+        assert is_signed_token(token)
+        assert token.startswith("v1.new.")
+        claims = signer.verify(token)
+        assert claims["sub"] == "merchant-1"
+        assert claims["exp"] - claims["iat"] == 60
+        assert "jti" in claims
+
+    def test_token_signed_with_old_key_is_verified(self, signer):
+        old_signer = TokenSigner(keys={"old": "old-secret"})
+        token = old_signer.issue(expires_in=60)
+        assert signer.verify(token)["jti"]
+
+    def test_expired_token_is_rejected(self, signer):
+        with patch("ledger.authorization.signing.time.time", return_value=1000):
+            token = signer.issue(expires_in=60)
+        with patch("ledger.authorization.signing.time.time", return_value=1060):
+            with pytest.raises(InvalidSignedToken):
+                signer.verify(token)
+
+    def test_tampered_token_is_rejected(self, signer):
+        token = signer.issue(expires_in=60, claims={"sub": "merchant-1"})
+        prefix, key_id, claims, signature = token.split(".")
+        forged_claims = claims[:-2] + ("AA" if claims[-2:] != "AA" else "BB")
+        with pytest.raises(InvalidSignedToken):
+            signer.verify(".".join([prefix, key_id, forged_claims, signature]))
+
+    @pytest.mark.parametrize("token", ["v1.new.abc", "v2.new.abc.def", "v1.unknown.abc.def"])
+    def test_malformed_token_is_rejected(self, signer, token):
+        with pytest.raises(InvalidSignedToken):
+            signer.verify(token)
+
+    def test_undecodable_claims_are_rejected(self, signer):
+        signing_input = "v1.new.bm90LWpzb24"
+        token = f"{signing_input}.{signer._sign('new-secret', signing_input)}"
+        with pytest.raises(InvalidSignedToken):
+            signer.verify(token)
+
+    def test_parse_keys(self):
+        keys = TokenSigner.parse_keys(" new:secret-1, old:secret:2,")
+        assert list(keys.items()) == [("new", "secret-1"), ("old", "secret:2")]
+
+    @pytest.mark.parametrize("value", ["no-secret", ":secret", "key.id:secret"])
+    def test_parse_invalid_keys(self, value):
+        with pytest.raises(ValueError):
+            TokenSigner.parse_keys(value)
+
+    def test_enabled_without_keys_raises_error(self, app):
+        signer = TokenSigner()
+        config = {"SIGNED_TOKENS_ENABLED": True, "SIGNED_TOKEN_KEYS": ""}
+        with patch.dict(app.config, config), pytest.raises(ValueError):
+            signer.init_app(app)
+
+    def test_configured_from_app(self, app):
+        signer = TokenSigner()
+        config = {"SIGNED_TOKENS_ENABLED": True, "SIGNED_TOKEN_KEYS": "new:secret"}
+        with patch.dict(app.config, config):
+            signer.init_app(app)
+        assert signer.enabled is True
+        assert signer.keys == {"new": "secret"}
+
+
+class TestSignedTokenIsValid:
+    def test_signed_token_is_valid_without_revocation_check(self, app, db_session, signer):
+        token = signer.issue(expires_in=60)
+        with patch.dict(app.config, {"SIGNED_TOKEN_CHECK_REVOCATION": False}), patch(
+            "ledger.authorization.utils.db.session.query"
+        ) as mock_query:
+            assert token_is_valid(token) is True
+        mock_query.assert_not_called()
+
+    def test_revocation_check_is_cached(self, db_session, signer):
+        token = signer.issue(expires_in=60)
+        assert token_is_valid(token) is True
+        with patch("ledger.authorization.utils.db.session.query") as mock_query:
+            assert token_is_valid(token) is True
+        mock_query.assert_not_called()
+
+    def test_invalid_signed_token_is_not_valid(self, db_session, signer):
+        assert token_is_valid("v1.new.abc.def") is False
+
+    def test_revoked_signed_token_is_not_valid(self, db_session, signer):
+        token = signer.issue(expires_in=60)
+        assert token_is_valid(token) is True
+        revoke_token(token)
+        assert token_is_valid(token) is False
+
+    def test_token_id_is_not_accepted_as_stored_token(self, db_session, signer):
+        token = signer.issue(expires_in=60)
+        token_id = signer.verify(token)["jti"]
+        assert token_is_valid(token) is True
+        assert token_is_valid(token_id) is False
+
+    def test_token_id_looked_up_as_stored_token_does_not_revoke_signed_token(self, db_session, signer):
+        token = signer.issue(expires_in=60)
+        assert token_is_valid(signer.verify(token)["jti"]) is False
+        assert token_is_valid(token) is True
+
+    def test_signed_tokens_are_not_accepted_when_disabled(self, db_session, signer):
+        token = signer.issue(expires_in=60)
+        with patch.object(token_signer, "enabled", False):
+            assert token_is_valid(token) is False
+
+    def test_revoked_stored_token_is_not_valid(self, db_session):
+        assert token_is_valid("8ldi2lD") is True
+        revoke_token("8ldi2lD")
+        assert token_is_valid("8ldi2lD") is False
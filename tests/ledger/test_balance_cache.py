@@ -0,0 +1,154 @@
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from ledger.app.accounting import Balance, Ledger
+from ledger.app.accounting_types import TypeCode
+from ledger.app.balance_cache import STAGED_BALANCES, BalanceCache, balance_cache, discard_staged_balances
+from ledger.app.metrics import registry
+from ledger.app.replicas import ConsistencyToken
+
+
+AUTHORIZATION = {"Authorization": "Token 8ldi2lD"}
+
+
+@pytest.fixture
+def enabled_cache():
+    with patch.object(balance_cache, "size", 100):
+        yield balance_cache
+    balance_cache.clear()
+
+
+def test_init_app_reads_config(app):
+    cache = BalanceCache(size=5, ttl=10)
+    cache.init_app(app)
+    assert cache.size == 0
+    assert cache.ttl == 1
+
+
+def test_disabled_cache_stores_nothing():
+    cache = BalanceCache(size=0)
+    cache.set("11111111", Decimal("1.00"), 1)
+    assert cache.get("11111111") is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_balance_is_evicted():
+    cache = BalanceCache(size=2)
+    cache.set("1", Decimal("1.00"), 1)
+    cache.set("2", Decimal("2.00"), 1)
+    cache.get("1")
+    cache.set("3", Decimal("3.00"), 1)
+    assert cache.get("2") is None
+    assert cache.get("1") == Decimal("1.00")
+    assert cache.get("3") == Decimal("3.00")
+
+
+def test_balances_expire():
+    cache = BalanceCache(size=10, ttl=1)
+    with patch("ledger.app.balance_cache.time.monotonic", return_value=100):
+        cache.set("1", Decimal("1.00"), 1)
+    with patch("ledger.app.balance_cache.time.monotonic", return_value=100.5):
+        assert cache.get("1") == Decimal("1.00")
+    with patch("ledger.app.balance_cache.time.monotonic", return_value=101):
+        assert cache.get("1") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_older_version_does_not_replace_newer():
+    cache = BalanceCache(size=10)
+    cache.set("1", Decimal("5.00"), 3)
+    cache.set("1", Decimal("4.00"), 2)
+    assert cache.get("1") == Decimal("5.00")
+    cache.set("1", Decimal("6.00"), 4)
+    assert cache.get("1") == Decimal("6.00")
+
+
+def test_balance_at_other_version_is_a_miss():
+    cache = BalanceCache(size=10)
+    cache.set("1", Decimal("5.00"), 3)
+    assert cache.get_with_version("1", 3) == (Decimal("5.00"), 3)
+    assert cache.get_with_version("1", 4) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_committed_balances_are_written_through(db_session, enabled_cache):
+    Ledger.add_entry("11111111", Decimal("10.00"), TypeCode.CREDIT)
+    Ledger.add_entry("11111111", Decimal("4.00"), TypeCode.DEBIT)
+
+    with patch("ledger.app.accounting.Balance._get_or_create_record") as get_record:
+        assert Balance.get_for_account("11111111") == Decimal("6.00")
+    get_record.assert_not_called()
+
+
+def test_balances_of_rolled_back_transactions_are_discarded():
+    session = MagicMock(info={STAGED_BALANCES: {"11111111": (Decimal("1.00"), 1)}})
+    discard_staged_balances(session)
+    assert session.info == {}
+
+
+def test_balance_read_from_database_is_cached(db_session, enabled_cache):
+    Balance.update_balance("11111111", Decimal("3.00"))
+    Balance.update_balance("11111111", Decimal("2.00"))
+    db_session.commit()
+    balance_cache.clear()
+
+    assert Balance.get_for_account("11111111") == Decimal("5.00")
+    assert len(balance_cache) == 1
+    assert balance_cache._entries["11111111"][1] == 2
+
+
+def test_balance_posted_by_another_worker_is_read_from_database(db_session, enabled_cache):
+    Balance.update_balance("11111111", Decimal("3.00"))
+    db_session.commit()
+    # Another worker posts, so this worker's cache has the previous version.
+    with patch.object(balance_cache, "size", 0):
+        Balance.update_balance("11111111", Decimal("2.00"))
+        db_session.commit()
+
+    assert balance_cache._entries["11111111"][1] == 1
+    assert Balance.get_for_account_with_version("11111111") == (Decimal("5.00"), 2)
+    assert balance_cache._entries["11111111"][1] == 2
+
+
+def test_balance_can_bypass_cache(db_session, enabled_cache):
+    balance_cache.set("11111111", Decimal("99.00"), 100)
+
+    assert Balance.get_for_account("11111111", use_cache=False) == Decimal("0")
+
+
+def test_cache_metrics(db_session, enabled_cache):
+    def requests(result):
+        return registry.get_sample_value("ledger_balance_cache_requests_total", {"result": result}) or 0
+
+    hits, misses = requests("hit"), requests("miss")
+    ages = registry.get_sample_value("ledger_balance_cache_age_seconds_count") or 0
+
+    Balance.get_for_account("11111111")
+    Balance.get_for_account("11111111")
+
+    assert requests("miss") == misses + 1
+    assert requests("hit") == hits + 1
+    assert registry.get_sample_value("ledger_balance_cache_age_seconds_count") == ages + 1
+
+
+def test_balance_view_serves_cached_balance(db_session, client, enabled_cache):
+    Balance.update_balance("11111111", Decimal("3.00"))
+    db_session.commit()
+    balance_cache.set("11111111", Decimal("7.00"), 1)
+
+    response = client.get("/account/11111111/balance", headers=AUTHORIZATION)
+
+    assert response.json == {"balance": "7.00"}
+
+
+def test_balance_view_with_consistency_token_bypasses_cache(db_session, client, enabled_cache):
+    entry = Ledger.add_entry("11111111", Decimal("10.00"), TypeCode.CREDIT)
+    balance_cache.set("11111111", Decimal("7.00"), 100)
+    token = ConsistencyToken.for_entry(entry).encode()
+
+    headers = {"X-Consistency-Token": token, **AUTHORIZATION}
+    response = client.get("/account/11111111/balance", headers=headers)
+
+    assert response.json == {"balance": "10.00"}
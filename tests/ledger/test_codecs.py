@@ -0,0 +1,138 @@
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
+
+import pytest
+import pytz
+from marshmallow import ValidationError
+
+from ledger.app.accounting import LedgerEntry
+from ledger.app.accounting_types import credit_type, debit_type
+from ledger.app.codecs import (
+    dump_balance,
+    dump_ledger_entries,
+    dump_ledger_entry,
+    load_credit,
+    load_debit,
+    load_timestamp,
+)
+from ledger.app.schemas import balance_schema, credit_schema, debit_schema, ledger_entry_schema
+
+
+LEDGER_ENTRIES = [
+    LedgerEntry(
+        account_number="12345678",
+        accounting_type=credit_type,
+        amount=Decimal("1283.92"),
+        created_at=datetime(2018, 1, 1),
+        transaction_id=UUID("07831682-8a29-4176-a50d-8e69b9c5c5db"),
+        balance=Decimal("-20.00"),
+    ),
+    LedgerEntry(
+        account_number="399383902",
+        accounting_type=debit_type,
+        amount=Decimal("827.81"),
+        created_at=datetime(2018, 3, 4, 12, 43, 22, 829_312, tzinfo=pytz.utc),
+        transaction_id="D6AA3369-08AF-47BE-ABA3-D1969C0DF138",
+        balance=Decimal("190.00"),
+    ),
+    LedgerEntry(
+        account_number="399383902",
+        accounting_type=debit_type,
+        amount=Decimal("827.81"),
+        created_at=pytz.timezone("Europe/London").localize(datetime(2018, 6, 1, 9, 30)),
+    ),
+]
+
+
+@pytest.mark.parametrize("entry", LEDGER_ENTRIES)
+def test_dump_ledger_entry_matches_schema(entry):
+    assert dump_ledger_entry(entry) == ledger_entry_schema.dump(entry).data
+
+
+def test_dump_ledger_entries_matches_schema():
+    assert dump_ledger_entries(LEDGER_ENTRIES) == ledger_entry_schema.dump(LEDGER_ENTRIES, many=True).data
+
+
+@pytest.mark.parametrize("balance", [Decimal("8382.29"), Decimal("-0.10"), None])
+def test_dump_balance_matches_schema(balance):
+    assert dump_balance(balance) == balance_schema.dump({"balance": balance}).data
+
+
+TRANSACTION_REQUESTS = [
+    {"accountNumber": "93929393", "{amount}": "120.32"},
+    {"accountNumber": "93929393", "{amount}": 120.32},
+    {"accountNumber": "93929393", "{amount}": 120},
+    {"accountNumber": "93929393", "{amount}": "120.32", "additionalField": "value"},
+    {},
+    {"{amount}": "383.20"},
+    {"accountNumber": "93929393"},
+    {"accountNumber": None, "{amount}": None},
+    {"accountNumber": 93929393, "{amount}": "foo"},
+    {"accountNumber": [], "{amount}": True},
+    {"accountNumber": "93929393", "{amount}": "NaN"},
+    {"accountNumber": "93929393", "{amount}": "-Infinity"},
+    ["accountNumber"],
+    "93929393",
+]
+
+
+def _request_for(data, amount_field):
+    if not isinstance(data, dict):
+        return data
+    return {amount_field if key == "{amount}" else key: value for key, value in data.items()}
+
+
+def _schema_result(schema, data):
+    try:
+        return schema.load(data).data
+    except ValidationError as exception:
+        return exception.messages
+
+
+def _codec_result(load, data):
+    try:
+        return load(data)
+    except ValidationError as exception:
+        return exception.messages
+
+
+@pytest.mark.parametrize("data", TRANSACTION_REQUESTS)
+@pytest.mark.parametrize(
+    "load,schema,amount_field",
+    [(load_credit, credit_schema, "creditAmount"), (load_debit, debit_schema, "debitAmount")],
+)
+def test_load_transaction_matches_schema(data, load, schema, amount_field):
+    data = _request_for(data, amount_field)
+    assert _codec_result(load, data) == _schema_result(schema, data)
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        ("2026-03-31", datetime(2026, 3, 31, tzinfo=pytz.UTC)),
+        ("2026-03-31T23:59", datetime(2026, 3, 31, 23, 59, tzinfo=pytz.UTC)),
+        ("2026-03-31T23:59:59.5Z", datetime(2026, 3, 31, 23, 59, 59, 500000, tzinfo=pytz.UTC)),
+        ("2026-03-31T23:59:00+02:00", datetime(2026, 3, 31, 21, 59, tzinfo=pytz.UTC)),
+        ("2026-03-31 23:59:00-0130", datetime(2026, 4, 1, 1, 29, tzinfo=pytz.UTC)),
+    ],
+)
+def test_load_timestamp(value, expected):
+    assert load_timestamp(value) == expected
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "yesterday",
+        "2026-03-31T",
+        "2026-13-01",
+        "2026-03-31T25:00",
+        "2026-03-31Z",
+        "9999-12-31T23:59:00-05:00",
+        "0001-01-01T00:30:00+01:00",
+    ],
+)
+def test_load_timestamp_rejects_invalid_values(value):
+    with pytest.raises(ValueError):
+        load_timestamp(value)
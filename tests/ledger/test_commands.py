@@ -0,0 +1,131 @@
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+from freezegun import freeze_time
+
+from ledger.app import models
+from ledger.app.accounting import Ledger, Statement
+from ledger.app.accounting_types import TypeCode
+from ledger.app.commands import backfill_balance_after, create_partitions, rebuild_statements
+from ledger.app.partitions import PartitionsCreated
+from ledger.authorization.commands import issue_token, revoke_token_command
+from ledger.authorization.models import Token
+from ledger.authorization.signing import token_signer
+
+
+def test_backfill_balance_after_command(db_session, app):
+    for account_number, amount, accounting_type in [
+        ("11111111", "10.00", "C"),
+        ("22222222", "2.50", "D"),
+        ("11111111", "4.00", "C"),
+    ]:
+        record = models.Ledger(
+            account_number=account_number,
+            amount=Decimal(amount),
+            accounting_type=accounting_type,
+            created_at=datetime(2018, 1, 1),
+        )
+        db_session.add(record)
+
+    result = app.test_cli_runner().invoke(backfill_balance_after)
+
+    assert result.exit_code == 0
+    assert result.output == "Updated 3 ledger records in 2 accounts.\n"
+    assert [entry.balance for entry in Ledger.get_entries_for_account("11111111")] == [
+        Decimal("14.00"),
+        Decimal("10.00"),
+    ]
+    assert [entry.balance for entry in Ledger.get_entries_for_account("22222222")] == [Decimal("-2.50")]
+
+
+def test_rebuild_statements_command(db_session, app):
+    Ledger.add_entry("11111111", Decimal("10.00"), TypeCode.CREDIT)
+    Ledger.add_entry("22222222", Decimal("2.50"), TypeCode.DEBIT)
+    db_session.execute(models.Statement.__table__.delete())
+
+    result = app.test_cli_runner().invoke(rebuild_statements)
+
+    assert result.exit_code == 0
+    assert result.output == "Rebuilt 4 statements in 2 accounts.\n"
+    assert Statement.get_for_account("11111111", "month")[0].closing_balance == Decimal("10.00")
+
+
+def test_rebuild_statements_command_for_account(db_session, app):
+    Ledger.add_entry("11111111", Decimal("10.00"), TypeCode.CREDIT)
+    Ledger.add_entry("22222222", Decimal("2.50"), TypeCode.DEBIT)
+
+    result = app.test_cli_runner().invoke(rebuild_statements, ["--account", "22222222"])
+
+    assert result.exit_code == 0
+    assert result.output == "Rebuilt 2 statements in 1 accounts.\n"
+
+
+def test_create_partitions_command(db_session, app):
+    created = PartitionsCreated(created=["ledger_y2026m05", "ledger_y2026m06"], failed=[])
+    with patch("ledger.app.partitions.is_partitioned", return_value=True), patch(
+        "ledger.app.partitions.create_partitions", return_value=created
+    ) as mock_create_partitions, freeze_time("2026-03-31 23:00:00"):
+        result = app.test_cli_runner().invoke(create_partitions, ["--months-ahead", "3"])
+    assert result.exit_code == 0
+    assert result.output == "Created 2 ledger partitions.\n"
+    mock_create_partitions.assert_called_once_with(date(2026, 3, 31), date(2026, 6, 1))
+
+
+def test_create_partitions_command_reports_failed_partitions(db_session, app):
+    created = PartitionsCreated(created=["ledger_y2026m06"], failed=["ledger_y2026m05"])
+    with patch("ledger.app.partitions.is_partitioned", return_value=True), patch(
+        "ledger.app.partitions.create_partitions", return_value=created
+    ):
+        result = app.test_cli_runner().invoke(create_partitions)
+    assert result.exit_code == 1
+    assert "Created 1 ledger partitions." in result.output
+    assert "Failed to create ledger partitions: ledger_y2026m05." in result.output
+
+
+def test_create_partitions_command_without_partitioned_ledger(db_session, app):
+    result = app.test_cli_runner().invoke(create_partitions)
+    assert result.exit_code == 1
+    assert "The ledger table isn't partitioned." in result.output
+
+
+def test_create_partitions_command_if_partitioned_without_partitioned_ledger(db_session, app):
+    result = app.test_cli_runner().invoke(create_partitions, ["--if-partitioned"])
+    assert result.exit_code == 0
+    assert result.output == "The ledger table isn't partitioned.\n"
+
+
+class TestIssueTokenCommand:
+    def test_issue_token(self, app):
+        with patch.object(token_signer, "keys", OrderedDict([("new", "secret")])):
+            result = app.test_cli_runner().invoke(issue_token, ["--expires-in", "120", "--claim", "sub=m-1"])
+            assert result.exit_code == 0
+            claims = token_signer.verify(result.output.strip())
+        assert claims["sub"] == "m-1"
+        assert claims["exp"] - claims["iat"] == 120
+
+    def test_issue_token_with_malformed_claim(self, app):
+        with patch.object(token_signer, "keys", OrderedDict([("new", "secret")])):
+            result = app.test_cli_runner().invoke(issue_token, ["--claim", "sub"])
+        assert result.exit_code == 2
+        assert "Claims must be given as NAME=VALUE." in result.output
+
+    def test_issue_token_without_keys(self, app):
+        with patch.object(token_signer, "keys", OrderedDict()):
+            result = app.test_cli_runner().invoke(issue_token)
+        assert result.exit_code == 2
+        assert "SIGNED_TOKEN_KEYS is not configured." in result.output
+
+
+class TestRevokeTokenCommand:
+    def test_revoke_stored_token(self, db_session, app):
+        result = app.test_cli_runner().invoke(revoke_token_command, ["8ldi2lD"])
+        assert result.exit_code == 0
+        assert result.output == "Token revoked.\n"
+        assert Token.query.filter_by(access_token="8ldi2lD").one().revoked is True
+
+    def test_revoke_invalid_signed_token(self, db_session, app):
+        result = app.test_cli_runner().invoke(revoke_token_command, ["v1.new.abc.def"])
+        assert result.exit_code == 2
+        assert "Unknown token version or key." in result.output
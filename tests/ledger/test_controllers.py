@@ -3,11 +3,15 @@ from decimal import Decimal
 from http import HTTPStatus
 from unittest.mock import patch
 
+import pytest
 import pytz
 from freezegun import freeze_time
+from marshmallow import ValidationError
 
 from ledger.app.accounting import Ledger
 from ledger.app.accounting_types import TypeCode, credit_type, debit_type
+from ledger.app.controllers import TransactionHistoryView
+from ledger.app.group_commit import GroupCommitTimeout
 from ledger.authorization.models import Token
 
 
@@ -147,6 +151,20 @@ class TestTokenAuthorizationOnDebitEndpoint(TokenAuthenticationTests):
     status_code = HTTPStatus.CREATED
 
 
+class TestTokenAuthorizationOnBatchEndpoint(TokenAuthenticationTests):
+    endpoint_url = "/ledger/batch"
+    default_data = {"entries": [{"creditAmount": "1000.82", "accountNumber": "12340493"}]}
+    method = "POST"
+    status_code = HTTPStatus.CREATED
+
+
+class TestTokenAuthorizationOnTransferEndpoint(TokenAuthenticationTests):
+    endpoint_url = "/ledger/transfer"
+    default_data = {"amount": "10.00", "fromAccountNumber": "12340493", "toAccountNumber": "12340494"}
+    method = "POST"
+    status_code = HTTPStatus.CREATED
+
+
 class TestTokenAuthorizationOnTransactionHistoryEndpoint(TokenAuthenticationTests):
     endpoint_url = "/account/12390403/transactions"
     method = "GET"
@@ -159,6 +177,12 @@ class TestTokenAuthorizationOnBalanceEndpoint(TokenAuthenticationTests):
     status_code = HTTPStatus.OK
 
 
+class TestTokenAuthorizationOnStatementsEndpoint(TokenAuthenticationTests):
+    endpoint_url = "/account/12390403/statements"
+    method = "GET"
+    status_code = HTTPStatus.OK
+
+
 class TestMethodsNotAllowedOnCreditEndpoint(MethodNotAllowedTests):
     allowed_methods = {"POST", "OPTIONS"}
     endpoint_url = "/ledger/credit"
@@ -171,6 +195,18 @@ class TestMethodsNotAllowedOnDebitEndpoint(MethodNotAllowedTests):
     default_data = {"debitAmount": "1000.82", "accountNumber": "12340493"}
 
 
+class TestMethodsNotAllowedOnBatchEndpoint(MethodNotAllowedTests):
+    allowed_methods = {"POST", "OPTIONS"}
+    endpoint_url = "/ledger/batch"
+    default_data = {"entries": [{"creditAmount": "1000.82", "accountNumber": "12340493"}]}
+
+
+class TestMethodsNotAllowedOnTransferEndpoint(MethodNotAllowedTests):
+    allowed_methods = {"POST", "OPTIONS"}
+    endpoint_url = "/ledger/transfer"
+    default_data = {"amount": "10.00", "fromAccountNumber": "12340493", "toAccountNumber": "12340494"}
+
+
 class TestMethodsNotAllowedOnTransactionHistoryEndpoint(MethodNotAllowedTests):
     allowed_methods = {"GET", "OPTIONS", "HEAD"}
     endpoint_url = "/account/12390403/transactions"
@@ -181,6 +217,57 @@ class TestMethodsNotAllowedOnBalanceEndpoint(MethodNotAllowedTests):
     endpoint_url = "/account/12390403/balance"
 
 
+class TestMethodsNotAllowedOnStatementsEndpoint(MethodNotAllowedTests):
+    allowed_methods = {"GET", "OPTIONS", "HEAD"}
+    endpoint_url = "/account/12390403/statements"
+
+
+class TestIdempotencyKey:
+    url = "ledger/debit"
+
+    def post(self, client, amount="10.00", key="retry-1"):
+        return client.post(
+            self.url,
+            json={"debitAmount": amount, "accountNumber": "19201923830"},
+            headers={"Idempotency-Key": key},
+        )
+
+    def test_replayed_key_returns_original_entry(self, db_session, authorized_client):
+        response = self.post(authorized_client)
+        replayed = self.post(authorized_client)
+        assert replayed.status_code == HTTPStatus.CREATED
+        assert replayed.json == response.json
+        assert len(Ledger.get_entries_for_account("19201923830")) == 1
+
+    @pytest.mark.parametrize("amount", ["10", "1.005", "2.5"])
+    def test_replayed_key_returns_same_body_for_amount_without_two_decimals(
+        self, db_session, authorized_client, amount
+    ):
+        response = self.post(authorized_client, amount=amount)
+        replayed = self.post(authorized_client, amount=amount)
+        assert replayed.status_code == HTTPStatus.CREATED
+        assert replayed.json == response.json
+
+    def test_different_keys_post_again(self, db_session, authorized_client):
+        self.post(authorized_client, key="retry-1")
+        response = self.post(authorized_client, key="retry-2")
+        assert response.json["balance"] == "-20.00"
+
+    def test_key_reused_for_different_posting_returns_conflict(self, db_session, authorized_client):
+        self.post(authorized_client)
+        response = self.post(authorized_client, amount="11.00")
+        assert response.status_code == HTTPStatus.CONFLICT
+        expected_message = "Idempotency-Key 'retry-1' was used for a different posting."
+        assert response.json["error"]["description"] == expected_message
+
+    @pytest.mark.parametrize("key", ["", "k" * 256])
+    def test_invalid_key_returns_bad_request(self, db_session, authorized_client, key):
+        response = self.post(authorized_client, key=key)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        expected_message = "Idempotency-Key header must be 1 to 255 characters."
+        assert response.json["error"]["description"] == expected_message
+
+
 class TestCreditView:
     def test_add_credit_to_account_success(self, db_session, authorized_client):
         account_number = "19201923830"
@@ -303,6 +390,138 @@ def test_add_debit_without_application_json_header_returns_bad_request(db_sessio
     assert response.status_code == HTTPStatus.BAD_REQUEST
 
 
+def test_group_commit_timeout_returns_service_unavailable(db_session, authorized_client):
+    with patch("ledger.app.controllers.group_committer.add_entry", side_effect=GroupCommitTimeout):
+        response = authorized_client.post("ledger/debit", json={"debitAmount": "1.00", "accountNumber": "1"})
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    expected_message = "The posting wasn't committed in time, it may still be posted."
+    assert response.json["error"]["description"] == expected_message
+
+
+class TestBatchView:
+    def test_add_batch_of_entries_success(self, db_session, authorized_client):
+        response = authorized_client.post(
+            "ledger/batch",
+            json={
+                "entries": [
+                    {"creditAmount": "100.00", "accountNumber": "3820183"},
+                    {"debitAmount": "30.25", "accountNumber": "3820183"},
+                    {"debitAmount": "12.00", "accountNumber": "9928372"},
+                ]
+            },
+            headers={"Content-Type": "application/json"},
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert len(response.json) == 3
+        assertDictContains(
+            expected={
+                "amount": "100.00",
+                "accountNumber": "3820183",
+                "accountingType": "Credit",
+                "balance": "100.00",
+            },
+            actual=response.json[0],
+        )
+        assertDictContains(
+            expected={
+                "amount": "30.25",
+                "accountNumber": "3820183",
+                "accountingType": "Debit",
+                "balance": "69.75",
+            },
+            actual=response.json[1],
+        )
+        assertDictContains(
+            expected={
+                "amount": "12.00",
+                "accountNumber": "9928372",
+                "accountingType": "Debit",
+                "balance": "-12.00",
+            },
+            actual=response.json[2],
+        )
+        assert len(Ledger.get_entries_for_account("3820183")) == 2
+        assert len(Ledger.get_entries_for_account("9928372")) == 1
+
+    def test_add_batch_without_application_json_header_returns_bad_request(
+        self, db_session, authorized_client
+    ):
+        response = authorized_client.post("ledger/batch")
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+class TestTransferView:
+    def test_transfer_success(self, db_session, authorized_client):
+        response = authorized_client.post(
+            "ledger/transfer",
+            json={"amount": "25.00", "fromAccountNumber": "3820183", "toAccountNumber": "9928372"},
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert len(response.json) == 2
+        assertDictContains(
+            expected={
+                "amount": "25.00",
+                "accountNumber": "3820183",
+                "accountingType": "Debit",
+                "balance": "-25.00",
+            },
+            actual=response.json[0],
+        )
+        assertDictContains(
+            expected={
+                "amount": "25.00",
+                "accountNumber": "9928372",
+                "accountingType": "Credit",
+                "balance": "25.00",
+            },
+            actual=response.json[1],
+        )
+        assert response.json[0]["transactionId"] == response.json[1]["transactionId"]
+        assert "X-Consistency-Token" in response.headers
+
+    def test_negative_transfer_is_rejected(self, db_session, authorized_client):
+        with pytest.raises(ValidationError):
+            authorized_client.post(
+                "ledger/transfer", json={"amount": "-5", "fromAccountNumber": "A", "toAccountNumber": "B"}
+            )
+        assert Ledger.get_entries_for_account("A") == []
+        assert Ledger.get_entries_for_account("B") == []
+
+    def test_transfer_without_application_json_header_returns_bad_request(
+        self, db_session, authorized_client
+    ):
+        response = authorized_client.post("ledger/transfer")
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.parametrize("amount", ["1E+30", "99999999.995"])
+@pytest.mark.parametrize(
+    "path, json",
+    [
+        ("ledger/credit", lambda amount: {"creditAmount": amount, "accountNumber": "A"}),
+        ("ledger/debit", lambda amount: {"debitAmount": amount, "accountNumber": "A"}),
+        ("ledger/batch", lambda amount: {"entries": [{"creditAmount": amount, "accountNumber": "A"}]}),
+        (
+            "ledger/transfer",
+            lambda amount: {"amount": amount, "fromAccountNumber": "A", "toAccountNumber": "B"},
+        ),
+    ],
+)
+def test_amount_out_of_range_returns_bad_request(db_session, authorized_client, path, json, amount):
+    response = authorized_client.post(path, json=json(amount))
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json["error"]["description"] == f"Amount {amount} is out of range."
+    assert Ledger.get_entries_for_account("A") == []
+
+
+def test_largest_stored_amount_is_posted(db_session, authorized_client):
+    response = authorized_client.post(
+        "ledger/credit", json={"creditAmount": "99999999.994", "accountNumber": "A"}
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json["amount"] == "99999999.99"
+
+
 class TestTransactionHistoryView:
     def test_account_holder_does_not_exist_response_as_empty_list(self, db_session, authorized_client):
         account_number = "1234390"
@@ -433,6 +652,115 @@ class TestTransactionHistoryView:
         expected_message = "Unrecognized limit parameter: 'foo'"
         assert response.json["error"]["description"] == expected_message
 
+    def test_history_without_limit_is_streamed(self, db_session, authorized_client):
+        account_number = "939288202"
+        Ledger.add_entry(account_number, Decimal("201.74"), TypeCode.CREDIT)
+        response = authorized_client.get(f"/account/{account_number}/transactions")
+        assert response.is_streamed
+        assert response.mimetype == "application/json"
+        assert response.json[0]["balance"] == "201.74"
+
+    @pytest.mark.parametrize("number_of_entries", [0, 1, 4, 5])
+    def test_streamed_history_in_chunks(self, db_session, authorized_client, number_of_entries):
+        account_number = "939288202"
+        for _ in range(number_of_entries):
+            Ledger.add_entry(account_number, Decimal("1.00"), TypeCode.CREDIT)
+        with patch.object(TransactionHistoryView, "stream_chunk_size", 2):
+            response = authorized_client.get(f"/account/{account_number}/transactions")
+            # The response is generated as it is read.
+            balances = [entry["balance"] for entry in response.json]
+        assert balances == [f"{count}.00" for count in range(number_of_entries, 0, -1)]
+
+    def test_paging_through_history_with_cursor(self, db_session, authorized_client):
+        account_number = "939288202"
+        Ledger.add_entry(account_number, Decimal("201.74"), TypeCode.CREDIT)
+        Ledger.add_entry(account_number, Decimal("100.92"), TypeCode.DEBIT)
+        Ledger.add_entry(account_number, Decimal("928.32"), TypeCode.CREDIT)
+        Ledger.add_entry(account_number, Decimal("71.21"), TypeCode.DEBIT)
+        Ledger.add_entry(account_number, Decimal("93.21"), TypeCode.CREDIT)
+
+        pages = []
+        url = f"/account/{account_number}/transactions?limit=2"
+        response = authorized_client.get(url)
+        pages.append(response.json)
+        while "X-Next-Cursor" in response.headers:
+            response = authorized_client.get(f"{url}&cursor={response.headers['X-Next-Cursor']}")
+            assert response.status_code == HTTPStatus.OK
+            pages.append(response.json)
+
+        assert [len(page) for page in pages] == [2, 2, 1]
+        entries = [entry for page in pages for entry in page]
+        assert [entry["amount"] for entry in entries] == ["93.21", "71.21", "928.32", "100.92", "201.74"]
+        balances = [entry["balance"] for entry in entries]
+        assert balances == ["1051.14", "957.93", "1029.14", "100.82", "201.74"]
+
+    def test_history_does_not_read_current_balance(self, db_session, authorized_client):
+        account_number = "939288202"
+        Ledger.add_entry(account_number, Decimal("201.74"), TypeCode.CREDIT)
+        Ledger.add_entry(account_number, Decimal("100.92"), TypeCode.DEBIT)
+        with patch("ledger.app.accounting.Balance.get_for_account") as mock_get_for_account:
+            response = authorized_client.get(f"/account/{account_number}/transactions?limit=1")
+            cursor = response.headers["X-Next-Cursor"]
+            url = f"/account/{account_number}/transactions?limit=1&cursor={cursor}"
+            response = authorized_client.get(url)
+        mock_get_for_account.assert_not_called()
+        assert response.json[0]["balance"] == "201.74"
+        assert "X-Next-Cursor" in response.headers
+
+    def test_cursor_without_limit_returns_remaining_history(self, db_session, authorized_client):
+        account_number = "939288202"
+        Ledger.add_entry(account_number, Decimal("201.74"), TypeCode.CREDIT)
+        Ledger.add_entry(account_number, Decimal("100.92"), TypeCode.DEBIT)
+        Ledger.add_entry(account_number, Decimal("928.32"), TypeCode.CREDIT)
+        response = authorized_client.get(f"/account/{account_number}/transactions?limit=1")
+        cursor = response.headers["X-Next-Cursor"]
+
+        response = authorized_client.get(f"/account/{account_number}/transactions?cursor={cursor}")
+        assert [entry["balance"] for entry in response.json] == ["100.82", "201.74"]
+        assert "X-Next-Cursor" not in response.headers
+
+    def test_invalid_cursor_returns_bad_request(self, db_session, authorized_client):
+        account_number = "939288202"
+        response = authorized_client.get(f"/account/{account_number}/transactions?limit=2&cursor=foo")
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json["error"]["description"] == "Unrecognized cursor parameter: 'foo'"
+
+    def _add_entries_on_days(self, account_number):
+        for day, amount in [("2026-03-30", "10.00"), ("2026-03-31", "20.00"), ("2026-04-01", "30.00")]:
+            with freeze_time(f"{day} 12:00:00"):
+                Ledger.add_entry(account_number, Decimal(amount), TypeCode.CREDIT)
+
+    def test_history_in_time_range(self, db_session, authorized_client):
+        account_number = "939288202"
+        self._add_entries_on_days(account_number)
+        url = f"/account/{account_number}/transactions?from=2026-03-31&to=2026-04-01"
+        response = authorized_client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert [(entry["amount"], entry["balance"]) for entry in response.json] == [("20.00", "30.00")]
+
+    def test_history_page_in_time_range(self, db_session, authorized_client):
+        account_number = "939288202"
+        self._add_entries_on_days(account_number)
+        url = f"/account/{account_number}/transactions?from=2026-03-30T12:00:00Z&limit=1"
+        response = authorized_client.get(url)
+        assert [entry["balance"] for entry in response.json] == ["60.00"]
+        response = authorized_client.get(f"{url}&cursor={response.headers['X-Next-Cursor']}")
+        assert [entry["balance"] for entry in response.json] == ["30.00"]
+        response = authorized_client.get(f"{url}&cursor={response.headers['X-Next-Cursor']}")
+        assert [entry["balance"] for entry in response.json] == ["10.00"]
+
+    def test_invalid_time_range_returns_bad_request(self, db_session, authorized_client):
+        response = authorized_client.get("/account/939288202/transactions?to=tomorrow")
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json["error"]["description"] == "Unrecognized to parameter: 'tomorrow'"
+
+    def test_time_range_out_of_range_returns_bad_request(self, db_session, authorized_client):
+        query_string = {"from": "0001-01-01T00:30:00+01:00"}
+        response = authorized_client.get("/account/939288202/transactions", query_string=query_string)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        expected_message = "Unrecognized from parameter: '0001-01-01T00:30:00+01:00'"
+        assert response.json["error"]["description"] == expected_message
+
     @patch("ledger.app.accounting.uuid.uuid4")
     def test_transaction_id_is_present_in_transaction_history(
         self, mock_uuid4, db_session, authorized_client
@@ -475,3 +803,114 @@ class TestAccountBalanceView:
         response = authorized_client.get(f"/account/{account_number}/balance")
         assert response.status_code == HTTPStatus.OK
         assert response.json["balance"] == "2931.00"
+
+    def test_get_account_balance_at_timestamp(self, db_session, authorized_client):
+        account_number = "92373"
+        with freeze_time("2026-03-31 23:00:00"):
+            Ledger.add_entry(account_number, Decimal("2931.00"), TypeCode.CREDIT)
+        with freeze_time("2026-04-01 09:00:00"):
+            Ledger.add_entry(account_number, Decimal("31.00"), TypeCode.DEBIT)
+        response = authorized_client.get(f"/account/{account_number}/balance?at=2026-03-31T23:59:00Z")
+        assert response.status_code == HTTPStatus.OK
+        assert response.json["balance"] == "2931.00"
+
+    def test_get_account_balance_at_invalid_timestamp(self, db_session, authorized_client):
+        response = authorized_client.get("/account/92373/balance?at=yesterday")
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json["error"]["description"] == "Unrecognized at parameter: 'yesterday'"
+
+    def test_get_account_balance_at_timestamp_out_of_range(self, db_session, authorized_client):
+        query_string = {"at": "9999-12-31T23:59:00-05:00"}
+        response = authorized_client.get("/account/92373/balance", query_string=query_string)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        expected_message = "Unrecognized at parameter: '9999-12-31T23:59:00-05:00'"
+        assert response.json["error"]["description"] == expected_message
+
+
+class TestConditionalGet:
+    @pytest.mark.parametrize(
+        "url",
+        [
+            "/account/92373/balance",
+            "/account/92373/balance?at=2030-01-01T00:00:00Z",
+            "/account/92373/transactions",
+            "/account/92373/transactions?limit=10",
+        ],
+    )
+    def test_unchanged_resource_is_not_modified(self, db_session, authorized_client, url):
+        Ledger.add_entry("92373", Decimal("10.00"), TypeCode.CREDIT)
+        etag = authorized_client.get(url).headers["ETag"]
+
+        with patch("ledger.app.controllers.Ledger") as ledger, patch(
+            "ledger.app.controllers.dump_ledger_entries"
+        ) as dump:
+            response = authorized_client.get(url, headers={"If-None-Match": etag})
+
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        assert response.headers["ETag"] == etag
+        assert response.data == b""
+        assert not ledger.mock_calls
+        dump.assert_not_called()
+
+    @pytest.mark.parametrize("url", ["/account/92373/balance", "/account/92373/transactions?limit=10"])
+    def test_posting_changes_etag(self, db_session, authorized_client, url):
+        Ledger.add_entry("92373", Decimal("10.00"), TypeCode.CREDIT)
+        etag = authorized_client.get(url).headers["ETag"]
+        Ledger.add_entry("92373", Decimal("1.00"), TypeCode.DEBIT)
+
+        response = authorized_client.get(url, headers={"If-None-Match": etag})
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.headers["ETag"] != etag
+
+    def test_account_without_postings_has_etag(self, db_session, authorized_client):
+        response = authorized_client.get("/account/92373/balance")
+        assert response.headers["ETag"] == '"v0"'
+
+
+class TestStatementsView:
+    def test_get_monthly_statements(self, db_session, authorized_client):
+        account_number = "92373"
+        with freeze_time("2026-03-31 23:00:00"):
+            Ledger.add_entry(account_number, Decimal("2931.00"), TypeCode.CREDIT)
+        with freeze_time("2026-04-01 09:00:00"):
+            Ledger.add_entry(account_number, Decimal("31.00"), TypeCode.DEBIT)
+            Ledger.add_entry(account_number, Decimal("10.00"), TypeCode.CREDIT)
+        response = authorized_client.get(f"/account/{account_number}/statements?period=month")
+        assert response.status_code == HTTPStatus.OK
+        assert response.json == [
+            {
+                "period": "month",
+                "periodStart": "2026-04-01",
+                "openingBalance": "2931.00",
+                "totalCredits": "10.00",
+                "totalDebits": "31.00",
+                "entryCount": 2,
+                "closingBalance": "2910.00",
+            },
+            {
+                "period": "month",
+                "periodStart": "2026-03-01",
+                "openingBalance": "0.00",
+                "totalCredits": "2931.00",
+                "totalDebits": "0.00",
+                "entryCount": 1,
+                "closingBalance": "2931.00",
+            },
+        ]
+
+    def test_get_daily_statements(self, db_session, authorized_client):
+        account_number = "92373"
+        with freeze_time("2026-04-01 09:00:00"):
+            Ledger.add_entry(account_number, Decimal("31.00"), TypeCode.DEBIT)
+        with freeze_time("2026-04-02 09:00:00"):
+            Ledger.add_entry(account_number, Decimal("10.00"), TypeCode.CREDIT)
+        response = authorized_client.get(f"/account/{account_number}/statements?period=day")
+        assert response.status_code == HTTPStatus.OK
+        assert [statement["periodStart"] for statement in response.json] == ["2026-04-02", "2026-04-01"]
+        assert [statement["closingBalance"] for statement in response.json] == ["-21.00", "-31.00"]
+
+    def test_get_statements_with_invalid_period(self, db_session, authorized_client):
+        response = authorized_client.get("/account/92373/statements?period=week")
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json["error"]["description"] == "Unrecognized period parameter: 'week'"
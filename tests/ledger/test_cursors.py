@@ -0,0 +1,59 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+import pytz
+
+from ledger.app.accounting import LedgerEntry
+from ledger.app.accounting_types import debit_type
+from ledger.app.cursors import HistoryCursor, InvalidCursor
+
+
+def test_cursor_round_trip():
+    cursor = HistoryCursor(before_id=2837)
+    encoded = cursor.encode()
+    assert "=" not in encoded
+    assert HistoryCursor.decode(encoded) == cursor
+
+
+def test_cursor_with_created_at_round_trip():
+    created_at = datetime(2026, 3, 31, 23, 59, 1, 123456, tzinfo=pytz.UTC)
+    cursor = HistoryCursor(before_id=2837, created_at=created_at)
+    assert HistoryCursor.decode(cursor.encode()) == cursor
+
+
+def test_cursor_with_naive_created_at_is_in_utc():
+    cursor = HistoryCursor(before_id=2837, created_at=datetime(2026, 3, 31, 23, 59))
+    decoded = HistoryCursor.decode(cursor.encode())
+    assert decoded.created_at == datetime(2026, 3, 31, 23, 59, tzinfo=pytz.UTC)
+
+
+def test_cursor_following_entry():
+    entry = LedgerEntry(
+        id=82,
+        account_number="3829103",
+        amount=Decimal("20.00"),
+        accounting_type=debit_type,
+        balance=Decimal("5.00"),
+        created_at=datetime(2026, 3, 31, tzinfo=pytz.UTC),
+    )
+    assert HistoryCursor.following(entry) == HistoryCursor(
+        before_id=82, created_at=datetime(2026, 3, 31, tzinfo=pytz.UTC)
+    )
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "",
+        "not-a-cursor",
+        "bnVsbA",
+        "eyJiYWxhbmNlIjoiMSJ9",
+        "eyJpZCI6IngifQ",
+        "eyJpZCI6MSwidCI6IngifQ",
+        "eyJpZCI6MSwidCI6MWUzMDB9",
+    ],
+)
+def test_invalid_cursor_raises_invalid_cursor(value):
+    with pytest.raises(InvalidCursor):
+        HistoryCursor.decode(value)
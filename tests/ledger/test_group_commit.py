@@ -0,0 +1,181 @@
+import threading
+from concurrent.futures import Future
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+
+from ledger.app import metrics
+from ledger.app.accounting import Balance, Ledger, Posting
+from ledger.app.accounting_types import TypeCode
+from ledger.app.group_commit import GroupCommitTimeout, GroupCommitter
+from ledger.database import db
+
+
+def fake_post_entries(postings):
+    # Posts nothing, the entries are the postings themselves, so they aren't counted in the metrics.
+    if any(posting.amount < 0 for posting in postings):
+        raise ValueError("Negative amount")
+    return list(postings)
+
+
+@pytest.fixture
+def committer(app):
+    committer = GroupCommitter()
+    committer.init_app(app)
+    committer.enabled = True
+    with patch.object(metrics, "count_posted_entries"):
+        yield committer
+        committer.stop()
+
+
+def test_init_app_reads_config(app):
+    committer = GroupCommitter(enabled=True)
+    committer.init_app(app)
+    assert committer.app is app
+    assert committer.enabled is False
+    assert committer.interval == 0.005
+    assert committer.max_entries == 100
+    assert committer.timeout == 30
+
+
+def test_add_entry_posts_directly_when_disabled(app, db_session):
+    committer = GroupCommitter()
+    committer.init_app(app)
+    entry = committer.add_entry("39209030", Decimal("10.00"), TypeCode.CREDIT)
+    assert entry.balance == Decimal("10.00")
+    assert committer._thread is None
+
+
+def test_add_entry_with_idempotency_key_is_posted_directly(committer):
+    with patch.object(Ledger, "add_entry") as mock_add_entry:
+        entry = committer.add_entry("39209030", Decimal("10.00"), TypeCode.CREDIT, "retry-1")
+    mock_add_entry.assert_called_once_with("39209030", Decimal("10.00"), TypeCode.CREDIT, "retry-1")
+    assert entry == mock_add_entry.return_value
+    assert committer._thread is None
+
+
+def test_post_group_posts_in_one_transaction(committer, db_session):
+    group = [
+        (Posting("39209030", Decimal("10.00"), TypeCode.CREDIT), Future()),
+        (Posting("39209030", Decimal("4.00"), TypeCode.DEBIT), Future()),
+        (Posting("11111111", Decimal("1.00"), TypeCode.CREDIT), Future()),
+    ]
+    with patch.object(db.session, "commit", wraps=db.session.commit) as mock_commit:
+        committer.post_group(group)
+    mock_commit.assert_called_once_with()
+    assert [future.result().balance for _, future in group] == [
+        Decimal("10.00"),
+        Decimal("6.00"),
+        Decimal("1.00"),
+    ]
+    assert Balance.get_for_account("39209030") == Decimal("6.00")
+
+
+def test_failed_group_is_retried_per_posting(committer):
+    group = [
+        (Posting("39209030", Decimal("10.00"), TypeCode.CREDIT), Future()),
+        (Posting("39209030", Decimal("-4.00"), TypeCode.DEBIT), Future()),
+    ]
+    with patch.object(Ledger, "post_entries", side_effect=fake_post_entries) as mock_post_entries:
+        committer.post_group(group)
+    assert mock_post_entries.call_count == 3
+    assert group[0][1].result() == group[0][0]
+    with pytest.raises(ValueError):
+        group[1][1].result()
+
+
+def test_group_failing_to_commit_is_not_retried(committer):
+    group = [
+        (Posting("39209030", Decimal("10.00"), TypeCode.CREDIT), Future()),
+        (Posting("39209030", Decimal("4.00"), TypeCode.DEBIT), Future()),
+    ]
+    with patch.object(Ledger, "post_entries", side_effect=fake_post_entries) as mock_post_entries:
+        with patch.object(db.session, "commit", side_effect=RuntimeError("connection lost")):
+            committer.post_group(group)
+    mock_post_entries.assert_called_once()
+    for _, future in group:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=0)
+
+
+def test_concurrent_postings_are_grouped(committer):
+    committer.interval = 0.05
+    postings = [Posting(f"{index:08d}", Decimal("1.00"), TypeCode.CREDIT) for index in range(10)]
+    results = {}
+
+    def post(posting):
+        results[posting] = committer.add_entry(*posting)
+
+    with patch.object(Ledger, "post_entries", side_effect=fake_post_entries) as mock_post_entries:
+        threads = [threading.Thread(target=post, args=(posting,)) for posting in postings]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert mock_post_entries.call_count < len(postings)
+    assert results == {posting: posting for posting in postings}
+
+
+def test_group_is_posted_when_it_reaches_max_entries(committer):
+    committer.interval = 60
+    committer.max_entries = 2
+    postings = [Posting("39209030", Decimal(amount), TypeCode.CREDIT) for amount in ("1.00", "2.00")]
+    futures = [Future(), Future()]
+    with patch.object(Ledger, "post_entries", side_effect=fake_post_entries) as mock_post_entries:
+        for posting, future in zip(postings, futures):
+            committer._get_queue().put((posting, future))
+        assert [future.result(timeout=5) for future in futures] == postings
+    mock_post_entries.assert_called_once_with(postings)
+
+
+def test_stop_posts_queued_postings(committer):
+    committer.interval = 60
+    posting = Posting("39209030", Decimal("1.00"), TypeCode.CREDIT)
+    future = Future()
+    with patch.object(Ledger, "post_entries", side_effect=fake_post_entries):
+        committer._get_queue().put((posting, future))
+        committer.stop()
+    assert future.result(timeout=0) == posting
+    assert committer._thread is None
+
+
+def test_add_entry_times_out(committer):
+    committer.timeout = 0.01
+    with patch.object(committer, "_get_queue"), pytest.raises(GroupCommitTimeout):
+        committer.add_entry("39209030", Decimal("1.00"), TypeCode.CREDIT)
+
+
+def test_unexpected_error_is_passed_to_waiting_callers(committer):
+    group = [
+        (Posting("39209030", Decimal("10.00"), TypeCode.CREDIT), Future()),
+        (Posting("39209030", Decimal("-4.00"), TypeCode.DEBIT), Future()),
+    ]
+    with patch.object(Ledger, "post_entries", side_effect=ValueError), patch.object(
+        db.session, "rollback", side_effect=KeyboardInterrupt
+    ), pytest.raises(KeyboardInterrupt):
+        committer.post_group(group)
+    for _, future in group:
+        with pytest.raises(KeyboardInterrupt):
+            future.result(timeout=0)
+
+
+def test_thread_carries_on_after_failed_group(committer):
+    posting = Posting("39209030", Decimal("1.00"), TypeCode.CREDIT)
+    with patch.object(Ledger, "post_entries", side_effect=[ValueError, [posting]]), patch.object(
+        db.session, "rollback", side_effect=RuntimeError("connection lost")
+    ):
+        with pytest.raises(RuntimeError):
+            committer.add_entry(*posting)
+        assert committer.add_entry(*posting) == posting
+
+
+def test_dead_thread_is_restarted(committer):
+    posting = Posting("39209030", Decimal("1.00"), TypeCode.CREDIT)
+    queue = committer._get_queue()
+    queue.put(None)
+    committer._thread.join()
+    with patch.object(Ledger, "post_entries", side_effect=fake_post_entries):
+        assert committer.add_entry(*posting) == posting
+    assert committer._thread.is_alive()
+    assert committer._queue is queue
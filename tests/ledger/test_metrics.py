@@ -0,0 +1,82 @@
+from decimal import Decimal
+from http import HTTPStatus
+from unittest.mock import patch
+
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from ledger.app.accounting import Ledger
+from ledger.app.accounting_types import TypeCode
+from ledger.app.metrics import metrics, registry
+from ledger.database import db
+
+
+def sample(name, **labels):
+    return registry.get_sample_value(name, labels) or 0
+
+
+def test_metrics_endpoint(db_session, client):
+    response = client.get("/metrics")
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["Content-Type"] == CONTENT_TYPE_LATEST
+    assert b"ledger_request_duration_seconds" in response.data
+
+
+def test_metrics_of_workers_are_aggregated(db_session, client, tmp_path):
+    with patch.dict("os.environ", {"PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}):
+        with patch("ledger.app.metrics.multiprocess.MultiProcessCollector") as collector:
+            response = client.get("/metrics")
+
+    assert response.status_code == HTTPStatus.OK
+    assert collector.call_args[0][0] is not registry
+
+
+def test_requests_are_timed_by_url_rule(db_session, authorized_client):
+    endpoint = "/account/<account_number>/balance"
+    labels = {"method": "GET", "endpoint": endpoint, "status": "200"}
+    count = sample("ledger_request_duration_seconds_count", **labels)
+    queries = sample("ledger_request_db_queries_sum", endpoint=endpoint)
+
+    authorized_client.get("/account/12345/balance")
+
+    assert sample("ledger_request_duration_seconds_count", **labels) == count + 1
+    assert sample("ledger_request_db_queries_sum", endpoint=endpoint) > queries
+    assert sample("ledger_request_db_duration_seconds_count", endpoint=endpoint) > 0
+
+
+def test_requests_without_start_time_are_not_timed(app):
+    response = object()
+    with app.test_request_context("/metrics"):
+        with patch("ledger.app.metrics.request_duration") as request_duration:
+            assert metrics._end_request(response) is response
+    request_duration.labels.assert_not_called()
+
+
+def test_unmatched_requests_are_timed(client):
+    labels = {"method": "GET", "endpoint": "unmatched", "status": "404"}
+    count = sample("ledger_request_duration_seconds_count", **labels)
+
+    client.get("/not-found")
+
+    assert sample("ledger_request_duration_seconds_count", **labels) == count + 1
+
+
+def test_posted_entries_are_counted(db_session):
+    credits = sample("ledger_entries_posted_total", accounting_type="C")
+    debits = sample("ledger_entries_posted_total", accounting_type="D")
+
+    Ledger.add_entry("12345", Decimal("1.00"), TypeCode.CREDIT)
+    Ledger.add_entry("12345", Decimal("1.00"), TypeCode.DEBIT, idempotency_key="metrics-1")
+    Ledger.add_entry("12345", Decimal("1.00"), TypeCode.DEBIT, idempotency_key="metrics-1")
+
+    assert sample("ledger_entries_posted_total", accounting_type="C") == credits + 1
+    assert sample("ledger_entries_posted_total", accounting_type="D") == debits + 1
+
+
+def test_pool_checkouts_are_timed(db_session):
+    db.engine.connect().close()
+    count = sample("ledger_db_pool_checkout_wait_seconds_count")
+
+    db.engine.connect().close()
+
+    assert sample("ledger_db_pool_checkout_wait_seconds_count") == count + 1
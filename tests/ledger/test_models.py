@@ -1,7 +1,8 @@
+from datetime import date
 from decimal import Decimal
 
 from ledger.app.accounting_types import TypeCode
-from ledger.app.models import Ledger, Balance
+from ledger.app.models import ArchivedAccount, Ledger, Balance, PostingKey, Statement
 
 
 def test_ledger_save_method(db_session):
@@ -28,3 +29,32 @@ def test_ledger_representation(db_session):
 def test_balance_representation(db_session):
     entry = Balance(account_number="234234423", balance=Decimal("23424.93"))
     assert str(entry) == "<Balance: (id=None, account_number=234234423, balance=23424.93)>"
+
+
+def test_statement_representation(db_session):
+    entry = Statement(account_number="234234423", period="month", period_start=date(2026, 3, 1))
+    assert str(entry) == (
+        "<Statement: (id=None, account_number=234234423, period=month, period_start=2026-03-01)>"
+    )
+
+
+def test_posting_key_representation(db_session):
+    entry = PostingKey(key="retry-1", transaction_id="2b391f46-8c68-42e4-8364-ff344f092987")
+    assert str(entry) == (
+        "<PostingKey: (id=None, key=retry-1, transaction_id=2b391f46-8c68-42e4-8364-ff344f092987)>"
+    )
+
+
+def test_archived_account_representation(db_session):
+    entry = ArchivedAccount(account_number="11111111", last_id=42)
+    assert str(entry) == "<ArchivedAccount: (id=None, account_number=11111111, last_id=42)>"
+
+
+def test_ledger_is_indexed_by_account_number_and_id():
+    indexes = {index.name: [column.name for column in index.columns] for index in Ledger.__table__.indexes}
+    assert indexes["ix_ledger_account_number_id"] == ["account_number", "id"]
+
+
+def test_ledger_is_indexed_by_account_number_and_created_at():
+    indexes = {index.name: [column.name for column in index.columns] for index in Ledger.__table__.indexes}
+    assert indexes["ix_ledger_account_number_created_at"] == ["account_number", "created_at"]
@@ -0,0 +1,124 @@
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from ledger.app import partitions
+from ledger.database import db
+
+
+@pytest.mark.parametrize(
+    "value,months,expected",
+    [
+        (date(2026, 3, 31), 0, date(2026, 3, 1)),
+        (date(2026, 3, 31), 1, date(2026, 4, 1)),
+        (date(2026, 11, 15), 3, date(2027, 2, 1)),
+        (date(2026, 1, 15), -1, date(2025, 12, 1)),
+    ],
+)
+def test_add_months(value, months, expected):
+    assert partitions.add_months(value, months) == expected
+
+
+def test_partition_name():
+    assert partitions.get_partition_name(date(2026, 3, 31)) == "ledger_y2026m03"
+
+
+@pytest.mark.parametrize(
+    "name,expected",
+    [
+        ("ledger_y2026m03", True),
+        ("ledger_default", True),
+        ("ledger", False),
+        ("ledger_unpartitioned", False),
+        ("posting_key", False),
+    ],
+)
+def test_is_partition_name(name, expected):
+    assert partitions.is_partition_name(name) is expected
+
+
+def test_partition_statement():
+    assert partitions.get_partition_statement(date(2026, 12, 31)) == (
+        "CREATE TABLE ledger_y2026m12 PARTITION OF ledger "
+        "FOR VALUES FROM ('2026-12-01 00:00:00+00') TO ('2027-01-01 00:00:00+00')"
+    )
+
+
+def test_sqlite_ledger_is_not_partitioned(db_session):
+    assert partitions.is_partitioned() is False
+
+
+@pytest.mark.parametrize("relkind,expected", [("p", True), ("r", False)])
+def test_postgres_ledger_is_partitioned(db_session, relkind, expected):
+    with patch("ledger.app.partitions.get_dialect_name", return_value="postgresql"), patch.object(
+        db.session, "execute"
+    ) as mock_execute:
+        mock_execute.return_value.scalar.return_value = relkind
+        assert partitions.is_partitioned() is expected
+
+
+def test_get_partitions(db_session):
+    with patch.object(db.session, "execute", return_value=[("ledger_default",), ("ledger_y2026m03",)]):
+        assert partitions.get_partitions() == ["ledger_default", "ledger_y2026m03"]
+
+
+def test_create_partitions_skips_existing_partitions(db_session):
+    with patch("ledger.app.partitions.get_partitions", return_value=["ledger_y2026m04"]), patch(
+        "ledger.app.partitions.default_partition_has_entries", return_value=False
+    ), patch.object(db.session, "execute") as mock_execute:
+        result = partitions.create_partitions(date(2026, 3, 15), date(2026, 5, 1))
+    assert result == partitions.PartitionsCreated(created=["ledger_y2026m03", "ledger_y2026m05"], failed=[])
+    statements = [str(call[0][0]) for call in mock_execute.call_args_list]
+    assert statements == [
+        partitions.get_partition_statement(date(2026, 3, 1)),
+        partitions.get_partition_statement(date(2026, 5, 1)),
+    ]
+
+
+def test_create_partitions_commits_each_month(db_session):
+    with patch("ledger.app.partitions.get_partitions", return_value=[]), patch(
+        "ledger.app.partitions.create_partition"
+    ), patch.object(db.session, "commit") as mock_commit:
+        partitions.create_partitions(date(2026, 3, 15), date(2026, 5, 1))
+    assert mock_commit.call_count == 3
+
+
+def test_create_partitions_continues_after_failed_month(db_session):
+    def create_partition(month):
+        if month == date(2026, 4, 1):
+            raise OperationalError("CREATE TABLE", {}, Exception("lock timeout"))
+
+    with patch("ledger.app.partitions.get_partitions", return_value=[]), patch(
+        "ledger.app.partitions.create_partition", side_effect=create_partition
+    ), patch.object(db.session, "commit"), patch.object(db.session, "rollback") as mock_rollback:
+        result = partitions.create_partitions(date(2026, 3, 15), date(2026, 5, 1))
+    assert result == partitions.PartitionsCreated(
+        created=["ledger_y2026m03", "ledger_y2026m05"], failed=["ledger_y2026m04"]
+    )
+    mock_rollback.assert_called_once_with()
+
+
+def test_default_partition_has_entries(db_session):
+    with patch.object(db.session, "execute") as mock_execute:
+        mock_execute.return_value.scalar.return_value = True
+        assert partitions.default_partition_has_entries(date(2026, 3, 15)) is True
+    parameters = mock_execute.call_args[0][1]
+    assert parameters == {"start": "2026-03-01 00:00:00+00", "end": "2026-04-01 00:00:00+00"}
+
+
+def test_create_partition_moves_entries_from_default_partition(db_session):
+    with patch("ledger.app.partitions.default_partition_has_entries", return_value=True), patch.object(
+        db.session, "execute"
+    ) as mock_execute:
+        partitions.create_partition(date(2026, 3, 15))
+    in_month = "created_at >= '2026-03-01 00:00:00+00' AND created_at < '2026-04-01 00:00:00+00'"
+    statements = [str(call[0][0]) for call in mock_execute.call_args_list]
+    assert statements == [
+        "ALTER TABLE ledger DETACH PARTITION ledger_default",
+        partitions.get_partition_statement(date(2026, 3, 1)),
+        f"INSERT INTO ledger SELECT * FROM ledger_default WHERE {in_month}",
+        f"DELETE FROM ledger_default WHERE {in_month}",
+        "ALTER TABLE ledger ATTACH PARTITION ledger_default DEFAULT",
+    ]
@@ -0,0 +1,116 @@
+import json
+import tracemalloc
+
+import pytest
+from flask import Flask, Response, stream_with_context
+from sqlalchemy import create_engine
+
+from ledger.app.profiling import RequestProfiler
+
+
+TOKEN = "profile-secret"
+
+
+@pytest.fixture
+def profiler_config(tmp_path):
+    return {"PROFILING_ENABLED": True, "PROFILING_TOKEN": TOKEN, "PROFILING_SPOOL_DIR": str(tmp_path)}
+
+
+@pytest.fixture
+def profiled_app(profiler_config):
+    app = Flask(__name__)
+    app.config.update(profiler_config)
+    engine = create_engine("sqlite://")
+
+    @app.route("/query")
+    def query():
+        return str(engine.execute("SELECT 1").scalar())
+
+    @app.route("/stream")
+    def stream():
+        def generate():
+            yield "["
+            yield str(engine.execute("SELECT 2").scalar())
+            yield "]"
+
+        return Response(stream_with_context(generate()))
+
+    profiler = RequestProfiler()
+    profiler.init_app(app)
+    app.profiler = profiler
+    return app
+
+
+def read_profile(spool_dir, response):
+    # The profile is written when the server closes the response.
+    response.close()
+    profile_id = response.headers["X-Profile-Id"]
+    assert (spool_dir / f"{profile_id}.prof").exists()
+    return json.loads((spool_dir / f"{profile_id}.json").read_text())
+
+
+def test_no_hooks_are_registered_when_disabled(profiler_config):
+    app = Flask(__name__)
+    app.config.update(profiler_config, PROFILING_ENABLED=False)
+
+    RequestProfiler().init_app(app)
+
+    assert app.before_request_funcs == {}
+    assert app.after_request_funcs == {}
+
+
+def test_profile_is_written_to_spool_dir(profiled_app, tmp_path):
+    response = profiled_app.test_client().get("/query?x=1", headers={"X-Profile": TOKEN})
+
+    assert response.data == b"1"
+    profile = read_profile(tmp_path, response)
+    assert profile["method"] == "GET"
+    assert profile["path"] == "/query?x=1"
+    assert profile["status"] == 200
+    assert profile["queryCount"] == 1
+    assert profile["queries"][0]["statement"] == "SELECT 1"
+    assert profile["memoryPeak"] > 0
+
+
+def test_streamed_response_is_profiled_until_sent(profiled_app, tmp_path):
+    response = profiled_app.test_client().get("/stream", headers={"X-Profile": TOKEN})
+
+    assert response.data == b"[2]"
+    assert [query["statement"] for query in read_profile(tmp_path, response)["queries"]] == ["SELECT 2"]
+
+
+@pytest.mark.parametrize("headers", [{}, {"X-Profile": "wrong"}])
+def test_requests_without_token_are_not_profiled(profiled_app, tmp_path, headers):
+    response = profiled_app.test_client().get("/query", headers=headers)
+
+    assert "X-Profile-Id" not in response.headers
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_nothing_is_profiled_without_token_configured(profiled_app):
+    profiled_app.profiler.token = ""
+
+    response = profiled_app.test_client().get("/query", headers={"X-Profile": ""})
+
+    assert "X-Profile-Id" not in response.headers
+
+
+def test_one_request_is_profiled_at_a_time(profiled_app):
+    with profiled_app.profiler._lock:
+        response = profiled_app.test_client().get("/query", headers={"X-Profile": TOKEN})
+
+    assert response.data == b"1"
+    assert "X-Profile-Id" not in response.headers
+
+
+def test_profiling_is_stopped_when_response_is_not_profiled(profiled_app, tmp_path):
+    @profiled_app.after_request
+    def fail(response):
+        raise RuntimeError("after request failed")
+
+    response = profiled_app.test_client().get("/query", headers={"X-Profile": TOKEN})
+
+    assert response.status_code == 500
+    assert "X-Profile-Id" not in response.headers
+    assert not tracemalloc.is_tracing()
+    assert not profiled_app.profiler._lock.locked()
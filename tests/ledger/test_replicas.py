@@ -0,0 +1,135 @@
+from datetime import datetime
+from http import HTTPStatus
+from unittest.mock import patch
+
+import pytest
+import pytz
+from flask import g
+from sqlalchemy import select
+
+from ledger.app import models
+from ledger.app.replicas import (
+    ConsistencyToken,
+    InvalidConsistencyToken,
+    get_replica_binds,
+    replica_router,
+)
+from ledger.database import db
+
+
+@pytest.fixture
+def replica(app, tmp_path):
+    """A second SQLite database, configured as the only replica, which nothing is replicated to."""
+    binds = {"replica_0": f"sqlite:///{tmp_path / 'replica.db'}"}
+    with patch.dict(app.config, {"SQLALCHEMY_BINDS": binds}):
+        engine = db.get_engine(app, bind="replica_0")
+        db.Model.metadata.create_all(engine)
+        yield engine
+        engine.dispose()
+
+
+def replicate(engine, account_number):
+    """Copy the ledger records of an account from the primary to the replica."""
+    table = models.Ledger.__table__
+    records = db.session.execute(select([table]).where(table.c.account_number == account_number))
+    with engine.begin() as connection:
+        connection.execute(table.insert(), [dict(record) for record in records])
+
+
+def post_credit(client, account_number="11111111", amount="10.00"):
+    response = client.post(
+        "/ledger/credit",
+        json={"creditAmount": amount, "accountNumber": account_number},
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    return response.headers["X-Consistency-Token"]
+
+
+def test_consistency_token_round_trip():
+    token = ConsistencyToken("11111111", datetime(2026, 1, 1, 12, 30, 0, 123456, tzinfo=pytz.UTC), "abc")
+    assert ConsistencyToken.decode(token.encode()) == token
+
+
+@pytest.mark.parametrize("value", ["", "not a token", "eyJhIjoiMSJ9"])
+def test_invalid_consistency_token(value):
+    with pytest.raises(InvalidConsistencyToken):
+        ConsistencyToken.decode(value)
+
+
+def test_replica_binds(app):
+    binds = {"replica_1": "sqlite://", "replica_0": "sqlite://", "archive": "sqlite://"}
+    with patch.dict(app.config, {"SQLALCHEMY_BINDS": binds}):
+        assert get_replica_binds() == ["replica_0", "replica_1"]
+
+
+def test_reads_stay_on_primary_without_replicas(app):
+    assert replica_router.route_reads() is None
+    assert "replica_bind" not in g
+
+
+def test_waits_for_replica_to_catch_up(replica):
+    token = ConsistencyToken("11111111", datetime(2026, 1, 1, tzinfo=pytz.UTC), "abc")
+    with patch.object(replica_router, "_has_entry", side_effect=[False, False, True]) as has_entry:
+        with patch("ledger.app.replicas.time.sleep") as sleep:
+            assert replica_router._wait_for_entry("replica_0", token)
+    assert has_entry.call_count == 3
+    assert sleep.call_count == 2
+
+
+def test_balance_is_read_from_replica(db_session, authorized_client, replica):
+    post_credit(authorized_client)
+
+    response = authorized_client.get("/account/11111111/balance")
+
+    assert response.json == {"balance": "0"}
+    assert "replica_bind" not in g
+
+
+def test_history_and_statements_are_read_from_replica(db_session, authorized_client, replica):
+    post_credit(authorized_client)
+    replicate(replica, "11111111")
+
+    history = authorized_client.get("/account/11111111/transactions")
+    statements = authorized_client.get("/account/11111111/statements")
+
+    assert [entry["amount"] for entry in history.json] == ["10.00"]
+    assert statements.json == []
+
+
+def test_read_with_token_falls_back_to_primary(db_session, authorized_client, replica):
+    token = post_credit(authorized_client)
+
+    with patch.object(replica_router, "wait", 0):
+        response = authorized_client.get("/account/11111111/balance", headers={"X-Consistency-Token": token})
+
+    assert response.json == {"balance": "10.00"}
+
+
+def test_read_with_token_uses_replica_that_caught_up(db_session, authorized_client, replica):
+    token = post_credit(authorized_client)
+    replicate(replica, "11111111")
+    post_credit(authorized_client, amount="5.00")
+
+    response = authorized_client.get(
+        "/account/11111111/transactions", headers={"X-Consistency-Token": token}
+    )
+
+    assert [entry["amount"] for entry in response.json] == ["10.00"]
+
+
+def test_batch_returns_consistency_token(db_session, authorized_client, replica):
+    response = authorized_client.post(
+        "/ledger/batch",
+        json={"entries": [{"creditAmount": "1.00", "accountNumber": "22222222"}]},
+    )
+
+    token = ConsistencyToken.decode(response.headers["X-Consistency-Token"])
+    assert token.account_number == "22222222"
+    assert token.transaction_id == response.json[0]["transactionId"]
+
+
+def test_invalid_token_header_returns_bad_request(db_session, authorized_client):
+    response = authorized_client.get("/account/11111111/balance", headers={"X-Consistency-Token": "nope"})
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json["error"]["description"] == "Unrecognized X-Consistency-Token header: 'nope'"
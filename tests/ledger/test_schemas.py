@@ -5,9 +5,17 @@ from uuid import UUID
 import pytest
 from marshmallow import ValidationError
 
-from ledger.app.accounting import LedgerEntry
-from ledger.app.accounting_types import credit_type, debit_type
-from ledger.app.schemas import credit_schema, ledger_entry_schema, debit_schema, balance_schema
+from ledger.app.accounting import LedgerEntry, Posting
+from ledger.app.accounting_types import TypeCode, credit_type, debit_type
+from ledger.app.schemas import (
+    TransferData,
+    balance_schema,
+    batch_schema,
+    credit_schema,
+    debit_schema,
+    ledger_entry_schema,
+    transfer_schema,
+)
 
 
 class TestLedgerEntrySchema:
@@ -130,6 +138,88 @@ class TestDebitSchema:
         assert result.account_number == "93929393"
 
 
+class TestBatchSchema:
+    schema = batch_schema
+
+    def test_deserializing_object_with_valid_data(self):
+        data = {
+            "entries": [
+                {"creditAmount": "120.32", "accountNumber": "93929393"},
+                {"debitAmount": "20.00", "accountNumber": "12345678"},
+            ]
+        }
+        result = self.schema.load(data).data
+        assert result == [
+            Posting("93929393", Decimal("120.32"), TypeCode.CREDIT),
+            Posting("12345678", Decimal("20.00"), TypeCode.DEBIT),
+        ]
+
+    def test_missing_entries_raises_validation_error(self):
+        with pytest.raises(ValidationError) as exc_info:
+            self.schema.load({})
+        assert "Missing data for required field." in exc_info.value.messages["entries"]
+
+    def test_empty_entries_raises_validation_error(self):
+        with pytest.raises(ValidationError) as exc_info:
+            self.schema.load({"entries": []})
+        assert "entries" in exc_info.value.messages
+
+    def test_entry_with_both_amounts_raises_validation_error(self):
+        data = {"entries": [{"creditAmount": "1.00", "debitAmount": "1.00", "accountNumber": "93929393"}]}
+        with pytest.raises(ValidationError) as exc_info:
+            self.schema.load(data)
+        assert exc_info.value.messages["entries"][0]["_schema"] == [
+            "Exactly one of creditAmount or debitAmount is required."
+        ]
+
+    def test_entry_without_amount_raises_validation_error(self):
+        data = {"entries": [{"accountNumber": "93929393"}]}
+        with pytest.raises(ValidationError) as exc_info:
+            self.schema.load(data)
+        assert exc_info.value.messages["entries"][0]["_schema"] == [
+            "Exactly one of creditAmount or debitAmount is required."
+        ]
+
+    def test_entry_missing_account_number_raises_validation_error(self):
+        data = {"entries": [{"creditAmount": "1.00"}]}
+        with pytest.raises(ValidationError) as exc_info:
+            self.schema.load(data)
+        assert "Missing data for required field." in exc_info.value.messages["entries"][0]["accountNumber"]
+
+
+class TestTransferSchema:
+    schema = transfer_schema
+
+    def test_deserializing_object_with_valid_data(self):
+        data = {"amount": "12.50", "fromAccountNumber": "93929393", "toAccountNumber": "12345678"}
+        result = self.schema.load(data).data
+        assert result == TransferData(Decimal("12.50"), "93929393", "12345678")
+
+    def test_missing_account_number_raises_validation_error(self):
+        with pytest.raises(ValidationError) as exc_info:
+            self.schema.load({"amount": "12.50", "fromAccountNumber": "93929393"})
+        assert "Missing data for required field." in exc_info.value.messages["toAccountNumber"]
+
+    @pytest.mark.parametrize("amount", ["-5", "0", "0.00", "0.001", "0.004"])
+    def test_amount_not_greater_than_zero_raises_validation_error(self, amount):
+        data = {"amount": amount, "fromAccountNumber": "93929393", "toAccountNumber": "12345678"}
+        with pytest.raises(ValidationError) as exc_info:
+            self.schema.load(data)
+        assert exc_info.value.messages["amount"] == ["Must be greater than 0."]
+
+    def test_amount_rounding_up_to_a_cent_is_valid(self):
+        data = {"amount": "0.005", "fromAccountNumber": "93929393", "toAccountNumber": "12345678"}
+        assert self.schema.load(data).data.amount == Decimal("0.005")
+
+    def test_same_account_raises_validation_error(self):
+        data = {"amount": "12.50", "fromAccountNumber": "93929393", "toAccountNumber": "93929393"}
+        with pytest.raises(ValidationError) as exc_info:
+            self.schema.load(data)
+        assert exc_info.value.messages["_schema"] == [
+            "fromAccountNumber and toAccountNumber must be different accounts."
+        ]
+
+
 class TestBalanceSchema:
     schema = balance_schema
 